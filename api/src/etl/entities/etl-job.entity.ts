@@ -11,7 +11,7 @@ export class EtlJob {
   @Column({ name: 'job_type', length: 100 })
   job_type: string;
 
-  @ApiProperty({ description: 'Estado actual del trabajo (PENDIENTE, EN_CURSO, COMPLETADO, FALLIDO).' })
+  @ApiProperty({ description: 'Estado actual del trabajo (PENDIENTE, EN_CURSO o una etapa del ETL, COMPLETADO, FALLIDO).' })
   @Column({ length: 50 })
   status: string;
 
@@ -19,6 +19,14 @@ export class EtlJob {
   @Column({ type: 'date', name: 'data_date' })
   data_date: string;
 
+  @ApiProperty({ description: 'Parámetros del trabajo (fechas, idiomas y opciones del ETL).', example: { start_date: '2024-01-01', end_date: '2024-01-01', languages: ['es', 'en'] } })
+  @Column({ type: 'jsonb', nullable: true })
+  params: Record<string, unknown> | null;
+
+  @ApiProperty({ description: 'Último mensaje de progreso del trabajo.' })
+  @Column({ type: 'text', nullable: true })
+  message: string | null;
+
   @ApiProperty({ description: 'Momento en que se solicitó el inicio del trabajo.' })
   @CreateDateColumn({ type: 'timestamp with time zone', name: 'requested_at' })
   requested_at: Date;
@@ -35,6 +43,14 @@ export class EtlJob {
   @Column({ type: 'varchar', nullable: true, name: 'worker_id' })
   worker_id: string | null;
 
+  @ApiProperty({ description: 'Último heartbeat del worker que ejecuta el job.' })
+  @Column({ type: 'timestamp with time zone', nullable: true, name: 'heartbeat_at' })
+  heartbeat_at: Date | null;
+
+  @ApiProperty({ description: 'Intentos de ejecución (se reintenta si el worker deja de enviar heartbeats).' })
+  @Column({ type: 'integer', default: 0 })
+  attempts: number;
+
   @ApiProperty({ description: 'Número total de filas procesadas por el ETL.' })
   @Column({ type: 'integer', nullable: true, name: 'rows_processed' })
   rows_processed: number | null;
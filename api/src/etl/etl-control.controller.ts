@@ -10,16 +10,15 @@ export class EtlControlController {
   constructor(private readonly etlControlService: EtlControlService) {}
 
   @Post('start')
-  @ApiOperation({ summary: 'Iniciar un nuevo trabajo de ingesta ETL.' })
+  @ApiOperation({ summary: 'Encolar un nuevo trabajo de ingesta ETL.' })
   @ApiBody({ type: StartEtlDto, description: 'Parámetros del trabajo ETL a iniciar.' })
   @ApiResponse({ 
     status: HttpStatus.CREATED, 
-    description: 'Trabajo ETL registrado e iniciado (simulado) con éxito.', 
+    description: 'Trabajo ETL registrado en la cola (PENDIENTE) con éxito.', 
     type: EtlJob 
   })
   @ApiResponse({ status: HttpStatus.BAD_REQUEST, description: 'Parámetros de entrada inválidos.' })
   async startEtl(@Body() startEtlDto: StartEtlDto): Promise<EtlJob> {
-    // TODO: Lógica de invocación real (Cloud Pub/Sub, Cloud Tasks).
     return this.etlControlService.startEtlJob(startEtlDto);
   }
 
@@ -3,7 +3,6 @@ import { InjectRepository } from '@nestjs/typeorm';
 import { Repository } from 'typeorm';
 import { EtlJob } from './entities/etl-job.entity';
 import { StartEtlDto } from './dto/start-etl.dto';
-import { Cron, CronExpression } from '@nestjs/schedule';
 
 @Injectable()
 export class EtlControlService {
@@ -14,14 +13,18 @@ export class EtlControlService {
 
   async startEtlJob(startEtlDto: StartEtlDto): Promise<EtlJob> {
     const { date, lang } = startEtlDto;
-    
-    const now = new Date();
+    const languages = lang
+      .split(',')
+      .map((language) => language.trim())
+      .filter((language) => language.length > 0);
+
+    // El job queda en cola; un worker del ETL (etl/worker.py) lo reclama y lo ejecuta con estos parámetros
     const newJob = this.etlJobRepository.create({
-      job_type: 'INGESTA_DIARIA', 
+      job_type: 'INGESTA_DIARIA',
       data_date: date,
-      status: 'EN_CURSO', 
-      requested_at: now,
-      started_at: now,
+      status: 'PENDIENTE',
+      params: { start_date: date, end_date: date, languages },
+      message: 'Job en cola, pendiente de un worker.',
     });
 
     const savedJob = await this.etlJobRepository.save(newJob);
@@ -37,22 +40,4 @@ export class EtlControlService {
 
     return job;
   }
-
-  // Simulación de estado ETL
-  @Cron(CronExpression.EVERY_MINUTE)
-  async simulateJobCompletion() {
-    const jobToComplete = await this.etlJobRepository.findOne({
-      where: { status: 'EN_CURSO' },
-      order: { started_at: 'ASC' },
-    });
-
-    if (jobToComplete) {
-      jobToComplete.status = 'COMPLETADO';
-      jobToComplete.finished_at = new Date();
-      jobToComplete.rows_processed = Math.floor(Math.random() * (150000 - 50000 + 1)) + 50000;
-      jobToComplete.worker_id = 'simulador-local';
-
-      await this.etlJobRepository.save(jobToComplete);
-    }
-  }
 }
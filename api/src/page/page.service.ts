@@ -1,4 +1,5 @@
 import { Injectable, BadRequestException } from '@nestjs/common';
+import { ConfigService } from '@nestjs/config';
 import { DataSource } from 'typeorm';
 import { PaginationService, PaginatedResponse } from '../pagination/pagination.service';
 import { GetTopPagesDto } from './dto/get-top-pages.dto';
@@ -7,12 +8,34 @@ import { PageParamsDto } from './dto/page-params.dto';
 import { GetTrendingDto } from './dto/get-trending.dto';
 import { TrendingItem } from './schemas/page-response.schema';
 
+// Origen de Top-N y Trending: vistas materializadas, tablas resumen que el ETL
+// mantiene por día (ETL_VIEW_REFRESH_MODE=incremental) o tablas de servicio que el
+// ETL escribe al cargar (ETL_VIEW_REFRESH_MODE=serving)
+interface ViewTables {
+  topN: string;
+  trending: string;
+  // Tablas de servicio: el trending trae título original y categoría, y la serie se lee por título
+  pageSeries?: string;
+}
+
+const VIEW_SOURCES: Record<string, ViewTables> = {
+  materialized: { topN: 'mv_top_n_daily_by_language', trending: 'mv_trending_daily' },
+  summary: { topN: 'summary_top_n_daily_by_language', trending: 'summary_trending_daily' },
+  serving: { topN: 'serving_top_n_daily', trending: 'serving_trending_daily', pageSeries: 'serving_page_series' },
+};
+
 @Injectable()
 export class PageService {
+  private readonly viewTables: ViewTables;
+
   constructor(
     private dataSource: DataSource,
     private paginationService: PaginationService,
-  ) {}
+    private configService: ConfigService,
+  ) {
+    const source = this.configService.get<string>('API_VIEW_SOURCE', 'materialized');
+    this.viewTables = VIEW_SOURCES[source] ?? VIEW_SOURCES.materialized;
+  }
 
   async getTopPages(
     request: GetTopPagesDto
@@ -30,7 +53,7 @@ export class PageService {
       SELECT 
         COUNT(*) AS total
       FROM 
-        mv_top_n_daily_by_language
+        ${this.viewTables.topN}
       WHERE 
         day = $1 AND language = $2;
     `;
@@ -50,7 +73,7 @@ export class PageService {
         views_total,
         rank_by_views AS rank
       FROM 
-        mv_top_n_daily_by_language
+        ${this.viewTables.topN}
       WHERE 
         day = $1 AND language = $2
       ORDER BY 
@@ -68,7 +91,7 @@ export class PageService {
       SELECT 
         COUNT(*) as total
       FROM 
-        mv_trending_daily
+        ${this.viewTables.trending}
       WHERE 
         day = $1 AND language = $2;
       `,
@@ -77,7 +100,25 @@ export class PageService {
 
     const total = parseInt(totalResult[0]?.total || 0, 10);
     const items: TrendingItem[] = await this.dataSource.query(
+      this.viewTables.pageSeries
+        ? `
+      SELECT 
+          day, 
+          language, 
+          title_normalized as title, 
+          original_title,
+          views_total, 
+          CAST(trend_score AS DOUBLE PRECISION) AS trend_score,
+          category
+      FROM 
+        ${this.viewTables.trending}
+      WHERE 
+        day = $1 AND language = $2
+      ORDER BY 
+        trend_score DESC
+      LIMIT $3 OFFSET $4;
       `
+        : `
       SELECT 
           t.day, 
           t.language, 
@@ -87,7 +128,7 @@ export class PageService {
           CAST(COALESCE(t.trend_score, 0.0) AS DOUBLE PRECISION) AS trend_score,
           p.category
       FROM 
-        mv_trending_daily t
+        ${this.viewTables.trending} t
       INNER JOIN 
         dim_page p 
       ON 
@@ -127,6 +168,29 @@ export class PageService {
       date_from: request.date_from, 
       date_to: request.date_to 
     };
+    if (this.viewTables.pageSeries) {
+      // Una sola búsqueda por rango sobre la clave (language, title_normalized, day)
+      const servingSeriesQuery = `
+        SELECT
+          day,
+          views_total,
+          avg_views_7d,
+          avg_views_28d,
+          variations,
+          trend_score,
+          category
+        FROM 
+          ${this.viewTables.pageSeries}
+        WHERE 
+          language = $1 AND title_normalized = $2 AND day BETWEEN $3 AND $4
+        ORDER BY day ASC;
+      `;
+      const servingItems = await this.dataSource.query(
+        servingSeriesQuery, [request.lang, params.title, request.date_from, request.date_to]
+      );
+      return this.paginationService.buildSeriesResponse(servingItems, _params);
+    }
+
     const pageIdQuery = `
       SELECT 
         page_id, 
@@ -0,0 +1,72 @@
+import argparse
+import copy
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+import harness
+from synthetic import generate_titles
+
+from category_classifier import CategoryClassifier  # noqa: E402
+from transformation_etl import CATEGORY_RULES_PATH, build_title_normalized  # noqa: E402
+
+
+def grow_rules(rules: dict, keywords_per_language: int, languages, seed: int = 42) -> dict:
+    """
+    Reglas de producción ampliadas con palabras clave sintéticas (una de cada tres de
+    dos palabras) hasta keywords_per_language por idioma, repartidas entre categorías.
+    """
+    rng = np.random.default_rng(seed)
+    grown = copy.deepcopy(rules)
+    categories = grown['categories']
+    for language in languages:
+        present = sum(len(rule['keywords'].get(language, [])) for rule in categories)
+        for index in range(max(0, keywords_per_language - present)):
+            keyword = f'{language}term{index}'
+            if index % 3 == 0:
+                keyword = f'{keyword} {language}word{rng.integers(keywords_per_language)}'
+            categories[index % len(categories)]['keywords'].setdefault(language, []).append(keyword)
+    return grown
+
+
+def run(titles: int, keyword_counts, languages, unicode_mix: float, repeat: int) -> list:
+    with open(CATEGORY_RULES_PATH, encoding='utf-8') as rules_file:
+        rules = json.load(rules_file)
+    unique_titles = pd.Series(generate_titles(titles, unicode_mix))
+    normalized = build_title_normalized(unique_titles)
+    title_languages = pd.Series(np.resize(np.asarray(languages, dtype=object), len(normalized)))
+    title_list = normalized.tolist()
+    language_list = title_languages.tolist()
+
+    results = []
+    for keywords in keyword_counts:
+        classifier = CategoryClassifier(grow_rules(rules, keywords, languages), build_title_normalized)
+        params = {'titles': titles, 'keywords_per_language': keywords, 'languages': list(languages)}
+        results.append(harness.measure(
+            'classify_many', lambda: classifier.classify_many(normalized, title_languages),
+            len(normalized), params, repeat
+        ))
+        results.append(harness.measure(
+            'classify', lambda: [classifier.classify(title, language) for title, language in zip(title_list, language_list)],
+            len(title_list), params, repeat
+        ))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark del clasificador de categorías con reglas de tamaño creciente.'
+    )
+    parser.add_argument('--titles', type=int, default=100_000)
+    parser.add_argument('--keywords', type=int, nargs='+', default=[50, 200, 800],
+                        help='Palabras clave por idioma (las de producción más sintéticas).')
+    parser.add_argument('--languages', nargs='+', default=['en', 'es'])
+    parser.add_argument('--unicode-mix', type=float, default=0.3, help='Fracción de títulos con caracteres no ASCII.')
+    harness.add_report_arguments(parser)
+    args = parser.parse_args()
+
+    with harness.quiet():
+        results = run(args.titles, args.keywords, args.languages, args.unicode_mix, args.repeat)
+    sys.exit(harness.report(results, args))
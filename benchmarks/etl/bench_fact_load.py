@@ -0,0 +1,182 @@
+import argparse
+import sys
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from psycopg2 import extras
+
+import harness
+from synthetic import generate_pageviews, zipf_views
+
+from fact_partitions import ensure_fact_partitions, existing_partitions  # noqa: E402
+from main_etl import (  # noqa: E402
+    get_db_connection, load_data_to_postgres, upsert_fact_rows, FACT_COLUMNS,
+    FACT_LOAD_METHOD_COPY, FACT_LOAD_METHOD_VALUES
+)
+from title_cache import TitleCache  # noqa: E402
+from transformation_etl import transform_data  # noqa: E402
+
+# Idioma ficticio para aislar las filas del benchmark y poder limpiarlas al final
+BENCH_LANGUAGE = 'zz'
+# Fechas fuera del rango real: las particiones mensuales del benchmark se borran al final
+BENCH_START_DAY = date(2000, 1, 1)
+
+
+def create_bench_pages(cur, pages: int) -> np.ndarray:
+    rows = [(f'bench_page_{i}', BENCH_LANGUAGE, 'General', f'Bench_Page_{i}') for i in range(pages)]
+    inserted = extras.execute_values(
+        cur,
+        """
+            INSERT INTO dim_page (title_normalized, language, category, original_title)
+            VALUES %s
+            ON CONFLICT (title_normalized, language) DO UPDATE SET updated_at = NOW()
+            RETURNING page_id;
+        """,
+        rows,
+        page_size=1000,
+        fetch=True
+    )
+    return np.array([row[0] for row in inserted])
+
+
+def build_fact_frame(page_ids: np.ndarray, days: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    calendar = pd.date_range(BENCH_START_DAY, periods=days, freq='D')
+    n_rows = len(page_ids) * days
+    views = zipf_views(rng, n_rows)
+    return pd.DataFrame({
+        'day': np.repeat(calendar, len(page_ids)),
+        'page_id': np.tile(page_ids, days),
+        'language': BENCH_LANGUAGE,
+        'views_total': views,
+        'avg_views_7d': views * 0.9,
+        'avg_views_28d': views * 0.8,
+        'variations': rng.normal(0, 50, n_rows),
+        'trend_score': rng.normal(0, 1, n_rows),
+    })[FACT_COLUMNS]
+
+
+def delete_bench_facts(conn):
+    cur = conn.cursor()
+    cur.execute("DELETE FROM fact_pageviews_daily WHERE language = %s;", (BENCH_LANGUAGE,))
+    conn.commit()
+    cur.close()
+
+
+def cleanup(conn, partitions_before: set):
+    delete_bench_facts(conn)
+    cur = conn.cursor()
+    cur.execute("DELETE FROM dim_page WHERE language = %s;", (BENCH_LANGUAGE,))
+    for partition in existing_partitions(cur):
+        if partition.name not in partitions_before:
+            cur.execute(f"DROP TABLE {partition.name};")
+    conn.commit()
+    cur.close()
+
+
+def upsert_once(conn, df: pd.DataFrame, method: str, partitions):
+    cur = conn.cursor()
+    upsert_fact_rows(cur, df, method, partitions)
+    conn.commit()
+    cur.close()
+
+
+def run_fact_upsert(conn, pages: int, days: int, methods, repeat: int) -> list:
+    cur = conn.cursor()
+    page_ids = create_bench_pages(cur, pages)
+    df = build_fact_frame(page_ids, days)
+    partitions = ensure_fact_partitions(cur, df['day'])
+    conn.commit()
+    cur.close()
+
+    results = []
+    for method in methods:
+        # 'insert': tabla vacía para el idioma; 'upsert': todas las filas ya existen
+        results.append(harness.measure(
+            'upsert_fact_rows', lambda: upsert_once(conn, df, method, partitions), len(df),
+            {'method': method, 'phase': 'insert', 'pages': pages, 'days': days},
+            repeat, setup=lambda: delete_bench_facts(conn), trace_memory=False
+        ))
+        results.append(harness.measure(
+            'upsert_fact_rows', lambda: upsert_once(conn, df, method, partitions), len(df),
+            {'method': method, 'phase': 'upsert', 'pages': pages, 'days': days},
+            repeat, trace_memory=False
+        ))
+    return results
+
+
+def run_full_load(conn, pages: int, days: int, unicode_mix: float, repeat: int) -> list:
+    # load_data_to_postgres completo (dim_page + fact_pageviews_daily) sobre un extracto transformado
+    extracted = generate_pageviews(
+        pages=pages, days=days, languages=[BENCH_LANGUAGE], unicode_mix=unicode_mix, start_day=BENCH_START_DAY
+    )
+    with harness.quiet():
+        transformed = transform_data(extracted, title_cache=TitleCache())
+    frames = {}
+
+    def fresh_copy():
+        frames['df'] = transformed.copy()
+
+    def reset_and_copy():
+        # Carga en frío: sin hechos ni páginas del idioma de benchmark
+        delete_bench_facts(conn)
+        cur = conn.cursor()
+        cur.execute("DELETE FROM dim_page WHERE language = %s;", (BENCH_LANGUAGE,))
+        conn.commit()
+        cur.close()
+        fresh_copy()
+
+    params = {'pages': pages, 'days': days, 'unicode_mix': unicode_mix}
+    return [
+        harness.measure(
+            'load_data_to_postgres', lambda: load_data_to_postgres(frames['df']), len(transformed),
+            dict(params, phase='insert'), repeat, setup=reset_and_copy, trace_memory=False
+        ),
+        harness.measure(
+            'load_data_to_postgres', lambda: load_data_to_postgres(frames['df']), len(transformed),
+            dict(params, phase='upsert'), repeat, setup=fresh_copy, trace_memory=False
+        ),
+    ]
+
+
+def run(pages: int, days: int, methods, unicode_mix: float, repeat: int, full_load: bool = True) -> list:
+    conn = get_db_connection()
+    if conn is None:
+        raise SystemExit("Se requiere una base de datos local (variables DB_HOST, DB_USER, ...).")
+
+    cur = conn.cursor()
+    partitions_before = {partition.name for partition in existing_partitions(cur)}
+    cur.close()
+    conn.commit()
+    try:
+        cleanup(conn, partitions_before)
+        results = run_fact_upsert(conn, pages, days, methods, repeat)
+        if full_load:
+            cleanup(conn, partitions_before)
+            results.extend(run_full_load(conn, pages, days, unicode_mix, repeat))
+    finally:
+        cleanup(conn, partitions_before)
+        conn.close()
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark de carga en PostgreSQL: COPY vs execute_values y load_data_to_postgres completo.'
+    )
+    parser.add_argument('--pages', type=int, default=20_000)
+    parser.add_argument('--days', type=int, default=10)
+    parser.add_argument(
+        '--methods', nargs='+',
+        default=[FACT_LOAD_METHOD_VALUES, FACT_LOAD_METHOD_COPY],
+        choices=[FACT_LOAD_METHOD_VALUES, FACT_LOAD_METHOD_COPY]
+    )
+    parser.add_argument('--unicode-mix', type=float, default=0.3)
+    parser.add_argument('--skip-full-load', action='store_true', help='Omite load_data_to_postgres completo.')
+    harness.add_report_arguments(parser)
+    args = parser.parse_args()
+
+    with harness.quiet():
+        results = run(args.pages, args.days, args.methods, args.unicode_mix, args.repeat, not args.skip_full_load)
+    sys.exit(harness.report(results, args))
@@ -0,0 +1,52 @@
+import argparse
+import sys
+
+import harness
+from synthetic import generate_pageviews
+
+from frame_dtypes import compact_pageviews, expanded, memory_report  # noqa: E402
+from title_cache import TitleCache  # noqa: E402
+from transformation_etl import transform_data  # noqa: E402
+
+
+def run(pages: int, days: int, languages, unicode_mix: float, repeat: int) -> list:
+    # Bytes por fila de los DataFrames extraído y transformado con la representación
+    # previa (cadenas por fila, int64) y la compacta (diccionarios, enteros reducidos),
+    # junto con el tiempo de transform_data para cada entrada
+    df = generate_pageviews(pages=pages, days=days, languages=languages, unicode_mix=unicode_mix)
+    inputs = {'expanded': expanded(df), 'compact': compact_pageviews(df)}
+    params = {'pages': pages, 'days': days, 'languages': languages, 'unicode_mix': unicode_mix}
+
+    title_cache = TitleCache()
+    with harness.quiet():
+        transformed = transform_data(inputs['compact'], title_cache=title_cache)
+    extracted_report = memory_report(inputs['compact'])
+    transformed_report = memory_report(transformed)
+
+    results = []
+    for representation, extracted in inputs.items():
+        result = harness.measure(
+            'transform_data', lambda: transform_data(extracted, title_cache=title_cache),
+            len(extracted), dict(params, input=representation), repeat
+        )
+        key = 'bytes_per_row' if representation == 'compact' else 'bytes_per_row_expanded'
+        result['extracted_bytes_per_row'] = extracted_report[key]
+        result['transformed_bytes_per_row'] = transformed_report[key]
+        results.append(result)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Informe de memoria (bytes por fila) de los DataFrames del ETL: representación previa frente a compacta.'
+    )
+    parser.add_argument('--pages', type=int, default=20_000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--languages', nargs='+', default=['en', 'es'])
+    parser.add_argument('--unicode-mix', type=float, default=0.3)
+    harness.add_report_arguments(parser)
+    args = parser.parse_args()
+
+    with harness.quiet():
+        results = run(args.pages, args.days, args.languages, args.unicode_mix, args.repeat)
+    sys.exit(harness.report(results, args))
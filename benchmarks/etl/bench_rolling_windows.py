@@ -0,0 +1,72 @@
+import argparse
+import sys
+
+import pandas as pd
+
+import harness
+from synthetic import generate_pageviews
+
+from rolling_engine import grouped_rolling_metrics, WINDOW_MODE_ROWS, WINDOW_MODE_CALENDAR  # noqa: E402
+
+GROUP_KEYS = ('language', 'title_normalized')
+
+
+def build_workload(pages: int, days: int, density: float, seed: int = 42) -> pd.DataFrame:
+    # density = fracción de días en que cada página aparece en el top-N
+    extracted = generate_pageviews(
+        pages=pages, days=days, languages=['en'], density=density, zipf_exponent=1.1,
+        unicode_mix=0.0, variant_fraction=0.0, platform_types=('desktop',), seed=seed
+    )
+    df = extracted.rename(columns={'title': 'title_normalized'})[['day', 'language', 'title_normalized', 'views_total']]
+    df['day'] = pd.to_datetime(df['day'])
+    return df.sort_values(by=list(GROUP_KEYS) + ['day']).reset_index(drop=True)
+
+
+def dense_calendar_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    # Alternativa ingenua: matriz densa página x día con 0 en los días faltantes
+    dense = df.pivot_table(
+        index=list(GROUP_KEYS), columns='day', values='views_total', fill_value=0, aggfunc='sum'
+    ).astype(float)
+    long_mean = dense.T.rolling(window=28, min_periods=1).mean().T
+    short_mean = dense.T.rolling(window=7, min_periods=1).mean().T
+    long_std = dense.T.rolling(window=28, min_periods=1).std().T
+    stacked = pd.DataFrame({
+        'avg_views_7d': short_mean.stack(),
+        'avg_views_28d': long_mean.stack(),
+        'rolling_std_28d': long_std.stack(),
+    })
+    keys = pd.MultiIndex.from_frame(df[list(GROUP_KEYS) + ['day']])
+    return stacked.reindex(keys)
+
+
+def run(pages: int, days: int, densities, include_dense: bool, repeat: int) -> list:
+    results = []
+    for density in densities:
+        df = build_workload(pages, days, density)
+        workload = 'dense' if density >= 0.9 else 'sparse'
+        methods = [
+            ('engine_rows', lambda frame: grouped_rolling_metrics(frame, GROUP_KEYS, window_mode=WINDOW_MODE_ROWS)),
+            ('engine_calendar', lambda frame: grouped_rolling_metrics(
+                frame, GROUP_KEYS, window_mode=WINDOW_MODE_CALENDAR, calendar_start=frame['day'].min()
+            )),
+        ]
+        if include_dense:
+            methods.append(('dense_reindex_calendar', dense_calendar_metrics))
+        for name, func in methods:
+            params = {'method': name, 'workload': workload, 'density': density, 'pages': pages, 'days': days}
+            results.append(harness.measure('rolling_windows', lambda: func(df), len(df), params, repeat))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark de ventanas móviles por filas y por calendario.')
+    parser.add_argument('--pages', type=int, default=100_000)
+    parser.add_argument('--days', type=int, default=90)
+    parser.add_argument('--densities', type=float, nargs='+', default=[0.1, 0.3, 1.0])
+    parser.add_argument('--skip-dense', action='store_true', help='Omite la alternativa de matriz densa.')
+    harness.add_report_arguments(parser)
+    args = parser.parse_args()
+
+    with harness.quiet():
+        results = run(args.pages, args.days, args.densities, not args.skip_dense, args.repeat)
+    sys.exit(harness.report(results, args))
@@ -0,0 +1,67 @@
+import argparse
+import sys
+
+import harness
+from synthetic import generate_pageviews
+
+from title_cache import TitleCache  # noqa: E402
+from transformation_etl import (  # noqa: E402
+    transform_data, normalize_string, classify_page, normalize_titles, classify_titles
+)
+
+
+def run(pages: int, days: int, languages, zipf_exponent: float, unicode_mix: float, density: float, repeat: int) -> list:
+    df = generate_pageviews(
+        pages=pages, days=days, languages=languages,
+        zipf_exponent=zipf_exponent, unicode_mix=unicode_mix, density=density
+    )
+    titles = df['title'].drop_duplicates().reset_index(drop=True)
+    title_list = titles.tolist()
+    params = {
+        'pages': pages, 'days': days, 'languages': languages,
+        'zipf_exponent': zipf_exponent, 'unicode_mix': unicode_mix, 'density': density,
+    }
+    title_params = {'titles': len(titles), 'unicode_mix': unicode_mix}
+
+    caches = {}
+
+    def fresh_cache():
+        # Caché vacía en cada repetición: se mide la normalización/clasificación completa
+        caches['cold'] = TitleCache()
+
+    warm_cache = TitleCache()
+    with harness.quiet():
+        transform_data(df, title_cache=warm_cache)
+
+    return [
+        harness.measure('normalize_string', lambda: [normalize_string(title) for title in title_list],
+                        len(title_list), title_params, repeat),
+        harness.measure('classify_page', lambda: [classify_page(title) for title in title_list],
+                        len(title_list), title_params, repeat),
+        harness.measure('normalize_titles', lambda: normalize_titles(titles), len(titles), title_params, repeat),
+        harness.measure('classify_titles', lambda: classify_titles(titles), len(titles), title_params, repeat),
+        harness.measure('transform_data', lambda: transform_data(df, title_cache=caches['cold']),
+                        len(df), dict(params, title_cache='cold'), repeat, setup=fresh_cache),
+        harness.measure('transform_data', lambda: transform_data(df, title_cache=warm_cache),
+                        len(df), dict(params, title_cache='warm'), repeat),
+    ]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Benchmark de normalize_string, classify_page y transform_data sobre pageviews sintéticos.'
+    )
+    parser.add_argument('--pages', type=int, default=20_000)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--languages', nargs='+', default=['en', 'es'])
+    parser.add_argument('--zipf-exponent', type=float, default=1.1)
+    parser.add_argument('--unicode-mix', type=float, default=0.3, help='Fracción de títulos con caracteres no ASCII.')
+    parser.add_argument('--density', type=float, default=1.0, help='Probabilidad de que una página aparezca cada día.')
+    harness.add_report_arguments(parser)
+    args = parser.parse_args()
+
+    with harness.quiet():
+        results = run(
+            args.pages, args.days, args.languages, args.zipf_exponent, args.unicode_mix, args.density, args.repeat
+        )
+    sys.exit(harness.report(results, args))
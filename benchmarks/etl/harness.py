@@ -0,0 +1,141 @@
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, List, Optional
+
+ETL_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'etl'))
+if ETL_DIR not in sys.path:
+    sys.path.insert(0, ETL_DIR)
+
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.25
+
+
+def quiet():
+    # Los mensajes del ETL van a stderr: stdout queda para el JSON de resultados
+    return contextlib.redirect_stdout(sys.stderr)
+
+
+def measure(
+    benchmark: str,
+    func: Callable[[], object],
+    rows: int,
+    params: Optional[dict] = None,
+    repeat: int = DEFAULT_REPEAT,
+    setup: Optional[Callable[[], None]] = None,
+    trace_memory: bool = True
+) -> dict:
+    """
+    Ejecuta func repeat veces (setup antes de cada una) y se queda con el mejor tiempo.
+    La memoria se mide en una ejecución aparte: tracemalloc distorsiona el tiempo.
+    """
+    timings = []
+    with quiet():
+        for _ in range(max(1, repeat)):
+            if setup is not None:
+                setup()
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+
+    result = {
+        'benchmark': benchmark,
+        'params': params or {},
+        'rows': rows,
+        'seconds': round(min(timings), 4),
+        'seconds_median': round(sorted(timings)[len(timings) // 2], 4),
+        'rows_per_second': round(rows / min(timings), 1) if min(timings) > 0 else None,
+    }
+    if trace_memory:
+        with quiet():
+            if setup is not None:
+                setup()
+            tracemalloc.start()
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        result['peak_memory_mb'] = round(peak / (1024 ** 2), 2)
+    return result
+
+
+def result_key(result: dict) -> str:
+    # Identifica un caso entre ejecuciones: nombre y parámetros (no los tiempos)
+    return json.dumps({'benchmark': result['benchmark'], 'params': result['params']}, sort_keys=True)
+
+
+def compare_to_baseline(results: List[dict], baseline: List[dict], tolerance: float = DEFAULT_TOLERANCE) -> List[dict]:
+    """
+    Compara el mejor tiempo de cada caso con el de la línea base. Un caso es una
+    regresión si tarda más de (1 + tolerance) veces lo registrado.
+    """
+    baseline_by_key = {result_key(result): result for result in baseline}
+    comparisons = []
+    for result in results:
+        reference = baseline_by_key.get(result_key(result))
+        if reference is None or not reference['seconds']:
+            continue
+        ratio = result['seconds'] / reference['seconds']
+        comparisons.append({
+            'benchmark': result['benchmark'],
+            'params': result['params'],
+            'baseline_seconds': reference['seconds'],
+            'seconds': result['seconds'],
+            'ratio': round(ratio, 3),
+            'regression': ratio > 1 + tolerance,
+        })
+    return comparisons
+
+
+def environment() -> dict:
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def add_report_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help='Ejecuciones por caso (se toma la más rápida).')
+    parser.add_argument('--output', help='Archivo JSON donde guardar los resultados (por defecto, salida estándar).')
+    parser.add_argument('--baseline', help='Resultados JSON previos con los que comparar.')
+    parser.add_argument(
+        '--tolerance', type=float, default=DEFAULT_TOLERANCE,
+        help='Lentitud relativa admitida frente a la línea base antes de fallar (0.25 = 25%%).'
+    )
+
+
+def report(results: List[dict], args: argparse.Namespace) -> int:
+    """
+    Emite {'environment', 'results', 'comparison'} en JSON y devuelve el código de
+    salida: 1 si algún caso empeoró más que la tolerancia frente a --baseline.
+    """
+    document = {'environment': environment(), 'results': results}
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        comparison = compare_to_baseline(results, baseline.get('results', []), args.tolerance)
+        document['comparison'] = comparison
+        regressions = [entry for entry in comparison if entry['regression']]
+
+    text = json.dumps(document, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            output.write(text + '\n')
+    else:
+        print(text)
+
+    for entry in regressions:
+        print(
+            f"Regresión en {entry['benchmark']} {entry['params']}: {entry['seconds']} s "
+            f"frente a {entry['baseline_seconds']} s ({entry['ratio']}x).",
+            file=sys.stderr
+        )
+    return 1 if regressions else 0
@@ -0,0 +1,55 @@
+import argparse
+import sys
+
+import harness
+
+SUITES = ('transform', 'memory', 'rolling', 'classifier', 'load')
+
+
+def run(suites, scale: float, repeat: int) -> list:
+    # scale reduce o amplía los tamaños por defecto (p. ej. 0.1 para CI)
+    results = []
+    if 'transform' in suites:
+        import bench_transform
+        results.extend(bench_transform.run(
+            pages=int(20_000 * scale), days=30, languages=['en', 'es'],
+            zipf_exponent=1.1, unicode_mix=0.3, density=1.0, repeat=repeat
+        ))
+    if 'memory' in suites:
+        import bench_memory
+        results.extend(bench_memory.run(
+            pages=int(20_000 * scale), days=30, languages=['en', 'es'], unicode_mix=0.3, repeat=repeat
+        ))
+    if 'rolling' in suites:
+        import bench_rolling_windows
+        results.extend(bench_rolling_windows.run(
+            pages=int(100_000 * scale), days=90, densities=[0.1, 1.0], include_dense=False, repeat=repeat
+        ))
+    if 'classifier' in suites:
+        import bench_classifier
+        results.extend(bench_classifier.run(
+            titles=int(100_000 * scale), keyword_counts=[50, 200, 800], languages=['en', 'es'],
+            unicode_mix=0.3, repeat=repeat
+        ))
+    if 'load' in suites:
+        import bench_fact_load
+        from main_etl import FACT_LOAD_METHOD_COPY
+        results.extend(bench_fact_load.run(
+            pages=int(20_000 * scale), days=10, methods=[FACT_LOAD_METHOD_COPY], unicode_mix=0.3, repeat=repeat
+        ))
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description='Suite de benchmarks del ETL con salida JSON y comparación contra una línea base.'
+    )
+    parser.add_argument('--suites', nargs='+', default=['transform', 'memory', 'rolling', 'classifier'], choices=SUITES,
+                        help="'load' requiere PostgreSQL local (variables DB_*).")
+    parser.add_argument('--scale', type=float, default=1.0, help='Factor sobre el número de páginas por defecto.')
+    harness.add_report_arguments(parser)
+    args = parser.parse_args()
+
+    with harness.quiet():
+        results = run(args.suites, args.scale, args.repeat)
+    sys.exit(harness.report(results, args))
@@ -0,0 +1,115 @@
+# Generador de pageviews sintéticos con el esquema que devuelve extract_pageviews
+# (day, language, platform_type, title, views_total); determinista para una semilla
+from datetime import date
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+PLATFORM_TYPES = ('desktop', 'mobile')
+
+# Vocabulario por escritura; incluye palabras que activan las reglas de clasificación
+ASCII_WORDS = [
+    'history', 'river', 'station', 'king', 'album', 'university', 'war', 'island', 'church', 'battle',
+    'film', 'series', 'actor', 'python', 'software', 'data', 'football', 'world_cup', 'physics', 'space',
+    'list', 'of', 'the', 'national', 'party', 'election', 'season', 'county', 'district', 'league',
+]
+NON_ASCII_WORDS = [
+    # Latino con diacríticos (compuestos y descompuestos)
+    'café', 'señor', 'über', 'naïve', 'São', 'Zürich', 'Ångström', 'Dvořák', 'Łódź', 'crème', 'brûlée',
+    'canción', 'Bogotá', 'Mérida', 'Cafe\u0301', 'nin\u0303o',
+    # Cirílico, griego, árabe, devanagari, CJK y emoji
+    'Москва', 'история', 'Ελλάδα', 'القاهرة', 'हिन्दी', '東京', '日本語', '北京', 'サッカー', '🎬',
+]
+TITLE_SUFFIXES = ['', '', '', '_(film)', '_(album)', '_(software)', '_(season_2)']
+
+
+def zipf_weights(n: int, exponent: float) -> np.ndarray:
+    # Popularidad por rango: la página de rango r recibe un peso proporcional a r^-exponent
+    return np.arange(1, n + 1, dtype=np.float64) ** -exponent
+
+
+def zipf_views(rng: np.random.Generator, size: int, exponent: float = 1.6, max_views: int = 10_000_000) -> np.ndarray:
+    return rng.zipf(exponent, size).clip(max=max_views).astype(np.int64)
+
+
+def generate_titles(
+    pages: int,
+    unicode_mix: float = 0.3,
+    variant_fraction: float = 0.05,
+    seed: int = 42
+) -> np.ndarray:
+    """
+    Títulos únicos estilo Wikipedia (palabras unidas con '_'). unicode_mix es la
+    fracción de títulos con palabras no ASCII; variant_fraction la de títulos que son
+    variantes de mayúsculas de otro (mismo title_normalized tras la normalización).
+    """
+    rng = np.random.default_rng(seed)
+    titles = []
+    seen = set()
+    for index in range(pages):
+        if titles and rng.random() < variant_fraction:
+            base = titles[rng.integers(len(titles))]
+            candidate = base.upper() if base != base.upper() else base.lower()
+        else:
+            words = list(rng.choice(ASCII_WORDS, size=rng.integers(1, 4)))
+            if rng.random() < unicode_mix:
+                words[rng.integers(len(words))] = rng.choice(NON_ASCII_WORDS)
+            candidate = '_'.join(words)
+            candidate = candidate[:1].upper() + candidate[1:] + rng.choice(TITLE_SUFFIXES)
+        if candidate in seen:
+            candidate = f'{candidate}_{index}'
+        seen.add(candidate)
+        titles.append(candidate)
+    return np.array(titles, dtype=object)
+
+
+def generate_pageviews(
+    pages: int = 10_000,
+    days: int = 30,
+    languages: Optional[List[str]] = None,
+    zipf_exponent: float = 1.1,
+    unicode_mix: float = 0.3,
+    density: float = 1.0,
+    variant_fraction: float = 0.05,
+    max_daily_views: int = 1_000_000,
+    start_day: date = date(2024, 1, 1),
+    platform_types: Tuple[str, ...] = PLATFORM_TYPES,
+    seed: int = 42
+) -> pd.DataFrame:
+    """
+    Filas (día, idioma, plataforma, título) con vistas de distribución Zipf por rango
+    de página. density es la probabilidad de que una página aparezca un día dado en
+    una plataforma (el top-N de BigQuery no incluye todas las páginas todos los días).
+    """
+    if languages is None:
+        languages = ['en', 'es']
+    rng = np.random.default_rng(seed)
+    titles = generate_titles(pages, unicode_mix, variant_fraction, seed)
+    popularity = zipf_weights(pages, zipf_exponent) * max_daily_views
+    calendar = pd.date_range(start_day, periods=days, freq='D').date
+
+    frames = []
+    for language in languages:
+        # Cada idioma tiene su propio orden de popularidad
+        ranks = rng.permutation(pages)
+        rows = pages * days * len(platform_types)
+        page_index = np.tile(np.repeat(np.arange(pages), len(platform_types)), days)
+        day_index = np.repeat(np.arange(days), pages * len(platform_types))
+        platform_index = np.tile(np.arange(len(platform_types)), pages * days)
+        present = rng.random(rows) < density if density < 1.0 else np.ones(rows, dtype=bool)
+
+        page_index, day_index, platform_index = page_index[present], day_index[present], platform_index[present]
+        mobile_share = rng.beta(4, 4, pages)[page_index]
+        share = np.where(platform_index == 1, mobile_share, 1 - mobile_share) if len(platform_types) > 1 else 1.0
+        noise = rng.lognormal(0.0, 0.35, len(page_index))
+        views = np.maximum(1, np.rint(popularity[ranks[page_index]] * share * noise)).astype(np.int64)
+
+        frames.append(pd.DataFrame({
+            'day': calendar[day_index],
+            'language': language,
+            'platform_type': np.array(platform_types, dtype=object)[platform_index],
+            'title': titles[page_index],
+            'views_total': views,
+        }))
+    return pd.concat(frames, ignore_index=True)
@@ -16,7 +16,8 @@ CREATE TABLE IF NOT EXISTS etl_jobs (
     finished_at TIMESTAMP WITH TIME ZONE,
     worker_id VARCHAR(100),
     rows_processed INT,
-    error_message TEXT
+    error_message TEXT,
+    metrics JSONB -- Tiempos, CPU, memoria, filas, bytes y viajes a la base de datos por etapa
 );
 
 -- Tabla de Dimensión
@@ -34,8 +35,10 @@ CREATE TABLE IF NOT EXISTS dim_page (
 -- Tabla de Hechos Diarios de Vistas
 -- Se desnormaliza 'language' aquí para mejorar el rendimiento de consulta/indexación
 -- y para cumplir con el requisito de indexar directamente 'lang'
+-- Particionada por mes sobre 'day': el ETL crea la partición de cada mes antes de
+-- cargarlo (fact_pageviews_daily_AAAA_MM) y la retención desconecta las antiguas,
+-- de modo que el costo del UPSERT y de sus índices no crece con el histórico.
 CREATE TABLE IF NOT EXISTS fact_pageviews_daily (
-    fact_id SERIAL PRIMARY KEY,
     day DATE NOT NULL,
     page_id INTEGER NOT NULL REFERENCES dim_page(page_id),
     language VARCHAR(10) NOT NULL, -- Incluido para optimizar consultas; es intencionalmente redundante con dim_page.language.
@@ -46,5 +49,5 @@ CREATE TABLE IF NOT EXISTS fact_pageviews_daily (
     trend_score NUMERIC,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
-    UNIQUE (day, page_id, language) -- Garantiza un registro por página, fecha e idioma
-);
\ No newline at end of file
+    PRIMARY KEY (day, page_id, language) -- Garantiza un registro por página, fecha e idioma
+) PARTITION BY RANGE (day);
\ No newline at end of file
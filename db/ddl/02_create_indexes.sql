@@ -1,5 +1,6 @@
 -- 1. Índices en tabla fact_pageviews_daily
-CREATE INDEX IF NOT EXISTS idx_fact_pageviews_daily_day ON fact_pageviews_daily (day);
+-- Definidos sobre la tabla particionada: cada partición mensual tiene los suyos.
+-- Las consultas por día usan la clave primaria (day, page_id, language).
 CREATE INDEX IF NOT EXISTS idx_fact_pageviews_daily_page_id ON fact_pageviews_daily (page_id);
 CREATE INDEX IF NOT EXISTS idx_fact_pageviews_daily_language ON fact_pageviews_daily (language);
 CREATE INDEX IF NOT EXISTS idx_fact_pageviews_daily_views_total ON fact_pageviews_daily (views_total DESC);
@@ -0,0 +1,12 @@
+-- Estado móvil por página para la transformación incremental del ETL.
+-- Guarda las últimas 28 observaciones (día, vistas) de cada (language, title_normalized),
+-- suficientes para calcular avg_views_7d/28d, variations y trend_score de un día nuevo
+-- sin re-extraer el mes anterior.
+CREATE TABLE IF NOT EXISTS etl_rolling_state (
+    language VARCHAR(10) NOT NULL,
+    title_normalized VARCHAR(255) NOT NULL,
+    days DATE[] NOT NULL,
+    views BIGINT[] NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (language, title_normalized)
+);
@@ -0,0 +1,36 @@
+-- Índice único requerido por REFRESH MATERIALIZED VIEW CONCURRENTLY en el Top-N
+-- (mv_trending_daily ya tiene idx_mv_trending_daily_day_lang_title)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_top_n_daily_day_lang_title
+    ON mv_top_n_daily_by_language (day, language, title_normalized);
+
+
+-- Tablas resumen con el mismo contenido que las vistas materializadas.
+-- En el modo de refresco incremental (ETL_VIEW_REFRESH_MODE=incremental) el ETL
+-- sólo reescribe las particiones (day, language) que cargó, en una transacción,
+-- y la API las lee con API_VIEW_SOURCE=summary.
+CREATE TABLE IF NOT EXISTS summary_top_n_daily_by_language (
+    day DATE NOT NULL,
+    language VARCHAR(10) NOT NULL,
+    title_normalized VARCHAR(255) NOT NULL,
+    original_title VARCHAR(255) NOT NULL,
+    views_total BIGINT NOT NULL,
+    rank_by_views BIGINT NOT NULL,
+    PRIMARY KEY (day, language, title_normalized)
+);
+
+CREATE INDEX IF NOT EXISTS idx_summary_top_n_daily_language_rank
+    ON summary_top_n_daily_by_language (day, language, rank_by_views);
+
+
+CREATE TABLE IF NOT EXISTS summary_trending_daily (
+    day DATE NOT NULL,
+    language VARCHAR(10) NOT NULL,
+    title_normalized VARCHAR(255) NOT NULL,
+    original_title VARCHAR(255) NOT NULL,
+    views_total BIGINT NOT NULL,
+    trend_score NUMERIC NOT NULL,
+    PRIMARY KEY (day, language, title_normalized)
+);
+
+CREATE INDEX IF NOT EXISTS idx_summary_trending_daily_day_lang_trend
+    ON summary_trending_daily (day, language, trend_score DESC);
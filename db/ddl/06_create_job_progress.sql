@@ -0,0 +1,12 @@
+-- Progreso de cada job ETL por shard (día, idioma). Cada bloque de días se carga en una
+-- transacción que también registra aquí la etapa alcanzada: un job reanudado con el mismo
+-- job_id salta los shards terminados y continúa desde la última etapa confirmada.
+CREATE TABLE IF NOT EXISTS etl_job_progress (
+    job_id UUID NOT NULL REFERENCES etl_jobs(job_id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    language VARCHAR(10) NOT NULL,
+    stage VARCHAR(30) NOT NULL, -- CARGADO (dim_page y hechos confirmados) o COMPLETADO (vistas refrescadas)
+    rows_loaded INT,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (job_id, day, language)
+);
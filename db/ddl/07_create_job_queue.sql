@@ -0,0 +1,12 @@
+-- Cola de trabajos sobre etl_jobs. La API registra jobs PENDIENTE con sus parámetros y los
+-- workers (etl/worker.py) los reclaman con SELECT ... FOR UPDATE SKIP LOCKED. Mientras un job
+-- corre, su worker renueva lease_expires_at con cada heartbeat; si el lease vence (worker
+-- caído), cualquier worker lo devuelve a la cola o lo marca FALLIDO tras el máximo de intentos.
+ALTER TABLE etl_jobs ADD COLUMN IF NOT EXISTS heartbeat_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE etl_jobs ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP WITH TIME ZONE;
+ALTER TABLE etl_jobs ADD COLUMN IF NOT EXISTS attempts INT NOT NULL DEFAULT 0;
+
+-- Reclamo en orden de llegada y búsqueda de leases vencidos sin recorrer el historial de jobs
+CREATE INDEX IF NOT EXISTS idx_etl_jobs_pending ON etl_jobs (requested_at) WHERE status = 'PENDIENTE';
+CREATE INDEX IF NOT EXISTS idx_etl_jobs_lease ON etl_jobs (lease_expires_at)
+    WHERE status NOT IN ('PENDIENTE', 'COMPLETADO', 'FALLIDO');
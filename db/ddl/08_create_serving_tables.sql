@@ -0,0 +1,49 @@
+-- Tablas de servicio para la API (ETL_VIEW_REFRESH_MODE=serving, API_VIEW_SOURCE=serving).
+-- El ETL las escribe desde el DataFrame transformado, en la misma transacción que los
+-- hechos: las listas de cada (day, language) se reemplazan completas desde COPY (la API
+-- ve la lista anterior o la nueva, nunca una mezcla) y no hay vistas que refrescar.
+
+-- Top-K por vistas de cada (day, language), con el ranking ya calculado
+CREATE TABLE IF NOT EXISTS serving_top_n_daily (
+    day DATE NOT NULL,
+    language VARCHAR(10) NOT NULL,
+    title_normalized VARCHAR(255) NOT NULL,
+    original_title VARCHAR(255) NOT NULL,
+    views_total BIGINT NOT NULL,
+    rank_by_views BIGINT NOT NULL,
+    PRIMARY KEY (day, language, title_normalized)
+);
+
+CREATE INDEX IF NOT EXISTS idx_serving_top_n_daily_rank
+    ON serving_top_n_daily (day, language, rank_by_views);
+
+
+-- Páginas en tendencia (trend_score >= umbral) de cada (day, language), con su categoría
+CREATE TABLE IF NOT EXISTS serving_trending_daily (
+    day DATE NOT NULL,
+    language VARCHAR(10) NOT NULL,
+    title_normalized VARCHAR(255) NOT NULL,
+    original_title VARCHAR(255) NOT NULL,
+    category VARCHAR(50),
+    views_total BIGINT NOT NULL,
+    trend_score NUMERIC NOT NULL,
+    PRIMARY KEY (day, language, title_normalized)
+);
+
+CREATE INDEX IF NOT EXISTS idx_serving_trending_daily_trend
+    ON serving_trending_daily (day, language, trend_score DESC);
+
+
+-- Serie diaria por página, indexada por título: una sola búsqueda por rango, sin dim_page
+CREATE TABLE IF NOT EXISTS serving_page_series (
+    language VARCHAR(10) NOT NULL,
+    title_normalized VARCHAR(255) NOT NULL,
+    day DATE NOT NULL,
+    category VARCHAR(50),
+    views_total BIGINT NOT NULL,
+    avg_views_7d NUMERIC,
+    avg_views_28d NUMERIC,
+    variations NUMERIC,
+    trend_score NUMERIC,
+    PRIMARY KEY (language, title_normalized, day)
+);
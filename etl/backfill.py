@@ -0,0 +1,234 @@
+import argparse
+import hashlib
+import json
+import os
+import time
+from collections import deque
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from job_queue import JOB_STATUS_FAILED
+from rolling_engine import LONG_WINDOW
+from status_writer import FINAL_STATUSES
+
+JOB_TYPE_BACKFILL = 'BACKFILL'
+JOB_STATUS_COMPLETED = 'COMPLETADO'
+# Días previos que necesita la ventana de 28 días del primer día de cada tramo
+LOOKBACK_DAYS = LONG_WINDOW - 1
+
+# Días escritos por tramo y tramos del backfill en la cola a la vez (los ejecutan los workers)
+BACKFILL_CHUNK_DAYS = int(os.getenv('ETL_BACKFILL_CHUNK_DAYS', '7'))
+BACKFILL_PARALLELISM = int(os.getenv('ETL_BACKFILL_PARALLELISM', '2'))
+BACKFILL_POLL_SECONDS = float(os.getenv('ETL_BACKFILL_POLL_SECONDS', '10'))
+# Sondeos seguidos que un tramo puede figurar en curso sin lease de ningún worker antes de darlo por fallido
+BACKFILL_STALE_POLLS = int(os.getenv('ETL_BACKFILL_STALE_POLLS', '30'))
+
+
+class BackfillChunk(NamedTuple):
+    start_day: date
+    end_day: date
+    lookback_days: int
+
+    @property
+    def extract_start_day(self) -> date:
+        return self.start_day - timedelta(days=self.lookback_days)
+
+    def job_params(self, languages: List[str], backfill_id: str, options: Optional[dict] = None) -> dict:
+        return {
+            **(options or {}),
+            'start_date': self.start_day.isoformat(),
+            'end_date': self.end_day.isoformat(),
+            'languages': languages,
+            'lookback_days': self.lookback_days,
+            'backfill_id': backfill_id,
+        }
+
+
+def plan_backfill(
+    start_day: date,
+    end_day: date,
+    chunk_days: int = BACKFILL_CHUNK_DAYS,
+    lookback_days: int = LOOKBACK_DAYS
+) -> List[BackfillChunk]:
+    """
+    Divide [start_day, end_day] en tramos consecutivos de chunk_days días. Cada tramo
+    extrae además lookback_days días previos como historial, pero sólo escribe sus
+    propios días: los tramos no se solapan en la salida y no dependen entre sí.
+    """
+    if end_day < start_day:
+        raise ValueError(f"Rango de backfill inválido: {start_day} > {end_day}.")
+    step = timedelta(days=max(1, chunk_days))
+    chunks = []
+    current = start_day
+    while current <= end_day:
+        chunk_end = min(end_day, current + step - timedelta(days=1))
+        chunks.append(BackfillChunk(current, chunk_end, lookback_days))
+        current = chunk_end + timedelta(days=1)
+    return chunks
+
+
+def backfill_id_for(
+    start_day: date,
+    end_day: date,
+    languages: List[str],
+    chunk_days: int,
+    lookback_days: int,
+    options: dict
+) -> str:
+    # Mismos parámetros -> mismo id: relanzar el backfill retoma los tramos ya encolados
+    payload = {
+        'start_day': start_day.isoformat(), 'end_day': end_day.isoformat(),
+        'languages': sorted(languages), 'chunk_days': chunk_days, 'lookback_days': lookback_days,
+        'options': options,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+
+
+class BackfillScheduler:
+    """
+    Encola los tramos de un backfill en etl_jobs en orden, con a lo sumo parallelism
+    tramos pendientes o en curso a la vez, y espera a que los workers los terminen.
+    Al relanzarlo con el mismo backfill_id adopta los jobs ya encolados y vuelve a
+    encolar sólo los tramos fallidos o que nunca llegaron a la cola. Un tramo que pasa
+    stale_polls sondeos en curso sin lease (nadie lo ejecuta) se marca FALLIDO.
+    """
+
+    def __init__(
+        self,
+        queue,
+        chunks: List[BackfillChunk],
+        languages: List[str],
+        backfill_id: str,
+        parallelism: int = BACKFILL_PARALLELISM,
+        poll_seconds: float = BACKFILL_POLL_SECONDS,
+        options: Optional[dict] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        stale_polls: int = BACKFILL_STALE_POLLS
+    ):
+        self.queue = queue
+        self.chunks = chunks
+        self.languages = languages
+        self.backfill_id = backfill_id
+        self.parallelism = max(1, parallelism)
+        self.poll_seconds = poll_seconds
+        self.options = options or {}
+        self.sleep = sleep
+        self.stale_polls = max(1, stale_polls)
+        self.completed: List[BackfillChunk] = []
+        self.failed: List[BackfillChunk] = []
+        self.in_flight: Dict[str, BackfillChunk] = {}
+        self._unattended_polls: Dict[str, int] = {}
+
+    def _adopt_existing(self) -> deque:
+        existing = self.queue.jobs_by_param(JOB_TYPE_BACKFILL, 'backfill_id', self.backfill_id)
+        if existing is None:
+            raise RuntimeError("No se pudieron leer los jobs del backfill en etl_jobs.")
+        pending = deque()
+        for chunk in self.chunks:
+            job_id, status = existing.get(chunk.start_day.isoformat(), (None, JOB_STATUS_FAILED))
+            if status == JOB_STATUS_COMPLETED:
+                self.completed.append(chunk)
+            elif status == JOB_STATUS_FAILED:
+                pending.append(chunk)
+            else:
+                self.in_flight[job_id] = chunk
+        return pending
+
+    def _collect_finished(self):
+        statuses = self.queue.statuses(list(self.in_flight))
+        if statuses is None:
+            return
+        for job_id, status in statuses.items():
+            if status not in FINAL_STATUSES:
+                continue
+            chunk = self.in_flight.pop(job_id)
+            self._unattended_polls.pop(job_id, None)
+            (self.completed if status == JOB_STATUS_COMPLETED else self.failed).append(chunk)
+            print(f"Backfill {self.backfill_id}: tramo {chunk.start_day}..{chunk.end_day} {status} (job {job_id}).")
+
+    def _give_up_unattended(self):
+        unattended = self.queue.unattended(list(self.in_flight))
+        if unattended is None:
+            return
+        for job_id in list(self.in_flight):
+            if job_id not in unattended:
+                self._unattended_polls.pop(job_id, None)
+                continue
+            self._unattended_polls[job_id] = self._unattended_polls.get(job_id, 0) + 1
+            if self._unattended_polls[job_id] < self.stale_polls:
+                continue
+            reason = f'Tramo de backfill sin lease de ningún worker durante {self.stale_polls} sondeos.'
+            if not self.queue.fail_unattended(job_id, reason):
+                self._unattended_polls.pop(job_id, None)
+                continue
+            chunk = self.in_flight.pop(job_id)
+            self._unattended_polls.pop(job_id)
+            self.failed.append(chunk)
+            print(f"Backfill {self.backfill_id}: tramo {chunk.start_day}..{chunk.end_day} abandonado (job {job_id}): {reason}")
+
+    def _enqueue(self, pending: deque):
+        while pending and len(self.in_flight) < self.parallelism:
+            chunk = pending[0]
+            job_id = self.queue.enqueue(
+                chunk.job_params(self.languages, self.backfill_id, self.options),
+                JOB_TYPE_BACKFILL,
+                chunk.start_day,
+                f'Tramo de backfill {chunk.start_day}..{chunk.end_day} en cola, pendiente de un worker.'
+            )
+            if job_id is None:
+                return
+            pending.popleft()
+            self.in_flight[job_id] = chunk
+
+    def run(self) -> dict:
+        pending = self._adopt_existing()
+        print(
+            f"Backfill {self.backfill_id}: {len(self.chunks)} tramos, {len(self.completed)} ya completados, "
+            f"{len(self.in_flight)} en cola, hasta {self.parallelism} a la vez."
+        )
+        while True:
+            self._collect_finished()
+            self._give_up_unattended()
+            self._enqueue(pending)
+            if not pending and not self.in_flight:
+                break
+            self.sleep(self.poll_seconds)
+        return {
+            'backfill_id': self.backfill_id,
+            'chunks': len(self.chunks),
+            'completed': len(self.completed),
+            'failed': [f'{chunk.start_day}..{chunk.end_day}' for chunk in self.failed],
+        }
+
+
+if __name__ == "__main__":
+    from main_etl import get_db_connection, EXTRACT_MODE
+    from worker import PostgresJobQueue
+
+    parser = argparse.ArgumentParser(
+        description='Divide un rango de fechas en tramos con historial previo y los encola para los workers.'
+    )
+    parser.add_argument('--start-date', required=True, help='Primer día (YYYY-MM-DD).')
+    parser.add_argument('--end-date', required=True, help='Último día (YYYY-MM-DD).')
+    parser.add_argument('--languages', nargs='+', default=['en', 'es'])
+    parser.add_argument('--chunk-days', type=int, default=BACKFILL_CHUNK_DAYS, help='Días escritos por tramo.')
+    parser.add_argument('--lookback-days', type=int, default=LOOKBACK_DAYS, help='Días previos extraídos como historial.')
+    parser.add_argument('--parallelism', type=int, default=BACKFILL_PARALLELISM, help='Tramos en la cola a la vez.')
+    parser.add_argument('--streaming', action='store_true', help='Cada tramo con extracción y carga en streaming.')
+    parser.add_argument('--plan-only', action='store_true', help='Muestra los tramos sin encolarlos.')
+    args = parser.parse_args()
+
+    start_day = datetime.strptime(args.start_date, '%Y-%m-%d').date()
+    end_day = datetime.strptime(args.end_date, '%Y-%m-%d').date()
+    chunks = plan_backfill(start_day, end_day, args.chunk_days, args.lookback_days)
+    # El estado móvil persistido es global: los tramos se calculan sólo con su historial extraído
+    options = {'incremental': False, 'streaming': args.streaming, 'extract_mode': EXTRACT_MODE}
+    backfill_id = backfill_id_for(start_day, end_day, args.languages, args.chunk_days, args.lookback_days, options)
+    if args.plan_only:
+        for chunk in chunks:
+            print(f"{chunk.start_day}..{chunk.end_day} (extracción desde {chunk.extract_start_day})")
+    else:
+        summary = BackfillScheduler(
+            PostgresJobQueue(get_db_connection), chunks, args.languages, backfill_id, args.parallelism, options=options
+        ).run()
+        print(json.dumps(summary, ensure_ascii=False))
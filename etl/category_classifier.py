@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import re
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - pyarrow llega como dependencia de db-dtypes
+    pa = None
+    pc = None
+
+DEFAULT_RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'category_rules.json')
+# Palabras clave válidas en todos los idiomas (marcas, siglas...)
+SHARED_KEYWORDS = '*'
+# Los títulos normalizados separan las palabras con '_' (build_title_normalized)
+WORD_SEPARATOR = '_'
+_NO_MATCH = np.iinfo(np.int64).max
+
+
+class _LanguageRules:
+    """Reglas de un idioma: palabra clave normalizada -> prioridad (posición de su categoría)."""
+
+    def __init__(self, keywords: Dict[str, int], group_names: List[str]):
+        self.keywords = keywords
+        self.max_words = max((keyword.count(WORD_SEPARATOR) + 1 for keyword in keywords), default=0)
+        by_priority: Dict[int, List[str]] = {}
+        for keyword, priority in keywords.items():
+            by_priority.setdefault(priority, []).append(keyword)
+        # Un grupo con nombre por categoría, en orden de prioridad. El lookahead permite
+        # coincidencias solapadas; los límites de palabra son el inicio, el fin y '_'
+        alternatives = '|'.join(
+            f"(?P<{group_names[priority]}>{'|'.join(re.escape(keyword) for keyword in sorted(words, key=len, reverse=True))})"
+            for priority, words in sorted(by_priority.items())
+        )
+        self.pattern = re.compile(f"(?:^|(?<={WORD_SEPARATOR}))(?=(?:{alternatives})(?:{WORD_SEPARATOR}|$))") if alternatives else None
+        self.priorities = {name: priority for priority, name in enumerate(group_names)}
+        if pa is not None:
+            self.keyword_values = pa.array(list(keywords), type=pa.large_string())
+            self.keyword_priorities = np.fromiter(keywords.values(), dtype=np.int64, count=len(keywords))
+
+
+class CategoryClassifier:
+    """
+    Clasificador de páginas por palabras clave completas sobre el título normalizado.
+
+    Las reglas (categorías en orden de prioridad y palabras clave por idioma) se
+    compilan por idioma en dos formas equivalentes: una expresión regular única con un
+    grupo con nombre por categoría, para un título, y una tabla hash de n-gramas de
+    palabras, para una columna completa en una pasada. Gana la categoría de mayor
+    prioridad con alguna palabra clave en el título; el costo no crece con el número
+    de palabras clave.
+    """
+
+    def __init__(self, rules: dict, normalize: Callable[[pd.Series], pd.Series]):
+        self.default_category: str = rules['default_category']
+        self.fallback_language: str = rules['fallback_language']
+        self.categories: List[str] = [rule['category'] for rule in rules['categories']]
+        if len(set(self.categories)) != len(self.categories):
+            raise ValueError("Reglas de categorías con categorías repetidas.")
+        self.fingerprint = hashlib.sha256(json.dumps(rules, sort_keys=True).encode('utf-8')).hexdigest()
+
+        # Palabras clave por idioma con la misma normalización que los títulos
+        keywords: Dict[str, Dict[str, int]] = {}
+        for priority, rule in enumerate(rules['categories']):
+            for language, words in rule['keywords'].items():
+                normalized = normalize(pd.Series(words, dtype=object)).tolist()
+                table = keywords.setdefault(language, {})
+                for keyword in normalized:
+                    table.setdefault(keyword, priority)
+
+        group_names = [f'c{priority}' for priority in range(len(self.categories))]
+        shared = keywords.pop(SHARED_KEYWORDS, {})
+        self._rules: Dict[str, _LanguageRules] = {}
+        for language, table in keywords.items():
+            merged = dict(shared)
+            for keyword, priority in table.items():
+                merged[keyword] = min(priority, merged.get(keyword, priority))
+            self._rules[language] = _LanguageRules(merged, group_names)
+        if self.fallback_language not in self._rules:
+            raise ValueError(f"El idioma por defecto '{self.fallback_language}' no tiene reglas de categorías.")
+
+    @classmethod
+    def from_file(cls, path: str, normalize: Callable[[pd.Series], pd.Series]) -> 'CategoryClassifier':
+        with open(path, encoding='utf-8') as rules_file:
+            return cls(json.load(rules_file), normalize)
+
+    def _rules_for(self, language: Optional[str]) -> _LanguageRules:
+        # Idiomas sin reglas propias: las del idioma por defecto
+        if language is None or (isinstance(language, float) and np.isnan(language)):
+            return self._rules[self.fallback_language]
+        return self._rules.get(language, self._rules[self.fallback_language])
+
+    def _category(self, priority: int) -> str:
+        return self.default_category if priority == _NO_MATCH else self.categories[priority]
+
+    def classify(self, title_normalized: str, language: Optional[str] = None) -> str:
+        rules = self._rules_for(language)
+        if rules.pattern is None:
+            return self.default_category
+        best = min(
+            (rules.priorities[match.lastgroup] for match in rules.pattern.finditer(title_normalized)),
+            default=_NO_MATCH
+        )
+        return self._category(best)
+
+    def classify_many(self, titles_normalized: pd.Series, languages=None) -> np.ndarray:
+        # languages: None (idioma por defecto), un código o una serie alineada con los títulos
+        values = titles_normalized.to_numpy(dtype=object)
+        if languages is None or isinstance(languages, str):
+            best = self._best_priorities(values, self._rules_for(languages))
+        else:
+            best = np.full(len(values), _NO_MATCH, dtype=np.int64)
+            language_codes, language_values = pd.factorize(pd.Series(languages).to_numpy(dtype=object), use_na_sentinel=False)
+            for code, language in enumerate(language_values):
+                rows = language_codes == code
+                best[rows] = self._best_priorities(values[rows], self._rules_for(language))
+
+        labels = np.array(self.categories + [self.default_category], dtype=object)
+        return labels[np.where(best == _NO_MATCH, len(self.categories), best)]
+
+    @staticmethod
+    def _best_priorities(values: np.ndarray, rules: _LanguageRules) -> np.ndarray:
+        best = np.full(len(values), _NO_MATCH, dtype=np.int64)
+        if not rules.keywords or not len(values):
+            return best
+        if pa is None:
+            for index, title in enumerate(values):
+                words = title.split(WORD_SEPARATOR)
+                for size in range(1, rules.max_words + 1):
+                    for start in range(len(words) - size + 1):
+                        priority = rules.keywords.get(WORD_SEPARATOR.join(words[start:start + size]))
+                        if priority is not None and priority < best[index]:
+                            best[index] = priority
+            return best
+
+        # Palabras de todos los títulos en un solo arreglo; cada n-grama se busca en la tabla hash
+        words = pc.split_pattern(pa.array(values, type=pa.large_string()), WORD_SEPARATOR)
+        flat = pc.list_flatten(words)
+        parents = pc.list_parent_indices(words).to_numpy()
+        grams = flat
+        for size in range(1, rules.max_words + 1):
+            if size > 1:
+                grams = pc.binary_join_element_wise(grams[:-1], flat[size - 1:], pa.scalar(WORD_SEPARATOR, pa.large_string()))
+            if len(grams) == 0:
+                break
+            positions = pc.index_in(grams, value_set=rules.keyword_values).fill_null(-1).to_numpy()
+            found = positions >= 0
+            if size > 1:
+                # El n-grama no puede cruzar de un título al siguiente
+                found &= parents[:len(grams)] == parents[size - 1:]
+            if found.any():
+                np.minimum.at(best, parents[:len(grams)][found], rules.keyword_priorities[positions[found]])
+        return best
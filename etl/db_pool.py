@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import deque
+from typing import Callable
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+DEFAULT_POOL_MAX_SIZE = 4
+DEFAULT_HEALTH_CHECK_SECONDS = 30.0
+DEFAULT_ACQUIRE_TIMEOUT_SECONDS = 60.0
+
+
+class RoundTripCounter:
+    # Viajes de ida y vuelta al servidor de las conexiones del pool (métricas por etapa)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.value = 0
+
+    def add(self, count: int = 1):
+        with self._lock:
+            self.value += count
+
+
+ROUND_TRIPS = RoundTripCounter()
+
+
+def db_round_trips() -> int:
+    return ROUND_TRIPS.value
+
+
+class CountingCursor(extensions.cursor):
+    """Cursor que cuenta cada sentencia enviada al servidor (execute_values usa execute por página)."""
+
+    def execute(self, query, vars=None):
+        ROUND_TRIPS.add()
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        vars_list = list(vars_list)
+        ROUND_TRIPS.add(len(vars_list))
+        return super().executemany(query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        ROUND_TRIPS.add()
+        return super().copy_expert(sql, file, size)
+
+
+class PooledConnection(extensions.connection):
+    """
+    Conexión de psycopg2 cuyo close() la devuelve al pool en lugar de cerrarla,
+    para que el patrón existente (get_db_connection() ... conn.close()) reutilice
+    conexiones sin cambiar cada función.
+    """
+
+    pool = None
+    last_used = 0.0
+    checked_out = False
+
+    def close(self):
+        if self.pool is not None and self.checked_out:
+            self.pool.release(self)
+        elif self.pool is None:
+            super().close()
+
+    def commit(self):
+        ROUND_TRIPS.add()
+        super().commit()
+
+    def discard(self):
+        self.pool = None
+        if not self.closed:
+            super().close()
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones con tamaño máximo (las solicitudes esperan un hueco libre),
+    verificación de salud de conexiones ociosas y descarte de conexiones rotas.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], PooledConnection],
+        max_size: int = DEFAULT_POOL_MAX_SIZE,
+        health_check_seconds: float = DEFAULT_HEALTH_CHECK_SECONDS,
+        acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT_SECONDS
+    ):
+        self._connect = connect
+        self.max_size = max(1, max_size)
+        self.health_check_seconds = health_check_seconds
+        self.acquire_timeout = acquire_timeout
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._lock = threading.Lock()
+        self.closed = False
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    def getconn(self) -> PooledConnection:
+        if self.closed:
+            raise PoolError("El pool de conexiones está cerrado.")
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise PoolError(f"No hay conexiones libres tras {self.acquire_timeout} s (máximo {self.max_size}).")
+        try:
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    conn = self._connect()
+                    conn.pool = self
+                    self.created += 1
+                    break
+                if self._is_healthy(conn):
+                    self.reused += 1
+                    break
+                self.discarded += 1
+                conn.discard()
+        except BaseException:
+            self._slots.release()
+            raise
+        conn.checked_out = True
+        return conn
+
+    def _is_healthy(self, conn: PooledConnection) -> bool:
+        # Sólo se consulta al servidor si la conexión estuvo ociosa más que el intervalo
+        if conn.closed:
+            return False
+        if time.monotonic() - conn.last_used < self.health_check_seconds:
+            return True
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT 1;")
+            cur.close()
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def release(self, conn: PooledConnection):
+        conn.checked_out = False
+        try:
+            if self.closed or conn.closed:
+                conn.discard()
+                return
+            status = conn.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                conn.discard()
+                return
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                conn.rollback()
+            if conn.autocommit:
+                conn.autocommit = False
+            conn.last_used = time.monotonic()
+            with self._lock:
+                self._idle.append(conn)
+        except psycopg2.Error:
+            self.discarded += 1
+            conn.discard()
+        finally:
+            self._slots.release()
+
+    def stats(self) -> dict:
+        return {
+            'idle': len(self._idle),
+            'created': self.created,
+            'reused': self.reused,
+            'discarded': self.discarded,
+        }
+
+    def closeall(self):
+        self.closed = True
+        with self._lock:
+            while self._idle:
+                self._idle.pop().discard()
+
+
+def connect_pooled(**connect_kwargs) -> Callable[[], PooledConnection]:
+    def connect() -> PooledConnection:
+        return psycopg2.connect(connection_factory=PooledConnection, cursor_factory=CountingCursor, **connect_kwargs)
+    return connect
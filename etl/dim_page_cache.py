@@ -0,0 +1,192 @@
+import io
+from typing import Optional, Tuple
+
+import pandas as pd
+from psycopg2 import extras
+
+DIM_KEYS = ['title_normalized', 'language']
+DIM_ATTRIBUTES = ['category', 'original_title']
+DIM_COLUMNS = ['page_id'] + DIM_KEYS + DIM_ATTRIBUTES
+DIM_BATCH_SIZE = 500
+
+
+def _empty_pages() -> pd.DataFrame:
+    return pd.DataFrame({
+        'page_id': pd.Series(dtype='int64'),
+        'title_normalized': pd.Series(dtype=object),
+        'language': pd.Series(dtype=object),
+        'category': pd.Series(dtype=object),
+        'original_title': pd.Series(dtype=object),
+    })
+
+
+def plan_dim_page_changes(cached: pd.DataFrame, incoming: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    # Separa las claves entrantes en: nuevas (no están en caché), modificadas (cambió category u
+    # original_title) y el mapa completo de page_id conocido para las claves ya existentes
+    merged = incoming[DIM_KEYS + DIM_ATTRIBUTES].merge(
+        cached[DIM_COLUMNS], on=DIM_KEYS, how='left', suffixes=('', '_cached')
+    )
+    known = merged['page_id'].notna()
+    changed = known & (
+        (merged['category'] != merged['category_cached'])
+        | (merged['original_title'] != merged['original_title_cached'])
+    )
+
+    new_pages = merged.loc[~known, DIM_KEYS + DIM_ATTRIBUTES].reset_index(drop=True)
+    changed_pages = merged.loc[changed, DIM_COLUMNS].reset_index(drop=True)
+    known_ids = merged.loc[known, ['page_id'] + DIM_KEYS].reset_index(drop=True)
+    changed_pages['page_id'] = changed_pages['page_id'].astype('int64')
+    known_ids['page_id'] = known_ids['page_id'].astype('int64')
+    return new_pages, changed_pages, known_ids
+
+
+class DimPageCache:
+    """
+    Caché en memoria de dim_page: (title_normalized, language) -> page_id, category, original_title.
+
+    Se precarga en bloque con COPY y se recarga sólo si la versión de la tabla
+    (número de filas, máximo page_id y última actualización) cambió desde la carga.
+    Permite insertar únicamente las páginas nuevas y actualizar sólo las que cambiaron.
+    """
+
+    def __init__(self):
+        self.pages = _empty_pages()
+        self.version: Optional[tuple] = None
+        self.reloads = 0
+
+    @staticmethod
+    def _table_version(cur) -> tuple:
+        cur.execute("SELECT COUNT(*), COALESCE(MAX(page_id), 0), MAX(updated_at) FROM dim_page;")
+        return tuple(cur.fetchone())
+
+    def refresh_if_stale(self, cur):
+        version = self._table_version(cur)
+        if version == self.version:
+            return
+
+        buffer = io.StringIO()
+        cur.copy_expert(
+            f"COPY (SELECT {', '.join(DIM_COLUMNS)} FROM dim_page) TO STDOUT WITH (FORMAT csv)",
+            buffer
+        )
+        buffer.seek(0)
+        # keep_default_na=False: títulos como 'Null' o 'NaN' son títulos reales
+        pages = pd.read_csv(
+            buffer, names=DIM_COLUMNS, header=None, dtype=str, keep_default_na=False, na_values=[]
+        )
+        pages['page_id'] = pages['page_id'].astype('int64')
+        self.pages = pages
+        self.version = version
+        self.reloads += 1
+        print(f"Caché de dim_page recargada: {len(pages)} páginas.")
+
+    def mark_synced(self, cur):
+        # Tras confirmar los cambios propios, se toma la versión actual para no recargar en vano
+        self.version = self._table_version(cur)
+
+    def remember(self, pages: pd.DataFrame):
+        if pages.empty:
+            return
+        combined = pd.concat([self.pages, pages[DIM_COLUMNS]], ignore_index=True)
+        self.pages = combined.drop_duplicates(subset=DIM_KEYS, keep='last').reset_index(drop=True)
+
+    def invalidate(self):
+        self.version = None
+
+    def resolve(self, cur, dim_page_data: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        # Devuelve (mapa page_id de todas las claves, filas a incorporar a la caché tras el commit)
+        self.refresh_if_stale(cur)
+        new_pages, changed_pages, known_ids = plan_dim_page_changes(self.pages, dim_page_data)
+
+        inserted = self._insert_new_pages(cur, new_pages)
+        self._update_changed_pages(cur, changed_pages)
+        print(
+            f"dim_page: {len(known_ids) - len(changed_pages)} sin cambios, "
+            f"{len(changed_pages)} actualizadas, {len(inserted)} nuevas."
+        )
+
+        page_map = pd.concat([known_ids, inserted[['page_id'] + DIM_KEYS]], ignore_index=True)
+        pending_cache_rows = pd.concat([changed_pages, inserted[DIM_COLUMNS]], ignore_index=True)
+        return page_map, pending_cache_rows
+
+    def _insert_new_pages(self, cur, new_pages: pd.DataFrame) -> pd.DataFrame:
+        if new_pages.empty:
+            return _empty_pages()
+
+        inserted_rows = []
+        for i in range(0, len(new_pages), DIM_BATCH_SIZE):
+            chunk = new_pages.iloc[i:i + DIM_BATCH_SIZE]
+            inserted_rows.extend(extras.execute_values(
+                cur,
+                """
+                    INSERT INTO dim_page (title_normalized, language, category, original_title)
+                    VALUES %s
+                    ON CONFLICT (title_normalized, language) DO NOTHING
+                    RETURNING page_id, title_normalized, language;
+                """,
+                chunk[DIM_KEYS + DIM_ATTRIBUTES].values.tolist(),
+                page_size=DIM_BATCH_SIZE,
+                fetch=True
+            ))
+        inserted = pd.DataFrame(inserted_rows, columns=['page_id'] + DIM_KEYS)
+
+        # Claves insertadas por otro proceso desde la última carga: se leen y se actualizan
+        missing = new_pages.merge(inserted[DIM_KEYS], on=DIM_KEYS, how='left', indicator=True)
+        missing = missing[missing['_merge'] == 'left_only'].drop(columns=['_merge'])
+        if not missing.empty:
+            concurrent = self._select_pages(cur, missing)
+            self._update_changed_pages(cur, self._with_incoming_attributes(concurrent, missing))
+            inserted = pd.concat([inserted, concurrent[['page_id'] + DIM_KEYS]], ignore_index=True)
+
+        inserted['page_id'] = inserted['page_id'].astype('int64')
+        return inserted.merge(new_pages, on=DIM_KEYS, how='left')[DIM_COLUMNS]
+
+    @staticmethod
+    def _with_incoming_attributes(existing: pd.DataFrame, incoming: pd.DataFrame) -> pd.DataFrame:
+        return existing[['page_id'] + DIM_KEYS].merge(incoming, on=DIM_KEYS, how='inner')[DIM_COLUMNS]
+
+    @staticmethod
+    def _select_pages(cur, keys: pd.DataFrame) -> pd.DataFrame:
+        rows = extras.execute_values(
+            cur,
+            """
+                SELECT d.page_id, d.title_normalized, d.language
+                FROM dim_page d
+                JOIN (VALUES %s) AS k(title_normalized, language)
+                  ON d.title_normalized = k.title_normalized AND d.language = k.language;
+            """,
+            keys[DIM_KEYS].values.tolist(),
+            page_size=DIM_BATCH_SIZE,
+            fetch=True
+        )
+        return pd.DataFrame(rows, columns=['page_id'] + DIM_KEYS)
+
+    @staticmethod
+    def _update_changed_pages(cur, changed_pages: pd.DataFrame):
+        if changed_pages.empty:
+            return
+        extras.execute_values(
+            cur,
+            """
+                UPDATE dim_page AS d
+                SET category = v.category,
+                    original_title = v.original_title,
+                    updated_at = NOW()
+                FROM (VALUES %s) AS v(page_id, category, original_title)
+                WHERE d.page_id = v.page_id
+                  AND (d.category IS DISTINCT FROM v.category OR d.original_title IS DISTINCT FROM v.original_title);
+            """,
+            changed_pages[['page_id', 'category', 'original_title']].values.tolist(),
+            template="(%s::integer, %s, %s)",
+            page_size=DIM_BATCH_SIZE
+        )
+
+
+_default_dim_page_cache: Optional[DimPageCache] = None
+
+def get_dim_page_cache() -> DimPageCache:
+    # La caché vive mientras viva el proceso (p. ej. un worker que procesa varios trabajos)
+    global _default_dim_page_cache
+    if _default_dim_page_cache is None:
+        _default_dim_page_cache = DimPageCache()
+    return _default_dim_page_cache
@@ -0,0 +1,141 @@
+import os
+import resource
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, Optional
+
+from streaming_etl import peak_rss_mb
+
+# Contadores que se suman entre llamadas a una misma etapa
+STAGE_COUNTERS = ('rows_in', 'rows_out', 'bytes_scanned', 'bytes_downloaded', 'bytes_in_memory')
+
+PROMETHEUS_PREFIX = 'etl'
+PROMETHEUS_STAGE_METRICS = {
+    'wall_seconds': 'Tiempo de reloj de la etapa en la última ejecución.',
+    'cpu_seconds': 'Tiempo de CPU (proceso e hijos) de la etapa en la última ejecución.',
+    'peak_rss_mb': 'Pico de memoria residente del proceso al terminar la etapa.',
+    'rss_growth_mb': 'Crecimiento del pico de memoria residente durante la etapa.',
+    'db_round_trips': 'Viajes de ida y vuelta a PostgreSQL de la etapa.',
+    'rows_in': 'Filas de entrada de la etapa.',
+    'rows_out': 'Filas de salida de la etapa.',
+    'bytes_scanned': 'Bytes leídos en BigQuery por la etapa.',
+    'bytes_downloaded': 'Bytes descargados (tamaño en memoria) por la etapa.',
+    'bytes_in_memory': 'Tamaño en memoria del DataFrame producido por la etapa.',
+}
+
+
+def cpu_seconds() -> float:
+    # Incluye los procesos hijos ya terminados (p. ej. el pool de la transformación en paralelo)
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+
+class RunMetrics:
+    """
+    Métricas por etapa de una ejecución del ETL: tiempo de reloj y de CPU, pico de
+    memoria, viajes a la base de datos y los contadores que informe cada etapa
+    (filas, bytes). Una etapa ejecutada varias veces (streaming) acumula sus valores.
+    """
+
+    def __init__(self, db_round_trips: Optional[Callable[[], int]] = None):
+        self._db_round_trips = db_round_trips or (lambda: 0)
+        self.stages: Dict[str, dict] = {}
+        self._started = time.perf_counter()
+        self._cpu_started = cpu_seconds()
+        self._round_trips_started = self._db_round_trips()
+
+    def _record(self, name: str) -> dict:
+        return self.stages.setdefault(name, {
+            'calls': 0,
+            'wall_seconds': 0.0,
+            'cpu_seconds': 0.0,
+            'peak_rss_mb': 0.0,
+            'rss_growth_mb': 0.0,
+            'db_round_trips': 0,
+        })
+
+    def add(self, name: str, **counters):
+        # Contadores conocidos sólo al final (p. ej. bytes de BigQuery en streaming)
+        record = self._record(name)
+        for counter in STAGE_COUNTERS:
+            if counters.get(counter) is not None:
+                record[counter] = record.get(counter, 0) + int(counters[counter])
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[dict]:
+        # El bloque puede informar contadores: stage['rows_out'] = len(df)
+        record = self._record(name)
+        counters = {}
+        rss_before = peak_rss_mb()
+        wall_before = time.perf_counter()
+        cpu_before = cpu_seconds()
+        round_trips_before = self._db_round_trips()
+        try:
+            yield counters
+        finally:
+            peak = peak_rss_mb()
+            record['calls'] += 1
+            record['wall_seconds'] += time.perf_counter() - wall_before
+            record['cpu_seconds'] += cpu_seconds() - cpu_before
+            record['db_round_trips'] += self._db_round_trips() - round_trips_before
+            record['peak_rss_mb'] = max(record['peak_rss_mb'], peak)
+            record['rss_growth_mb'] += peak - rss_before
+            self.add(name, **counters)
+
+    def iter_stage(self, name: str, items: Iterable) -> Iterator:
+        # Mide el tiempo de producir cada elemento (p. ej. lotes de la extracción en streaming)
+        iterator = iter(items)
+        while True:
+            with self.stage(name) as stage:
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                stage['rows_out'] = len(item)
+            yield item
+
+    def to_dict(self) -> dict:
+        stages = {}
+        for name, record in self.stages.items():
+            stages[name] = {
+                key: round(value, 3) if isinstance(value, float) else value for key, value in record.items()
+            }
+        return {
+            'stages': stages,
+            'total': {
+                'wall_seconds': round(time.perf_counter() - self._started, 3),
+                'cpu_seconds': round(cpu_seconds() - self._cpu_started, 3),
+                'peak_rss_mb': round(peak_rss_mb(), 1),
+                'db_round_trips': self._db_round_trips() - self._round_trips_started,
+            },
+        }
+
+
+def prometheus_text(metrics: dict, success: bool, finished_at: float) -> str:
+    # Formato de texto de Prometheus (colector textfile de node_exporter)
+    lines = []
+    for metric, description in PROMETHEUS_STAGE_METRICS.items():
+        name = f'{PROMETHEUS_PREFIX}_stage_{metric}'
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} gauge')
+        for stage, record in metrics['stages'].items():
+            if metric in record:
+                lines.append(f'{name}{{stage="{stage}"}} {record[metric]}')
+    for metric, value in metrics['total'].items():
+        name = f'{PROMETHEUS_PREFIX}_run_{metric}'
+        lines.append(f'# TYPE {name} gauge')
+        lines.append(f'{name} {value}')
+    lines.append(f'# TYPE {PROMETHEUS_PREFIX}_run_success gauge')
+    lines.append(f'{PROMETHEUS_PREFIX}_run_success {int(success)}')
+    lines.append(f'# TYPE {PROMETHEUS_PREFIX}_run_finished_timestamp_seconds gauge')
+    lines.append(f'{PROMETHEUS_PREFIX}_run_finished_timestamp_seconds {finished_at:.0f}')
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus_textfile(path: str, metrics: dict, success: bool):
+    # Escritura atómica: el colector nunca lee un archivo a medio escribir
+    temporary_path = f'{path}.{os.getpid()}.tmp'
+    with open(temporary_path, 'w', encoding='utf-8') as output:
+        output.write(prometheus_text(metrics, success, time.time()))
+    os.replace(temporary_path, path)
@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+from extraction import ExtractShard, arrow_to_pageviews, plan_shards
+
+DEFAULT_EXTRACT_CACHE_MAX_MB = 2048
+CACHE_FILE_SUFFIX = '.arrow'
+
+
+def shard_days(shard: ExtractShard) -> List[datetime]:
+    days = []
+    current = shard.start_date
+    while current <= shard.end_date:
+        days.append(current)
+        current += timedelta(days=1)
+    return days
+
+
+def plan_missing_shards(missing_days: List[datetime], shard_size_days: Optional[int] = None) -> List[ExtractShard]:
+    # Los días faltantes consecutivos se agrupan en un solo shard (respetando años y tamaño)
+    shards = []
+    run_start = previous = None
+    for day in sorted(missing_days):
+        if previous is not None and day - previous == timedelta(days=1):
+            previous = day
+            continue
+        if run_start is not None:
+            shards.extend(plan_shards(run_start, previous, shard_size_days))
+        run_start = previous = day
+    if run_start is not None:
+        shards.extend(plan_shards(run_start, previous, shard_size_days))
+    return shards
+
+
+def _plain_table(frame: pd.DataFrame) -> pa.Table:
+    # Sin diccionarios: cada página trae el suyo y un archivo IPC no admite reemplazarlos.
+    # arrow_to_pageviews vuelve a codificar el texto al leer
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    for index, field in enumerate(table.schema):
+        if pa.types.is_dictionary(field.type):
+            table = table.set_column(index, field.name, table.column(index).cast(field.type.value_type))
+    return table
+
+
+class ShardCacheWriter:
+    """
+    Escribe en la caché las páginas de un shard a medida que llegan: un escritor Arrow
+    IPC por día en un archivo temporal, así que no hace falta retener el shard completo
+    en memoria. commit() publica los días del shard; abort() los descarta.
+    """
+
+    def __init__(self, cache: 'ExtractCache', shard: ExtractShard, params: dict):
+        # No se guarda el día en curso (UTC): sus datos pueden estar incompletos en BigQuery
+        today = datetime.now(timezone.utc).date()
+        self.cache = cache
+        self.keys = {
+            day.date(): cache.key(shard.year, day, params) for day in shard_days(shard) if day.date() < today
+        }
+        # día -> (archivo temporal, destino, escritor, esquema del primer lote)
+        self._writers: Dict[object, Tuple[str, pa.OSFile, pa.ipc.RecordBatchFileWriter, pa.Schema]] = {}
+
+    def write(self, page: pd.DataFrame):
+        if page.empty:
+            return
+        table = _plain_table(page)
+        day_values = pd.to_datetime(page['day']).dt.date.to_numpy()
+        for day in pd.unique(day_values):
+            if day not in self.keys:
+                continue
+            if day not in self._writers:
+                path = self.cache._path(self.keys[day])
+                temporary_path = f'{path}.{threading.get_ident()}.tmp'
+                sink = pa.OSFile(temporary_path, 'wb')
+                self._writers[day] = (temporary_path, sink, pa.ipc.new_file(sink, table.schema), table.schema)
+            _, _, writer, schema = self._writers[day]
+            writer.write_table(table.filter(pa.array(day_values == day)).cast(schema))
+
+    def commit(self):
+        # Días sin filas no se publican
+        writers, self._writers = self._writers, {}
+        for day, (temporary_path, sink, writer, _) in writers.items():
+            writer.close()
+            sink.close()
+            os.replace(temporary_path, self.cache._path(self.keys[day]))
+        if writers:
+            self.cache.evict()
+
+    def abort(self):
+        writers, self._writers = self._writers, {}
+        for temporary_path, sink, writer, _ in writers.values():
+            try:
+                writer.close()
+                sink.close()
+            finally:
+                self.cache._remove(temporary_path)
+
+
+class ExtractCache:
+    """
+    Caché local de extracciones de BigQuery: un archivo Arrow IPC por
+    (tabla anual, día, idiomas, rank_by_views, exclusión de bots, versión de consulta).
+    Los aciertos se leen con memory-map; al superar max_bytes se eliminan los
+    archivos usados hace más tiempo.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, force_refresh: bool = False):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.force_refresh = force_refresh
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(year: int, day: datetime, params: dict) -> str:
+        payload = dict(params, table_year=year, day=day.strftime('%Y-%m-%d'))
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}{CACHE_FILE_SUFFIX}')
+
+    def get(self, key: str) -> Optional[pd.DataFrame]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            self.misses += 1
+            return None
+        try:
+            with pa.memory_map(path, 'r') as source:
+                frame = arrow_to_pageviews(pa.ipc.open_file(source).read_all())
+            os.utime(path)  # marca de uso para el desalojo LRU
+        except (OSError, pa.ArrowInvalid) as error:
+            print(f"Entrada de caché de extracción ilegible ({error}); se vuelve a consultar.")
+            self._remove(path)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return frame
+
+    def evict(self):
+        with self._lock:
+            entries = []
+            for name in os.listdir(self.directory):
+                if not name.endswith(CACHE_FILE_SUFFIX):
+                    continue
+                path = os.path.join(self.directory, name)
+                try:
+                    status = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((status.st_mtime, status.st_size, path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def lookup(self, shards: List[ExtractShard], params: dict) -> Tuple[List[Tuple[datetime, str]], List[datetime]]:
+        # Separa los días del rango en (día, clave) ya en caché y días que hay que consultar
+        hits, missing = [], []
+        for shard in shards:
+            for day in shard_days(shard):
+                key = self.key(shard.year, day, params)
+                if not self.force_refresh and os.path.exists(self._path(key)):
+                    hits.append((day, key))
+                else:
+                    missing.append(day)
+        self.misses += len(missing)
+        return hits, missing
+
+    def iter_hits(self, hits: List[Tuple[datetime, str]], missing: List[datetime]) -> Iterator[pd.DataFrame]:
+        # Lectura perezosa (de a un día); si una entrada desapareció, el día pasa a faltantes
+        for day, key in hits:
+            frame = self.get(key)
+            if frame is None:
+                missing.append(day)
+            else:
+                yield frame
+
+    def open_shard(self, shard: ExtractShard, params: dict) -> ShardCacheWriter:
+        return ShardCacheWriter(self, shard, params)
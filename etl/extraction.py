@@ -0,0 +1,247 @@
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterator, List, NamedTuple, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+from frame_dtypes import DICTIONARY_COLUMNS
+from query_builder import check_extract_budget, estimate_query_bytes
+
+DEFAULT_MAX_IN_FLIGHT = 4
+# Descarga de resultados: pandas (to_dataframe, una cadena de Python por celda) o arrow
+# (lotes Arrow por la Storage Read API, o por REST si no está disponible)
+EXTRACT_BACKEND_PANDAS = 'pandas'
+EXTRACT_BACKEND_ARROW = 'arrow'
+EXTRACT_BACKENDS = (EXTRACT_BACKEND_PANDAS, EXTRACT_BACKEND_ARROW)
+QUEUE_PAGES_PER_SHARD = 2
+_QUEUE_POLL_SECONDS = 0.1
+
+
+class ExtractShard(NamedTuple):
+    year: int
+    start_date: datetime
+    end_date: datetime
+
+
+def plan_shards(start_date: datetime, end_date: datetime, shard_days: Optional[int] = None) -> List[ExtractShard]:
+    # Una tabla pageviews_{año} por año; opcionalmente cada año se divide en tramos de shard_days días
+    shards = []
+    current = start_date
+    while current <= end_date:
+        year_end = min(end_date, datetime(current.year, 12, 31, tzinfo=current.tzinfo))
+        step = timedelta(days=shard_days) if shard_days else None
+        while current <= year_end:
+            shard_end = min(year_end, current + step - timedelta(days=1)) if step else year_end
+            shards.append(ExtractShard(current.year, current, shard_end))
+            current = shard_end + timedelta(days=1)
+    return shards
+
+
+def _pandas_type(arrow_type: pa.DataType):
+    # Diccionarios -> Categorical (lo que espera compact_pageviews); el resto queda respaldado por Arrow
+    return None if pa.types.is_dictionary(arrow_type) else pd.ArrowDtype(arrow_type)
+
+
+def arrow_to_pageviews(table: pa.Table) -> pd.DataFrame:
+    """
+    DataFrame de pageviews a partir de una tabla Arrow sin crear objetos de Python por
+    celda: el texto se codifica como diccionario (una cadena por valor distinto) y las
+    fechas y vistas quedan como columnas Arrow (date32, int64) sin copiarse.
+    """
+    for index, field in enumerate(table.schema):
+        if field.name in DICTIONARY_COLUMNS and (pa.types.is_string(field.type) or pa.types.is_large_string(field.type)):
+            table = table.set_column(index, field.name, table.column(index).dictionary_encode())
+    # Cada lote trae su propio diccionario: se unifican para convertir a un solo Categorical
+    return table.unify_dictionaries().to_pandas(types_mapper=_pandas_type)
+
+
+def describe_shards(stats: List[dict]) -> str:
+    if not stats:
+        return 'Sin shards.'
+    total_bytes = sum(shard_stats['bytes_processed'] or 0 for shard_stats in stats)
+    slowest = max(shard_stats['seconds'] for shard_stats in stats)
+    return (
+        f"{len(stats)} shards, {total_bytes / 1024 ** 3:.2f} GB procesados, "
+        f"shard más lento {slowest} s."
+    )
+
+
+class _ShardDone(NamedTuple):
+    index: int
+    stats: Optional[dict]
+    error: Optional[BaseException]
+
+
+class ShardedExtractor:
+    """
+    Ejecuta una consulta de BigQuery por shard con un máximo de consultas en vuelo.
+    Las páginas de resultados se entregan a medida que llegan (de cualquier shard),
+    de modo que la descarga se solapa con el procesamiento de lo ya recibido.
+    """
+
+    def __init__(
+        self,
+        client,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        page_size: Optional[int] = None,
+        dry_run: bool = False,
+        budget_bytes: Optional[int] = None,
+        backend: str = EXTRACT_BACKEND_PANDAS,
+        bqstorage_client=None
+    ):
+        if backend not in EXTRACT_BACKENDS:
+            raise ValueError(f"Backend de extracción no soportado: {backend}. Opciones: {', '.join(EXTRACT_BACKENDS)}")
+        self.client = client
+        self.max_in_flight = max(1, max_in_flight)
+        self.page_size = page_size
+        self.dry_run = dry_run
+        self.budget_bytes = budget_bytes
+        self.backend = backend
+        self.bqstorage_client = bqstorage_client
+        self.estimated_bytes: Optional[int] = None
+        self.stats: List[dict] = []
+
+    @property
+    def processed_bytes(self) -> int:
+        return sum(shard_stats['bytes_processed'] or 0 for shard_stats in self.stats)
+
+    @property
+    def downloaded_bytes(self) -> int:
+        # Tamaño en memoria de las páginas recibidas
+        return sum(shard_stats['bytes_downloaded'] for shard_stats in self.stats)
+
+    def _submit(self, query):
+        # Acepta SQL plano o un PageviewsQuery (SQL + parámetros)
+        if isinstance(query, str):
+            return self.client.query(query)
+        return self.client.query(query.sql, job_config=query.job_config(maximum_bytes_billed=self.budget_bytes))
+
+    def _estimate(self, queries: list):
+        # Dry run de todos los shards antes de lanzar ninguno: se aborta si superan el presupuesto
+        self.estimated_bytes = sum(
+            estimate_query_bytes(self.client, query) for query in queries if not isinstance(query, str)
+        )
+        print(f"Dry run de extracción: {self.estimated_bytes / 1024 ** 3:.2f} GB estimados en {len(queries)} shards.")
+        check_extract_budget(self.estimated_bytes, self.budget_bytes)
+
+    def _to_arrow(self, query_job) -> pa.Table:
+        # Storage Read API (lotes Arrow en paralelo); si falla (permisos, API deshabilitada...)
+        # se repite la descarga del shard por REST, que también devuelve Arrow
+        try:
+            return query_job.to_arrow(
+                bqstorage_client=self.bqstorage_client, create_bqstorage_client=self.bqstorage_client is None
+            )
+        except Exception as error:
+            print(f"Descarga por la Storage Read API fallida ({error}); se usa la API REST.")
+            return query_job.to_arrow(create_bqstorage_client=False)
+
+    def _fetch_pages(self, query_job) -> Iterator[pd.DataFrame]:
+        if self.backend == EXTRACT_BACKEND_PANDAS:
+            if self.page_size is None:
+                return iter([query_job.to_dataframe()])
+            return iter(query_job.result(page_size=self.page_size).to_dataframe_iterable())
+        if self.page_size is None:
+            # Una tabla con un chunk por lote recibido: se convierte una vez, sin concatenar copias
+            return iter([arrow_to_pageviews(self._to_arrow(query_job))])
+        batches = query_job.result(page_size=self.page_size).to_arrow_iterable(bqstorage_client=self.bqstorage_client)
+        return (arrow_to_pageviews(pa.Table.from_batches([batch])) for batch in batches)
+
+    def _run_shard(
+        self,
+        index: int,
+        shard: ExtractShard,
+        query: str,
+        results: queue.Queue,
+        stop: threading.Event,
+        open_shard_sink: Optional[Callable[[ExtractShard], Any]]
+    ):
+        started = time.perf_counter()
+        stats = {
+            'shard': index,
+            'year': shard.year,
+            'start_date': shard.start_date.strftime('%Y-%m-%d'),
+            'end_date': shard.end_date.strftime('%Y-%m-%d'),
+            'rows': 0,
+            'pages': 0,
+            'bytes_downloaded': 0,
+        }
+        sink = None
+        try:
+            query_job = self._submit(query)
+            sink = open_shard_sink(shard) if open_shard_sink is not None else None
+            for page in self._fetch_pages(query_job):
+                # Cada página se escribe en el sink antes de entregarla: el shard no se retiene
+                if sink is not None:
+                    sink.write(page)
+                if not self._put(results, page, stop):
+                    return
+                stats['rows'] += len(page)
+                stats['pages'] += 1
+                stats['bytes_downloaded'] += int(page.memory_usage(index=False, deep=True).sum())
+            if sink is not None:
+                sink.commit()
+                sink = None
+            stats['seconds'] = round(time.perf_counter() - started, 3)
+            stats['bytes_processed'] = getattr(query_job, 'total_bytes_processed', None)
+            self._put(results, _ShardDone(index, stats, None), stop)
+        except BaseException as error:
+            self._put(results, _ShardDone(index, None, error), stop)
+        finally:
+            # Shard incompleto (error o extracción detenida): no se publica nada
+            if sink is not None:
+                sink.abort()
+
+    @staticmethod
+    def _put(results: queue.Queue, item, stop: threading.Event) -> bool:
+        # Cola acotada: si el consumidor va lento, las descargas esperan (memoria acotada)
+        while not stop.is_set():
+            try:
+                results.put(item, timeout=_QUEUE_POLL_SECONDS)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def iter_batches(
+        self,
+        shards: List[ExtractShard],
+        build_query: Callable[[ExtractShard], str],
+        open_shard_sink: Optional[Callable[[ExtractShard], Any]] = None
+    ) -> Iterator[pd.DataFrame]:
+        # open_shard_sink(shard) abre, en el hilo del shard, un destino para sus páginas con
+        # write(página), commit() al terminar el shard y abort() si no termina (ShardCacheWriter)
+        self.stats = []
+        if not shards:
+            return
+        queries = [build_query(shard) for shard in shards]
+        if self.dry_run:
+            self._estimate(queries)
+        results: queue.Queue = queue.Queue(maxsize=self.max_in_flight * QUEUE_PAGES_PER_SHARD)
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix='bq-shard')
+        try:
+            for index, (shard, query) in enumerate(zip(shards, queries)):
+                executor.submit(self._run_shard, index, shard, query, results, stop, open_shard_sink)
+
+            pending = len(shards)
+            while pending:
+                item = results.get()
+                if isinstance(item, _ShardDone):
+                    pending -= 1
+                    if item.error is not None:
+                        raise item.error
+                    self.stats.append(item.stats)
+                    print(
+                        f"Shard {item.stats['start_date']}..{item.stats['end_date']}: {item.stats['rows']} filas, "
+                        f"{item.stats['seconds']} s, {item.stats['bytes_processed']} bytes procesados."
+                    )
+                    continue
+                yield item
+        finally:
+            stop.set()
+            executor.shutdown(wait=True, cancel_futures=True)
+        self.stats.sort(key=lambda shard_stats: shard_stats['shard'])
@@ -0,0 +1,136 @@
+import re
+from datetime import date
+from typing import Iterable, List, NamedTuple, Optional, Set
+
+import pandas as pd
+
+FACT_TABLE = 'fact_pageviews_daily'
+
+# Serializa la creación/desconexión de particiones entre ejecuciones simultáneas del ETL
+PARTITION_LOCK_KEY = 'etl_fact_partitions'
+
+_BOUND_PATTERN = re.compile(r"FROM \('(\d{4}-\d{2}-\d{2})'\) TO \('(\d{4}-\d{2}-\d{2})'\)")
+
+
+class FactPartition(NamedTuple):
+    name: str
+    start: Optional[date]  # None: tabla sin particionar (todas las filas van a la tabla)
+    end: Optional[date]
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def partition_for_month(month: date) -> FactPartition:
+    return FactPartition(f'{FACT_TABLE}_{month:%Y_%m}', month, next_month(month))
+
+
+def partitions_for_days(days: Iterable) -> List[FactPartition]:
+    # Una partición mensual por cada mes con al menos un día
+    months = {month_start(day) for day in pd.to_datetime(pd.Series(list(days))).dt.date.unique()}
+    return [partition_for_month(month) for month in sorted(months)]
+
+
+def rows_in_partition(df: pd.DataFrame, partition: FactPartition) -> pd.DataFrame:
+    if partition.start is None:
+        return df
+    days = pd.to_datetime(df['day'])
+    mask = (days >= pd.Timestamp(partition.start)) & (days < pd.Timestamp(partition.end))
+    return df[mask.to_numpy()]
+
+
+def is_partitioned(cur) -> bool:
+    cur.execute("SELECT relkind = 'p' FROM pg_class WHERE oid = %s::regclass;", (FACT_TABLE,))
+    return bool(cur.fetchone()[0])
+
+
+def existing_partitions(cur) -> List[FactPartition]:
+    cur.execute("""
+        SELECT c.relname, pg_get_expr(c.relpartbound, c.oid)
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = %s::regclass;
+    """, (FACT_TABLE,))
+    partitions = []
+    for name, bound in cur.fetchall():
+        match = _BOUND_PATTERN.search(bound or '')
+        if match:
+            start, end = (date.fromisoformat(value) for value in match.groups())
+            partitions.append(FactPartition(name, start, end))
+    return sorted(partitions, key=lambda partition: partition.start)
+
+
+def detached_partitions(cur, names: List[str]) -> Set[str]:
+    # Tablas con nombre de partición que no están conectadas: meses desconectados por la retención
+    cur.execute("""
+        SELECT c.relname
+        FROM pg_class c
+        WHERE c.relname = ANY(%s) AND c.relkind = 'r' AND NOT c.relispartition
+          AND c.relnamespace = (SELECT relnamespace FROM pg_class WHERE oid = %s::regclass);
+    """, (names, FACT_TABLE))
+    return {name for name, in cur.fetchall()}
+
+
+def ensure_fact_partitions(cur, days: Iterable) -> List[FactPartition]:
+    """
+    Crea las particiones mensuales que falten para los días indicados y devuelve
+    aquellas en las que hay que cargar. Un mes desconectado por la retención (tabla de
+    archivo con el nombre de la partición) se vuelve a conectar: si no, la carga iría a
+    parar al archivo, fuera de la tabla y de las vistas. Con la tabla sin particionar
+    (esquema previo) se devuelve la propia tabla. CREATE TABLE ... PARTITION OF y
+    ATTACH PARTITION bloquean la tabla padre: conviene confirmar antes de cargar.
+    """
+    if not is_partitioned(cur):
+        return [FactPartition(FACT_TABLE, None, None)]
+
+    needed = partitions_for_days(days)
+    existing = {partition.name for partition in existing_partitions(cur)}
+    missing = [partition for partition in needed if partition.name not in existing]
+    if missing:
+        cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (PARTITION_LOCK_KEY,))
+        archived = detached_partitions(cur, [partition.name for partition in missing])
+        for partition in missing:
+            if partition.name in archived:
+                cur.execute(f"""
+                    ALTER TABLE {FACT_TABLE}
+                    ATTACH PARTITION {partition.name}
+                    FOR VALUES FROM (%s) TO (%s);
+                """, (partition.start, partition.end))
+            else:
+                cur.execute(f"""
+                    CREATE TABLE IF NOT EXISTS {partition.name}
+                    PARTITION OF {FACT_TABLE}
+                    FOR VALUES FROM (%s) TO (%s);
+                """, (partition.start, partition.end))
+        if archived:
+            print(f"Particiones de {FACT_TABLE} reconectadas desde el archivo: {', '.join(sorted(archived))}.")
+        created = [partition.name for partition in missing if partition.name not in archived]
+        if created:
+            print(f"Particiones de {FACT_TABLE} creadas: {', '.join(created)}.")
+    return needed
+
+
+def detach_old_partitions(cur, keep_months: int, today: date, drop: bool = False) -> List[FactPartition]:
+    """
+    Retención: desconecta las particiones que terminan antes de los últimos keep_months
+    meses (incluido el actual). Las desconectadas quedan como tablas independientes
+    (archivo) salvo con drop=True. Devuelve las particiones procesadas.
+    """
+    if keep_months <= 0 or not is_partitioned(cur):
+        return []
+    cutoff = month_start(today)
+    for _ in range(keep_months - 1):
+        cutoff = month_start(date.fromordinal(cutoff.toordinal() - 1))
+
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (PARTITION_LOCK_KEY,))
+    expired = [partition for partition in existing_partitions(cur) if partition.end <= cutoff]
+    for partition in expired:
+        cur.execute(f"ALTER TABLE {FACT_TABLE} DETACH PARTITION {partition.name};")
+        if drop:
+            cur.execute(f"DROP TABLE {partition.name};")
+    return expired
@@ -0,0 +1,123 @@
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Texto de baja cardinalidad: diccionario (categorical) con códigos enteros por fila
+LOW_CARDINALITY_COLUMNS = ('language', 'platform_type', 'category')
+# Títulos: cada uno se repite por día y plataforma; original_title comparte el diccionario de title
+TITLE_COLUMNS = ('title', 'original_title', 'title_normalized')
+DICTIONARY_COLUMNS = LOW_CARDINALITY_COLUMNS + TITLE_COLUMNS
+# Vistas extraídas: caben en enteros sin signo de 32 bits (se suman en int64 en la transformación)
+COUNT_COLUMNS = ('views_total',)
+
+
+def is_dictionary(values: pd.Series) -> bool:
+    return isinstance(values.dtype, pd.CategoricalDtype)
+
+
+def as_dictionary(values: pd.Series) -> pd.Series:
+    return values if is_dictionary(values) else values.astype('category')
+
+
+def dictionary_from_codes(values: np.ndarray, codes: np.ndarray) -> pd.Categorical:
+    # values: un valor por código (p. ej. el título normalizado de cada título único);
+    # valores repetidos comparten categoría y las categorías quedan ordenadas
+    categories, inverse = np.unique(np.asarray(values, dtype=object), return_inverse=True)
+    return pd.Categorical.from_codes(inverse.reshape(-1)[codes], categories=categories)
+
+
+def compact_pageviews(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Representación compacta de un DataFrame de pageviews: columnas de texto como
+    diccionario y contadores con el menor entero que los contiene. No modifica df.
+    """
+    columns = {column: as_dictionary(df[column]) for column in DICTIONARY_COLUMNS if column in df.columns}
+    for column in COUNT_COLUMNS:
+        if column in df.columns and pd.api.types.is_integer_dtype(df[column].dtype) and not df.empty:
+            columns[column] = pd.to_numeric(df[column], downcast='unsigned' if df[column].min() >= 0 else 'integer')
+    return df.assign(**columns) if columns else df
+
+
+def strip_strings(values: pd.Series, remove: Optional[str] = None) -> pd.Series:
+    # str.strip() (y opcionalmente quitar un carácter) sobre cada valor; en diccionarios, sobre las categorías
+    def clean(value) -> str:
+        value = str(value)
+        return (value.replace(remove, '') if remove else value).strip()
+
+    if is_dictionary(values):
+        return values.map(clean, na_action='ignore')
+    cleaned = values.astype(str)
+    if remove:
+        cleaned = cleaned.str.replace(remove, '', regex=False)
+    return cleaned.str.strip()
+
+
+def drop_unused_categories(df: pd.DataFrame) -> pd.DataFrame:
+    # Tras filtrar o agregar, el diccionario puede conservar valores que ya no aparecen
+    for column in df.columns:
+        if is_dictionary(df[column]):
+            df[column] = df[column].cat.remove_unused_categories()
+    return df
+
+
+def concat_frames(frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    pd.concat conservando las columnas de diccionario: pd.concat las convierte en
+    cadenas si las categorías difieren entre partes, así que antes se unifican
+    (unión ordenada de las categorías; las partes sin la columna aportan nulos).
+    """
+    frames = [frame for frame in frames]
+    if not frames:
+        return pd.DataFrame()
+    columns: List[str] = list(dict.fromkeys(column for frame in frames for column in frame.columns))
+    unified = {}
+    for column in columns:
+        present = [frame[column] for frame in frames if column in frame.columns]
+        if not all(is_dictionary(values) for values in present):
+            continue
+        categories = np.unique(np.concatenate([values.cat.categories.to_numpy(dtype=object) for values in present]))
+        unified[column] = pd.CategoricalDtype(categories)
+
+    if unified:
+        aligned = []
+        for frame in frames:
+            changes = {}
+            for column, dtype in unified.items():
+                if column in frame.columns:
+                    if frame[column].dtype != dtype:
+                        changes[column] = frame[column].cat.set_categories(dtype.categories)
+                else:
+                    changes[column] = pd.Categorical([None] * len(frame), dtype=dtype)
+            aligned.append(frame.assign(**changes) if changes else frame)
+        frames = aligned
+    return pd.concat(frames, ignore_index=True)
+
+
+def expanded(df: pd.DataFrame) -> pd.DataFrame:
+    # Representación previa (una cadena de Python por fila y enteros de 64 bits), para comparar memoria
+    columns = {}
+    for column in df.columns:
+        if is_dictionary(df[column]) or pd.api.types.is_string_dtype(df[column].dtype):
+            columns[column] = df[column].astype(object)
+        elif pd.api.types.is_integer_dtype(df[column].dtype):
+            columns[column] = df[column].astype('int64')
+    return df.assign(**columns) if columns else df
+
+
+def bytes_per_row(df: pd.DataFrame) -> Optional[float]:
+    if df.empty:
+        return None
+    return round(float(df.memory_usage(deep=True, index=False).sum()) / len(df), 1)
+
+
+def memory_report(df: pd.DataFrame) -> dict:
+    # Bytes por fila del DataFrame compacto frente a la representación expandida
+    compact = bytes_per_row(df)
+    before = bytes_per_row(expanded(df))
+    return {
+        'rows': len(df),
+        'bytes_per_row': compact,
+        'bytes_per_row_expanded': before,
+        'reduction': round(1 - compact / before, 3) if compact and before else None,
+    }
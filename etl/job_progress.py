@@ -0,0 +1,135 @@
+from datetime import date
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+import pandas as pd
+from psycopg2 import extras
+
+from rolling_state import STATE_COLUMNS
+from status_writer import JOB_LEASE_CONDITION, JobLease
+
+# Etapa completada por cada shard (día, idioma) de un job
+SHARD_STAGE_LOADED = 'CARGADO'        # dim_page y fact_pageviews_daily confirmados
+SHARD_STAGE_COMPLETED = 'COMPLETADO'  # además, vistas / tablas resumen refrescadas
+
+Shard = Tuple[date, str]
+
+
+class ResumePlan(NamedTuple):
+    to_load: Set[Shard]      # shards sin cargar: hay que extraerlos, transformarlos y cargarlos
+    to_refresh: Set[Shard]   # shards ya cargados cuyas vistas falta refrescar
+    completed: Set[Shard]
+
+    @property
+    def resume_day(self) -> Optional[date]:
+        # Primer día a extraer; los anteriores se toman de fact_pageviews_daily como historial
+        return min(day for day, _ in self.to_load) if self.to_load else None
+
+
+def job_shards(start_day: date, end_day: date, languages: List[str]) -> Set[Shard]:
+    days = pd.date_range(start_day, end_day, freq='D').date
+    return {(day, language) for day in days for language in languages}
+
+
+def plan_resume(shards: Set[Shard], progress: Dict[Shard, str]) -> ResumePlan:
+    completed = {shard for shard in shards if progress.get(shard) == SHARD_STAGE_COMPLETED}
+    loaded = {shard for shard in shards if progress.get(shard) == SHARD_STAGE_LOADED}
+    return ResumePlan(shards - completed - loaded, loaded, completed)
+
+
+def rows_in_shards(df: pd.DataFrame, shards: Set[Shard]) -> pd.DataFrame:
+    days = pd.to_datetime(df['day']).dt.date
+    return df[pd.MultiIndex.from_arrays([days, df['language']]).isin(list(shards))]
+
+
+def iter_checkpoints(df: pd.DataFrame, shards: Set[Shard], days_per_checkpoint: int) -> Iterator[Tuple[Set[Shard], pd.DataFrame]]:
+    """
+    Divide la carga en bloques de días consecutivos: cada bloque se confirma en una
+    transacción junto con el progreso de sus shards. Sólo se entregan las filas de los
+    shards indicados (las de shards ya cargados se descartan) y los shards sin filas
+    también se entregan, para registrarlos como cargados.
+    """
+    df = rows_in_shards(df, shards)
+    days = pd.to_datetime(df['day']).dt.date
+
+    pending_days = sorted({day for day, _ in shards})
+    step = max(1, days_per_checkpoint)
+    for i in range(0, len(pending_days), step):
+        block_days = pending_days[i:i + step]
+        block_shards = {shard for shard in shards if block_days[0] <= shard[0] <= block_days[-1]}
+        in_block = ((days >= block_days[0]) & (days <= block_days[-1])).to_numpy()
+        yield block_shards, df[in_block].reset_index(drop=True)
+
+
+def load_progress(cur, job_id: str) -> Dict[Shard, str]:
+    cur.execute("SELECT day, language, stage FROM etl_job_progress WHERE job_id = %s;", (job_id,))
+    return {(day, language): stage for day, language, stage in cur.fetchall()}
+
+
+def mark_shards(
+    cur,
+    job_id: str,
+    shards: Set[Shard],
+    stage: str,
+    rows_by_shard: Optional[Dict[Shard, int]] = None,
+    lease: Optional[JobLease] = None
+):
+    # Idempotente: re-ejecutar un bloque sólo vuelve a escribir su etapa y filas
+    if not shards:
+        return
+    if lease is not None:
+        # FOR SHARE hasta el commit: el lease no puede vencer a mitad de la transacción de carga,
+        # y si ya venció la carga se revierte en lugar de confirmarse para un job que no es nuestro
+        cur.execute(
+            f"SELECT 1 FROM etl_jobs WHERE job_id = %s AND {JOB_LEASE_CONDITION} FOR SHARE;",
+            (job_id,) + tuple(lease)
+        )
+        if cur.fetchone() is None:
+            raise RuntimeError(f"El job {job_id} ya no es de este worker (lease vencido o reclamado por otro).")
+    rows_by_shard = rows_by_shard or {}
+    extras.execute_values(
+        cur,
+        """
+            INSERT INTO etl_job_progress (job_id, day, language, stage, rows_loaded)
+            VALUES %s
+            ON CONFLICT (job_id, day, language) DO UPDATE SET
+                stage = EXCLUDED.stage,
+                rows_loaded = COALESCE(EXCLUDED.rows_loaded, etl_job_progress.rows_loaded),
+                updated_at = NOW();
+        """,
+        [(job_id, day, language, stage, rows_by_shard.get((day, language))) for day, language in sorted(shards)],
+        template="(%s::uuid, %s, %s, %s, %s)",
+        page_size=1000
+    )
+
+
+def rows_per_shard(df: pd.DataFrame) -> Dict[Shard, int]:
+    if df.empty:
+        return {}
+    counts = df.groupby([pd.to_datetime(df['day']).dt.date, 'language'], observed=True).size()
+    return {(day, language): int(rows) for (day, language), rows in counts.items()}
+
+
+def loaded_history(cur, languages: List[str], start_day: date, before_day: date) -> pd.DataFrame:
+    """
+    Vistas diarias ya cargadas en [start_day, before_day) por (language, title_normalized),
+    con el formato del estado móvil: al reanudar, las ventanas de los días pendientes se
+    calculan igual que si se hubiera extraído la ventana completa.
+    """
+    cur.execute("""
+        SELECT f.language, p.title_normalized, f.day, f.views_total
+        FROM fact_pageviews_daily f
+        JOIN dim_page p ON p.page_id = f.page_id
+        WHERE f.language = ANY(%s) AND f.day >= %s AND f.day < %s;
+    """, (languages, start_day, before_day))
+    return pd.DataFrame(cur.fetchall(), columns=STATE_COLUMNS)
+
+
+def first_loaded_day(cur, languages: List[str], before_day: date) -> Optional[date]:
+    # Primer día cargado antes de before_day (índice por day, language): origen de las ventanas
+    # por calendario de una ejecución incremental, igual que en un recálculo completo
+    cur.execute("""
+        SELECT MIN(day)
+        FROM fact_pageviews_daily
+        WHERE language = ANY(%s) AND day < %s;
+    """, (languages, before_day))
+    return cur.fetchone()[0]
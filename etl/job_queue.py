@@ -0,0 +1,201 @@
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+from psycopg2 import extras
+
+from status_writer import FINAL_STATUSES
+
+# Estados de la cola; mientras corre, run_etl va escribiendo sus etapas (EXTRAYENDO, CARGANDO...)
+JOB_STATUS_PENDING = 'PENDIENTE'
+JOB_STATUS_CLAIMED = 'EN_CURSO'
+JOB_STATUS_FAILED = 'FALLIDO'
+
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_MAX_ATTEMPTS = 3
+
+_INACTIVE_STATUSES = (JOB_STATUS_PENDING,) + FINAL_STATUSES
+
+
+class ClaimedJob(NamedTuple):
+    job_id: str
+    params: dict
+    attempts: int
+
+
+def claim_job(cur, worker_id: str, lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Optional[ClaimedJob]:
+    # El job pendiente más antiguo que ningún otro worker tenga bloqueado; None si la cola está vacía
+    cur.execute(
+        """
+            UPDATE etl_jobs
+            SET status = %s,
+                message = 'Job reclamado por un worker.',
+                worker_id = %s,
+                started_at = NOW(),
+                finished_at = NULL,
+                error_message = NULL,
+                heartbeat_at = NOW(),
+                lease_expires_at = NOW() + make_interval(secs => %s),
+                attempts = attempts + 1,
+                updated_at = NOW()
+            WHERE job_id = (
+                SELECT job_id
+                FROM etl_jobs
+                WHERE status = %s
+                ORDER BY requested_at, job_id
+                FOR UPDATE SKIP LOCKED
+                LIMIT 1
+            )
+            RETURNING job_id, params, attempts;
+        """,
+        (JOB_STATUS_CLAIMED, worker_id, lease_seconds, JOB_STATUS_PENDING)
+    )
+    row = cur.fetchone()
+    if row is None:
+        return None
+    job_id, params, attempts = row
+    return ClaimedJob(str(job_id), params or {}, attempts)
+
+
+def heartbeat_jobs(cur, worker_id: str, job_ids: List[str], lease_seconds: float = DEFAULT_LEASE_SECONDS) -> Set[str]:
+    """
+    Renueva el lease de los jobs en curso del worker y devuelve los que siguen siendo
+    suyos: un job ausente del resultado volvió a la cola (lease vencido) o lo reclamó
+    otro worker. Los jobs ya terminados siguen siendo del worker, pero no se renuevan.
+    """
+    if not job_ids:
+        return set()
+    cur.execute(
+        """
+            UPDATE etl_jobs
+            SET heartbeat_at = NOW(),
+                lease_expires_at = CASE
+                    WHEN status IN %s THEN lease_expires_at
+                    ELSE NOW() + make_interval(secs => %s)
+                END
+            WHERE job_id = ANY(%s::uuid[]) AND worker_id = %s AND status <> %s
+            RETURNING job_id;
+        """,
+        (FINAL_STATUSES, lease_seconds, list(job_ids), worker_id, JOB_STATUS_PENDING)
+    )
+    return {str(row[0]) for row in cur.fetchall()}
+
+
+def _release(cur, condition: str, params: tuple, max_attempts: Optional[int], reason: str) -> List[tuple]:
+    # Vuelve a PENDIENTE (o FALLIDO si ya agotó los intentos) los jobs sin terminar que cumplan
+    # condition; el progreso por shard se conserva y el siguiente intento continúa desde ahí
+    exhausted = "attempts >= %s" if max_attempts else "FALSE"
+    exhausted_params = (max_attempts,) if max_attempts else ()
+    cur.execute(
+        f"""
+            UPDATE etl_jobs
+            SET status = CASE WHEN {exhausted} THEN %s ELSE %s END,
+                message = %s,
+                error_message = CASE WHEN {exhausted} THEN %s ELSE error_message END,
+                finished_at = CASE WHEN {exhausted} THEN NOW() ELSE NULL END,
+                worker_id = CASE WHEN {exhausted} THEN worker_id ELSE NULL END,
+                lease_expires_at = NULL,
+                updated_at = NOW()
+            WHERE job_id IN (
+                SELECT job_id
+                FROM etl_jobs
+                WHERE status NOT IN %s AND {condition}
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING job_id, status;
+        """,
+        exhausted_params + (JOB_STATUS_FAILED, JOB_STATUS_PENDING, reason)
+        + exhausted_params + (reason,) + exhausted_params + exhausted_params
+        + (_INACTIVE_STATUSES,) + params
+    )
+    return [(str(job_id), status) for job_id, status in cur.fetchall()]
+
+
+def expire_leases(cur, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> List[tuple]:
+    # Jobs de workers caídos (sin heartbeat desde hace más de un lease); cualquier worker puede hacerlo
+    return _release(
+        cur, "lease_expires_at < NOW()", (), max_attempts, 'Lease vencido: el worker dejó de enviar heartbeats.'
+    )
+
+
+def release_job(
+    cur,
+    job_id: str,
+    worker_id: str,
+    reason: str,
+    max_attempts: Optional[int] = DEFAULT_MAX_ATTEMPTS,
+    attempts: Optional[int] = None
+) -> List[tuple]:
+    # Sin max_attempts el job vuelve siempre a la cola (p. ej. al detener el worker); con attempts
+    # sólo se libera si sigue en ese intento (no uno posterior del mismo worker)
+    condition = "job_id = %s::uuid AND worker_id = %s"
+    params = (job_id, worker_id)
+    if attempts is not None:
+        condition += " AND attempts = %s"
+        params += (attempts,)
+    return _release(cur, condition, params, max_attempts, reason)
+
+
+def enqueue_job(cur, params: dict, job_type: str, data_date: date, message: str) -> str:
+    cur.execute(
+        """
+            INSERT INTO etl_jobs (status, job_type, data_date, params, message)
+            VALUES (%s, %s, %s, %s, %s)
+            RETURNING job_id;
+        """,
+        (JOB_STATUS_PENDING, job_type, data_date, extras.Json(params), message)
+    )
+    return str(cur.fetchone()[0])
+
+
+def job_statuses(cur, job_ids: List[str]) -> Dict[str, str]:
+    if not job_ids:
+        return {}
+    cur.execute("SELECT job_id, status FROM etl_jobs WHERE job_id = ANY(%s::uuid[]);", (list(job_ids),))
+    return {str(job_id): status for job_id, status in cur.fetchall()}
+
+
+# Jobs que figuran en curso pero ningún worker atiende: sin lease (p. ej. un proceso lanzado a mano
+# que murió) o con el lease vencido sin que un worker lo haya devuelto a la cola
+_UNATTENDED_CONDITION = "status NOT IN %s AND (lease_expires_at IS NULL OR lease_expires_at < NOW())"
+
+
+def unattended_jobs(cur, job_ids: List[str]) -> Set[str]:
+    if not job_ids:
+        return set()
+    cur.execute(
+        f"SELECT job_id FROM etl_jobs WHERE job_id = ANY(%s::uuid[]) AND {_UNATTENDED_CONDITION};",
+        (list(job_ids), _INACTIVE_STATUSES)
+    )
+    return {str(row[0]) for row in cur.fetchall()}
+
+
+def fail_unattended_job(cur, job_id: str, reason: str) -> bool:
+    # False si entretanto un worker lo retomó (o terminó): entonces no se toca
+    cur.execute(
+        f"""
+            UPDATE etl_jobs
+            SET status = %s,
+                message = %s,
+                error_message = %s,
+                finished_at = NOW(),
+                updated_at = NOW()
+            WHERE job_id = %s::uuid AND {_UNATTENDED_CONDITION}
+            RETURNING job_id;
+        """,
+        (JOB_STATUS_FAILED, reason, reason, job_id, _INACTIVE_STATUSES)
+    )
+    return cur.fetchone() is not None
+
+
+def jobs_by_param(cur, job_type: str, key: str, value: str) -> Dict[str, Tuple[str, str]]:
+    # start_date -> (job_id, status) de los jobs con params[key] = value; si hay varios, el último
+    cur.execute(
+        """
+            SELECT params->>'start_date', job_id, status
+            FROM etl_jobs
+            WHERE job_type = %s AND params->>%s = %s
+            ORDER BY requested_at, job_id;
+        """,
+        (job_type, key, value)
+    )
+    return {start_date: (str(job_id), status) for start_date, job_id, status in cur.fetchall()}
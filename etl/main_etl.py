@@ -1,21 +1,118 @@
+import atexit
+import io
 import os
 import sys
+import threading
 import json
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from google.cloud import bigquery
 import pandas as pd
 import psycopg2
 from psycopg2 import extras
-from typing import Optional, List
-from transformation_etl import transform_data
+from psycopg2.pool import PoolError
+from typing import Dict, Optional, List, Set, Tuple
+from parallel_transform import transform_data_parallel
+from rolling_state import RollingState, STATE_COLUMNS, STATE_KEYS
+from rolling_engine import WINDOW_MODES, WINDOW_MODE_ROWS, WINDOW_MODE_CALENDAR
+from db_pool import ConnectionPool, connect_pooled, db_round_trips, DEFAULT_POOL_MAX_SIZE, DEFAULT_HEALTH_CHECK_SECONDS
+from etl_metrics import RunMetrics, write_prometheus_textfile
+from dim_page_cache import get_dim_page_cache
+from frame_dtypes import compact_pageviews, concat_frames, strip_strings, bytes_per_row
+from extract_cache import ExtractCache, plan_missing_shards, DEFAULT_EXTRACT_CACHE_MAX_MB
+from query_builder import build_pageviews_query, EXTRACT_MODE_PLATFORM
+from extraction import (
+    ShardedExtractor, ExtractShard, plan_shards, describe_shards, DEFAULT_MAX_IN_FLIGHT, EXTRACT_BACKEND_ARROW
+)
+from status_writer import AsyncStatusWriter, FINAL_STATUSES, JOB_LEASE_CONDITION, JobLease, job_status_fields, job_status_update
+from fact_partitions import FactPartition, ensure_fact_partitions, detach_old_partitions, rows_in_partition, FACT_TABLE
+from job_queue import ClaimedJob, release_job
+from worker import WORKER_MAX_ATTEMPTS
+from job_progress import (
+    job_shards, plan_resume, iter_checkpoints, rows_in_shards, load_progress, mark_shards, rows_per_shard,
+    loaded_history, first_loaded_day,
+    SHARD_STAGE_LOADED, SHARD_STAGE_COMPLETED
+)
+from view_refresh import (
+    refresh_views, refresh_summary_tables, delete_summary_before, touched_partitions,
+    REFRESH_MODES, REFRESH_MODE_CONCURRENT, REFRESH_MODE_INCREMENTAL, REFRESH_MODE_SERVING
+)
+from serving_tables import (
+    top_n_rows, trending_rows, series_rows, replace_serving_lists, upsert_page_series, delete_serving_before,
+    DEFAULT_SERVING_TOP_K
+)
+from streaming_etl import (
+    run_streaming_pipeline, DEFAULT_STREAM_PARTITIONS, DEFAULT_STREAM_MEMORY_MB, DEFAULT_STREAM_PAGE_SIZE
+)
 
 BIGQUERY_PROJECT_ID = os.getenv("BIGQUERY_PROJECT_ID", "disagro-hr-test")
 PUBLIC_DATA_ID = "bigquery-public-data"
 BIGQUERY_DATASET = "wikipedia"
 BIGQUERY_TABLE_PREFIX = "pageviews_"
-DIM_BATCH_SIZE = 500
+STATE_BATCH_SIZE = 2000
+FACT_BATCH_SIZE = 2000
+FACT_COPY_CHUNK_ROWS = 100_000
 
-def get_db_connection():
+# 'copy': COPY FROM STDIN a una tabla temporal + un único INSERT ... SELECT ... ON CONFLICT
+# 'values': execute_values por lotes (método anterior)
+FACT_LOAD_METHOD_COPY = 'copy'
+FACT_LOAD_METHOD_VALUES = 'values'
+FACT_LOAD_METHOD = os.getenv('ETL_FACT_LOAD_METHOD', FACT_LOAD_METHOD_COPY)
+
+# Modo streaming (ETL_STREAMING=true): filas por página de BigQuery, número de particiones
+# y memoria máxima (MB) para lotes extraídos antes de volcarlos a disco
+STREAM_PAGE_SIZE = int(os.getenv('ETL_STREAM_PAGE_SIZE', DEFAULT_STREAM_PAGE_SIZE))
+STREAM_PARTITIONS = int(os.getenv('ETL_STREAM_PARTITIONS', DEFAULT_STREAM_PARTITIONS))
+STREAM_MEMORY_MB = float(os.getenv('ETL_STREAM_MEMORY_MB', DEFAULT_STREAM_MEMORY_MB))
+STREAM_SPILL_DIR = os.getenv('ETL_STREAM_SPILL_DIR') or None
+
+# Versión de la semántica de la consulta de extracción; cambiarla invalida la caché local
+EXTRACT_QUERY_VERSION = 3
+
+# 'platform': top-N por plataforma, la ETL suma plataformas y normaliza títulos
+# 'pushdown': BigQuery suma plataformas, normaliza títulos y devuelve el top-N por (día, idioma)
+EXTRACT_MODE = os.getenv('ETL_EXTRACT_MODE', EXTRACT_MODE_PLATFORM)
+
+# Dry run previo a la extracción y presupuesto máximo en GB leídos (vacío o 0 = sin límite)
+EXTRACT_DRY_RUN = os.getenv('ETL_EXTRACT_DRY_RUN', 'true').lower() == 'true'
+EXTRACT_BUDGET_BYTES = int(float(os.getenv('ETL_EXTRACT_BUDGET_GB') or 0) * 1024 ** 3) or None
+
+# Extracción concurrente: consultas de BigQuery simultáneas y tamaño de shard en días
+# (0 = un shard por tabla anual)
+EXTRACT_MAX_IN_FLIGHT = int(os.getenv('ETL_EXTRACT_MAX_IN_FLIGHT', DEFAULT_MAX_IN_FLIGHT))
+EXTRACT_SHARD_DAYS = int(os.getenv('ETL_EXTRACT_SHARD_DAYS', '0')) or None
+
+# Descarga de resultados: 'arrow' (Storage Read API con respaldo REST, columnas Arrow) o 'pandas' (to_dataframe)
+EXTRACT_BACKEND = os.getenv('ETL_EXTRACT_BACKEND', EXTRACT_BACKEND_ARROW)
+
+# Ventanas móviles: 'rows' (últimas N observaciones) o 'calendar' (últimos N días; los días
+# sin registro cuentan como 0 vistas desde el inicio de la ventana extraída)
+WINDOW_MODE = os.getenv('ETL_WINDOW_MODE', WINDOW_MODE_ROWS)
+
+# Procesos para la transformación (1 = en serie, en el proceso principal)
+TRANSFORM_WORKERS = int(os.getenv('ETL_TRANSFORM_WORKERS', '1'))
+
+# Pool de conexiones a PostgreSQL y actualización asíncrona de etl_jobs
+DB_POOL_MAX_SIZE = int(os.getenv('ETL_DB_POOL_MAX_SIZE', DEFAULT_POOL_MAX_SIZE))
+DB_POOL_HEALTH_CHECK_SECONDS = float(os.getenv('ETL_DB_POOL_HEALTH_CHECK_SECONDS', DEFAULT_HEALTH_CHECK_SECONDS))
+ASYNC_JOB_STATUS = os.getenv('ETL_ASYNC_JOB_STATUS', 'true').lower() == 'true'
+# Refresco de vistas: concurrent (CONCURRENTLY), full (bloqueante) o incremental (tablas resumen por día)
+VIEW_REFRESH_MODE = os.getenv('ETL_VIEW_REFRESH_MODE', REFRESH_MODE_CONCURRENT)
+# Páginas por (día, idioma) en serving_top_n_daily (ETL_VIEW_REFRESH_MODE=serving)
+SERVING_TOP_K = int(os.getenv('ETL_SERVING_TOP_K', DEFAULT_SERVING_TOP_K))
+# Retención de fact_pageviews_daily: meses conservados (0 = sin límite) y si se borran las particiones desconectadas
+FACT_RETENTION_MONTHS = int(os.getenv('ETL_FACT_RETENTION_MONTHS', '0'))
+FACT_RETENTION_DROP = os.getenv('ETL_FACT_RETENTION_DROP', 'false').lower() == 'true'
+# Métricas por etapa: además de etl_jobs.metrics, archivo de texto para Prometheus (vacío = no se exporta)
+METRICS_TEXTFILE = os.getenv('ETL_METRICS_TEXTFILE') or None
+# Días por transacción de carga: cada bloque confirma dim_page, hechos y el progreso de sus shards
+CHECKPOINT_DAYS = int(os.getenv('ETL_CHECKPOINT_DAYS', '7'))
+
+FACT_COLUMNS = [
+    'day', 'page_id', 'language', 'views_total', 'avg_views_7d',
+    'avg_views_28d', 'variations', 'trend_score'
+]
+
+def _db_connect_kwargs() -> Optional[dict]:
     HOST = os.getenv('DB_HOST')
     USER = os.getenv('DB_USER')
     PASSWORD = os.getenv('DB_PASSWORD')
@@ -26,21 +123,85 @@ def get_db_connection():
         print("ERROR: Variable de entorno DB_HOST no está configurada.")
         return None
 
+    return {
+        'host': HOST,
+        'user': USER,
+        'password': PASSWORD,
+        'dbname': NAME,
+        'sslmode': SSLMODE,
+        'connect_timeout': 10,
+    }
+
+_db_pool: Optional[ConnectionPool] = None
+_db_pool_key: Optional[tuple] = None
+_db_pool_lock = threading.Lock()
+
+def get_db_pool(connect_kwargs: dict) -> ConnectionPool:
+    # Un pool por configuración de conexión; close() devuelve la conexión al pool
+    global _db_pool, _db_pool_key
+    key = tuple(sorted(connect_kwargs.items()))
+    with _db_pool_lock:
+        if _db_pool is None or _db_pool_key != key:
+            if _db_pool is not None:
+                _db_pool.closeall()
+            _db_pool = ConnectionPool(
+                connect_pooled(**connect_kwargs),
+                max_size=DB_POOL_MAX_SIZE,
+                health_check_seconds=DB_POOL_HEALTH_CHECK_SECONDS
+            )
+            _db_pool_key = key
+        return _db_pool
+
+def get_db_connection():
+    connect_kwargs = _db_connect_kwargs()
+    if connect_kwargs is None:
+        return None
+
     try:
-        conn = psycopg2.connect(
-            host=HOST,
-            user=USER,
-            password=PASSWORD,
-            dbname=NAME,
-            sslmode=SSLMODE,
-            connect_timeout=10
-        )
-        return conn
+        return get_db_pool(connect_kwargs).getconn()
+    except (psycopg2.Error, PoolError) as error:
+        print(f"Error al conectar a PostgreSQL: {error}")
+        return None
+
+def open_db_connection():
+    # Conexión propia, fuera del pool (p. ej. para el escritor de estados en segundo plano)
+    connect_kwargs = _db_connect_kwargs()
+    if connect_kwargs is None:
+        return None
+
+    try:
+        return psycopg2.connect(**connect_kwargs)
     except psycopg2.Error as error:
         print(f"Error al conectar a PostgreSQL: {error}")
         return None
 
-def register_etl_job_start(start_date: str, end_date: str, languages: List[str], worker_id: str = "worker-python-01") -> Optional[str]:
+_status_writer: Optional[AsyncStatusWriter] = None
+# Lease (worker, intento) de los jobs reclamados de la cola: sus escrituras en etl_jobs y
+# etl_job_progress sólo se aplican mientras el job siga siendo de este proceso
+_job_leases: Dict[str, JobLease] = {}
+
+def job_condition(job_id: str) -> Tuple[str, tuple]:
+    # Condición WHERE sobre etl_jobs para job_id, con el lease si el job es de la cola
+    lease = _job_leases.get(job_id)
+    if lease is None:
+        return "job_id = %s", (job_id,)
+    return f"job_id = %s AND {JOB_LEASE_CONDITION}", (job_id,) + tuple(lease)
+
+def get_status_writer() -> AsyncStatusWriter:
+    global _status_writer
+    if _status_writer is None:
+        _status_writer = AsyncStatusWriter(open_db_connection)
+        atexit.register(_status_writer.close)
+    return _status_writer
+
+def register_etl_job_start(
+    start_date: str,
+    end_date: str,
+    languages: List[str],
+    worker_id: str = "worker-python-01",
+    options: Optional[dict] = None
+) -> Optional[str]:
+    # options: resto de parámetros de la ejecución, para poder reanudarla igual (ETL_RESUME_JOB_ID)
     conn = get_db_connection()
     if conn is None:
         return None
@@ -52,6 +213,7 @@ def register_etl_job_start(start_date: str, end_date: str, languages: List[str],
             "start_date": start_date,
             "end_date": end_date,
             "languages": languages,
+            **(options or {}),
         }
         job_parameters_json = json.dumps(job_parameters)
         insert_query = """
@@ -94,6 +256,16 @@ def update_etl_job_status(
     rows_processed: Optional[int] = None, 
     error_message: Optional[str] = None
 ) -> bool:
+    fields = job_status_fields(status, message, rows_processed, error_message, _job_leases.get(job_id))
+
+    # Por defecto se encola y se escribe en segundo plano; los estados finales se esperan
+    if ASYNC_JOB_STATUS:
+        writer = get_status_writer()
+        writer.submit(job_id, fields)
+        if status in FINAL_STATUSES:
+            writer.flush()
+        return True
+
     conn = get_db_connection()
     if conn is None:
         print(f"No se pudo conectar a la BD para actualizar el estado del Job {job_id}.")
@@ -101,43 +273,45 @@ def update_etl_job_status(
 
     try:
         cur = conn.cursor()
-        
-        update_parts = [
-            "status = %s", 
-            "updated_at = NOW()"
-        ]
-        params = [status]
-        
-        if message is not None:
-            update_parts.append("message = %s")
-            params.append(message)
+        cur.execute(*job_status_update(job_id, fields))
+        conn.commit()
+        print(f"Job ETL {job_id} actualizado a estado: {status} - {message if message else ''}")
+        return True
 
-        if rows_processed is not None:
-            update_parts.append("rows_processed = %s")
-            params.append(rows_processed)
-            
-        if error_message is not None:
-            update_parts.append("error_message = %s")
-            params.append(error_message)
-            
-        if status in ['COMPLETADO', 'FALLIDO']:
-            update_parts.append("finished_at = NOW()")
+    except (Exception, psycopg2.Error) as error:
+        print(f"ERROR: No se pudo actualizar el estado del Job ETL {job_id}: {error}")
+        if conn:
+            conn.rollback()
+        return False
+    finally:
+        if conn:
+            cur.close()
+            conn.close()
 
-        update_query = f"""
-            UPDATE etl_jobs 
-            SET {', '.join(update_parts)}
-            WHERE job_id = %s;
-        """
-        
-        params.append(job_id)
+def merge_etl_job_params(job_id: str, values: dict) -> bool:
+    # Agrega claves a etl_jobs.params (JSONB) sin pisar los parámetros originales del job
+    conn = get_db_connection()
+    if conn is None:
+        print(f"No se pudo conectar a la BD para actualizar los parámetros del Job {job_id}.")
+        return False
 
-        cur.execute(update_query, tuple(params))
+    try:
+        cur = conn.cursor()
+        condition, condition_params = job_condition(job_id)
+        cur.execute(
+            f"""
+                UPDATE etl_jobs
+                SET params = COALESCE(params, '{{}}'::jsonb) || %s::jsonb,
+                    updated_at = NOW()
+                WHERE {condition};
+            """,
+            (json.dumps(values),) + condition_params
+        )
         conn.commit()
-        print(f"Job ETL {job_id} actualizado a estado: {status} - {message if message else ''}")
         return True
 
     except (Exception, psycopg2.Error) as error:
-        print(f"ERROR: No se pudo actualizar el estado del Job ETL {job_id}: {error}")
+        print(f"ERROR: No se pudieron actualizar los parámetros del Job ETL {job_id}: {error}")
         if conn:
             conn.rollback()
         return False
@@ -146,6 +320,181 @@ def update_etl_job_status(
             cur.close()
             conn.close()
 
+def release_claimed_etl_job(job_id: str, reason: str) -> Optional[str]:
+    # Devuelve a PENDIENTE un job de la cola que falló (FALLIDO si agotó ETL_WORKER_MAX_ATTEMPTS);
+    # None si el job ya no era de este proceso
+    worker_id, attempts = _job_leases[job_id]
+    if ASYNC_JOB_STATUS:
+        get_status_writer().flush()
+    conn = get_db_connection()
+    if conn is None:
+        print(f"No se pudo conectar a la BD para liberar el Job {job_id}; lo liberará el vencimiento del lease.")
+        return None
+
+    try:
+        cur = conn.cursor()
+        released = release_job(cur, job_id, worker_id, reason, WORKER_MAX_ATTEMPTS, attempts)
+        conn.commit()
+        status = released[0][1] if released else None
+        print(f"Job ETL {job_id} liberado tras el intento {attempts}: {status or 'ya no era de este worker'}.")
+        return status
+
+    except (Exception, psycopg2.Error) as error:
+        print(f"ERROR: No se pudo liberar el Job ETL {job_id}: {error}")
+        if conn:
+            conn.rollback()
+        return None
+    finally:
+        if conn:
+            cur.close()
+            conn.close()
+
+def resume_etl_job(job_id: str, worker_id: str) -> Optional[dict]:
+    # Reabre un job anterior (p. ej. FALLIDO) y devuelve sus parámetros; None si no existe
+    conn = get_db_connection()
+    if conn is None:
+        return None
+
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+                UPDATE etl_jobs
+                SET status = 'REANUDANDO',
+                    message = 'Job reanudado desde el último shard confirmado.',
+                    started_at = NOW(),
+                    finished_at = NULL,
+                    error_message = NULL,
+                    worker_id = %s,
+                    updated_at = NOW()
+                WHERE job_id = %s
+                RETURNING params;
+            """,
+            (worker_id, job_id)
+        )
+        row = cur.fetchone()
+        conn.commit()
+        if row is None:
+            return None
+        print(f"Job ETL {job_id} reanudado.")
+        return row[0] or {}
+
+    except (Exception, psycopg2.Error) as error:
+        print(f"ERROR: No se pudo reanudar el Job ETL {job_id}: {error}")
+        if conn:
+            conn.rollback()
+        return None
+    finally:
+        if conn:
+            cur.close()
+            conn.close()
+
+def load_job_progress(job_id: str) -> dict:
+    conn = get_db_connection()
+    if conn is None:
+        raise Exception("Fallo al conectar a la base de datos para leer el progreso del job.")
+    try:
+        cur = conn.cursor()
+        progress = load_progress(cur, job_id)
+        conn.commit()
+        return progress
+    except (Exception, psycopg2.Error) as error:
+        print(f"Error al leer el progreso del Job ETL {job_id}: {error}")
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+def save_job_progress(job_id: str, shards: Set[Tuple[date, str]], stage: str):
+    # Para shards sin filas que cargar y para la etapa final (vistas refrescadas)
+    if not shards:
+        return
+    conn = get_db_connection()
+    if conn is None:
+        raise Exception("Fallo al conectar a la base de datos para guardar el progreso del job.")
+    try:
+        cur = conn.cursor()
+        mark_shards(cur, job_id, shards, stage, lease=_job_leases.get(job_id))
+        conn.commit()
+    except (Exception, psycopg2.Error) as error:
+        print(f"Error al guardar el progreso del Job ETL {job_id}: {error}")
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+def load_resume_history(languages: List[str], start_day: date, before_day: date) -> pd.DataFrame:
+    conn = get_db_connection()
+    if conn is None:
+        raise Exception("Fallo al conectar a la base de datos para leer el historial cargado.")
+    try:
+        cur = conn.cursor()
+        history = loaded_history(cur, languages, start_day, before_day)
+        conn.commit()
+        return history
+    except (Exception, psycopg2.Error) as error:
+        print(f"Error al leer el historial ya cargado del job: {error}")
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+def load_first_loaded_day(languages: List[str], before_day: date) -> Optional[date]:
+    conn = get_db_connection()
+    if conn is None:
+        raise Exception("Fallo al conectar a la base de datos para leer el primer día cargado.")
+    try:
+        cur = conn.cursor()
+        first_day = first_loaded_day(cur, languages, before_day)
+        conn.commit()
+        return first_day
+    except (Exception, psycopg2.Error) as error:
+        print(f"Error al leer el primer día cargado: {error}")
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+def save_etl_job_metrics(job_id: str, metrics: RunMetrics, success: bool) -> bool:
+    # Métricas por etapa en etl_jobs.metrics y, opcionalmente, en el archivo de Prometheus
+    metrics_data = metrics.to_dict()
+    if METRICS_TEXTFILE:
+        try:
+            write_prometheus_textfile(METRICS_TEXTFILE, metrics_data, success)
+        except OSError as error:
+            print(f"Error al escribir las métricas para Prometheus en {METRICS_TEXTFILE}: {error}")
+
+    conn = get_db_connection()
+    if conn is None:
+        return False
+    try:
+        cur = conn.cursor()
+        condition, condition_params = job_condition(job_id)
+        cur.execute(
+            f"UPDATE etl_jobs SET metrics = %s::jsonb, updated_at = NOW() WHERE {condition};",
+            (json.dumps(metrics_data),) + condition_params
+        )
+        conn.commit()
+        return True
+    except (Exception, psycopg2.Error) as error:
+        print(f"Error al guardar las métricas del job {job_id}: {error}")
+        conn.rollback()
+        return False
+    finally:
+        cur.close()
+        conn.close()
+
+def extract_cost_params(extractor: ShardedExtractor) -> dict:
+    return {
+        'bigquery_bytes_estimated': extractor.estimated_bytes,
+        'bigquery_bytes_processed': extractor.processed_bytes,
+        'bigquery_shards': len(extractor.stats),
+    }
+
 def get_bigquery_client():
     try:
         client = bigquery.Client(project=BIGQUERY_PROJECT_ID)
@@ -154,119 +503,234 @@ def get_bigquery_client():
         print(f"Error al inicializar cliente de BigQuery: {e}")
         raise
 
+def get_bigquery_storage_client():
+    # Opcional: sin google-cloud-bigquery-storage cada descarga Arrow va por la API REST
+    try:
+        from google.cloud import bigquery_storage
+    except ImportError:
+        return None
+    try:
+        return bigquery_storage.BigQueryReadClient()
+    except Exception as e:
+        print(f"Cliente de la Storage Read API no disponible ({e}); se descargará por REST.")
+        return None
+
+def new_extractor(client: bigquery.Client, page_size: Optional[int] = None) -> ShardedExtractor:
+    # Un solo cliente de la Storage Read API compartido por todos los shards
+    bqstorage_client = get_bigquery_storage_client() if EXTRACT_BACKEND == EXTRACT_BACKEND_ARROW else None
+    return ShardedExtractor(
+        client,
+        EXTRACT_MAX_IN_FLIGHT,
+        page_size,
+        dry_run=EXTRACT_DRY_RUN,
+        budget_bytes=EXTRACT_BUDGET_BYTES,
+        backend=EXTRACT_BACKEND,
+        bqstorage_client=bqstorage_client
+    )
+
+def iter_pageview_batches(
+    client: bigquery.Client,
+    start_date: datetime,
+    end_date: datetime,
+    languages: List[str],
+    rank_by_views: int,
+    exclude_automated_traffic: bool = True,
+    page_size: Optional[int] = None,
+    extractor: Optional[ShardedExtractor] = None,
+    extract_mode: str = EXTRACT_MODE
+):
+    # Una consulta por shard (tabla anual y, si ETL_EXTRACT_SHARD_DAYS > 0, tramos de días),
+    # con varias en vuelo a la vez; los resultados se entregan en cuanto llegan, con las
+    # columnas de texto como diccionario y las vistas en el menor entero que las contiene
+    if extractor is None:
+        extractor = new_extractor(client, page_size)
+
+    def build_shard_query(shard: ExtractShard) -> str:
+        table_id = f"{PUBLIC_DATA_ID}.{BIGQUERY_DATASET}.{BIGQUERY_TABLE_PREFIX}{shard.year}"
+        return build_pageviews_query(
+            table_id, shard.start_date, shard.end_date, languages, rank_by_views, exclude_automated_traffic,
+            extract_mode
+        )
+
+    shards = plan_shards(start_date, end_date, EXTRACT_SHARD_DAYS)
+    extract_cache = get_extract_cache()
+    open_shard_sink = None
+    try:
+        if extract_cache is not None:
+            # Sólo se consultan los días que no están en la caché local
+            cache_params = {
+                'languages': sorted(languages),
+                'rank_by_views': rank_by_views,
+                'exclude_automated_traffic': exclude_automated_traffic,
+                'query_version': EXTRACT_QUERY_VERSION,
+            }
+            if extract_mode != EXTRACT_MODE_PLATFORM:
+                # Las entradas del modo 'platform' conservan su clave anterior
+                cache_params['extract_mode'] = extract_mode
+            hits, missing_days = extract_cache.lookup(shards, cache_params)
+            for batch in extract_cache.iter_hits(hits, missing_days):
+                yield compact_pageviews(batch.rename(columns={'views': 'views_total'}))
+            print(f"Caché de extracción: {len(hits)} días en caché, {len(missing_days)} días a consultar.")
+            shards = plan_missing_shards(missing_days, EXTRACT_SHARD_DAYS)
+
+            def open_shard_sink(shard: ExtractShard):
+                # Las páginas se escriben en la caché a medida que llegan (memoria acotada en streaming)
+                return extract_cache.open_shard(shard, cache_params)
+
+        for batch in extractor.iter_batches(shards, build_shard_query, open_shard_sink):
+            yield compact_pageviews(batch.rename(columns={'views': 'views_total'}))
+    except Exception as e:
+        print(f"Error al ejecutar consulta BigQuery de extracción: {e}")
+        raise
+
+_extract_cache: Optional[ExtractCache] = None
+
+def get_extract_cache() -> Optional[ExtractCache]:
+    # Sin ETL_EXTRACT_CACHE_DIR no hay caché de extracción
+    global _extract_cache
+    cache_dir = os.getenv('ETL_EXTRACT_CACHE_DIR')
+    if not cache_dir:
+        return None
+    if _extract_cache is None or _extract_cache.directory != cache_dir:
+        _extract_cache = ExtractCache(
+            cache_dir,
+            max_bytes=int(float(os.getenv('ETL_EXTRACT_CACHE_MAX_MB', DEFAULT_EXTRACT_CACHE_MAX_MB)) * 1024 ** 2),
+            force_refresh=os.getenv('ETL_EXTRACT_CACHE_REFRESH', 'false').lower() == 'true'
+        )
+    return _extract_cache
+
 def extract_pageviews(
     client: bigquery.Client,
     start_date: datetime,
     end_date: datetime,
     languages: list[str],
     rank_by_views: int,
-    exclude_automated_traffic: bool = True
+    exclude_automated_traffic: bool = True,
+    extractor: Optional[ShardedExtractor] = None,
+    extract_mode: str = EXTRACT_MODE
 ) -> pd.DataFrame:
-    all_data = []
-
-    current_year = start_date.year
-    while current_year <= end_date.year:
-        table_id = f"{PUBLIC_DATA_ID}.{BIGQUERY_DATASET}.{BIGQUERY_TABLE_PREFIX}{current_year}"
-        lang_filter = ", ".join([f"'{lang}'" for lang in languages])
-        date_where_clause = f"""
-            FORMAT_TIMESTAMP('%Y%m%d', datehour) BETWEEN '{start_date.strftime('%Y%m%d')}' AND '{end_date.strftime('%Y%m%d')}'
-        """
-        
-        automated_traffic_filter = ""
-        if exclude_automated_traffic:
-            automated_traffic_filter = """
-                AND title NOT IN ('Main_Page', 'Special:Search', '404_error_page', 'Portal:Current_events')
-                AND title NOT LIKE 'File:%' AND title NOT LIKE 'MediaWiki:%'
-                AND title NOT LIKE 'User:%' AND title NOT LIKE 'Wikipedia:%'
-                AND title NOT LIKE 'Talk:%'
-                AND title NOT LIKE 'Template:%'
-            """
-        
-        if rank_by_views > 0:
-            query = f"""
-                WITH AggregatedViews AS (
-                    SELECT
-                        DATE(datehour) AS day,
-                        REGEXP_EXTRACT(wiki, r'^([a-z]{{2}})') AS language,
-                        CASE
-                            WHEN REGEXP_CONTAINS(wiki, r'\.m$') THEN 'mobile'
-                            ELSE 'desktop'
-                        END AS platform_type,
-                        title,
-                        SUM(views) AS views
-                    FROM
-                        `{table_id}`
-                    WHERE
-                        {date_where_clause}
-                        AND REGEXP_EXTRACT(wiki, r'^([a-z]{{2}})') IN ({lang_filter})
-                        {automated_traffic_filter}
-                    GROUP BY 1, 2, 3, 4
-                ),
-                RankedViews AS (
-                    SELECT
-                        *,
-                        ROW_NUMBER() OVER (
-                            PARTITION BY day, language, platform_type
-                            ORDER BY views DESC
-                        ) AS rank_by_views
-                    FROM
-                        AggregatedViews
-                )
-                SELECT day, language, platform_type, title, views
-                FROM RankedViews
-                WHERE rank_by_views <= {rank_by_views}
-                ORDER BY day, language, title, platform_type
-            """
-        else:
-            query = f"""
-                SELECT
-                    DATE(datehour) AS day,
-                    REGEXP_EXTRACT(wiki, r'^([a-z]{{2}})') AS language,
-                    CASE
-                        WHEN REGEXP_CONTAINS(wiki, r'\.m$') THEN 'mobile'
-                        ELSE 'desktop'
-                    END AS platform_type,
-                    title,
-                    SUM(views) AS views
-                FROM
-                    `{table_id}`
-                WHERE
-                    {date_where_clause}
-                    AND REGEXP_EXTRACT(wiki, r'^([a-z]{{2}})') IN ({lang_filter})
-                    {automated_traffic_filter}
-                GROUP BY 1, 2, 3, 4
-                ORDER BY day, language, title, platform_type
-            """
+    all_data = list(iter_pageview_batches(
+        client, start_date, end_date, languages, rank_by_views, exclude_automated_traffic,
+        extractor=extractor, extract_mode=extract_mode
+    ))
 
-        try:
-            query_job = client.query(query)
-            
-            # Se usa Dry Run para estimar el costo de la consulta
-            # query_job = client.query(query, job_config=bigquery.QueryJobConfig(dry_run=True, use_query_cache=False))
-            # print(f"La consulta procesaría {query_job.total_bytes_processed / (1024**3):.2f} GB de datos")
+    if not all_data:
+        return pd.DataFrame()
 
-            results = query_job.to_dataframe()
-            all_data.append(results)
+    # Une los diccionarios de cada lote en lugar de volver a cadenas
+    return concat_frames(all_data)
 
-        except Exception as e:
-            print(f"Error al ejecutar consulta BigQuery para {table_id}: {e}")
-            raise
+def _upsert_facts_execute_values(cur, df_for_fact: pd.DataFrame, target: str = FACT_TABLE):
+    df_for_fact = df_for_fact.astype(object).where(pd.notnull(df_for_fact), None)
 
-        current_year += 1
+    insert_fact_query = f"""
+        INSERT INTO {target} (
+            day, page_id, language, views_total, avg_views_7d, avg_views_28d, variations, trend_score
+        )
+        VALUES %s
+        ON CONFLICT (day, page_id, language) DO UPDATE SET
+            views_total = EXCLUDED.views_total,
+            avg_views_7d = EXCLUDED.avg_views_7d,
+            avg_views_28d = EXCLUDED.avg_views_28d,
+            variations = EXCLUDED.variations,
+            trend_score = EXCLUDED.trend_score,
+            updated_at = NOW();
+    """
+    
+    extras.execute_values(cur, insert_fact_query, df_for_fact.values, page_size=FACT_BATCH_SIZE)
 
-    if not all_data:
-        return pd.DataFrame()
+def _csv_column(values: pd.Series) -> list:
+    # Formateo por columna: repr() de Python es mucho más rápido que DataFrame.to_csv para floats
+    if values.name == 'day':
+        return pd.to_datetime(values).to_numpy(dtype='datetime64[D]').astype(str).tolist()
+    if pd.api.types.is_float_dtype(values.dtype):
+        # NaN -> campo vacío (NULL en COPY CSV)
+        return ['' if value != value else repr(value) for value in values.tolist()]
+    return [str(value) for value in values.tolist()]
+
+def _facts_to_csv(df_for_fact: pd.DataFrame) -> str:
+    # Las columnas de hechos no contienen separadores ni comillas (fechas, números y códigos de idioma)
+    columns = [_csv_column(df_for_fact[column]) for column in FACT_COLUMNS]
+    return ''.join(f"{','.join(row)}\n" for row in zip(*columns))
 
-    final_df = pd.concat(all_data, ignore_index=True)
+def _upsert_facts_copy(cur, df_for_fact: pd.DataFrame, partitions: List[FactPartition]):
+    # Tabla temporal (sin WAL) que desaparece al confirmar la transacción
+    cur.execute("""
+        CREATE TEMP TABLE stg_fact_pageviews_daily (
+            day DATE NOT NULL,
+            page_id INTEGER NOT NULL,
+            language VARCHAR(10) NOT NULL,
+            views_total BIGINT NOT NULL,
+            avg_views_7d NUMERIC,
+            avg_views_28d NUMERIC,
+            variations NUMERIC,
+            trend_score NUMERIC
+        ) ON COMMIT DROP;
+    """)
 
-    df_daily_total = final_df.rename(columns={'views': 'views_total'}, inplace=False)
+    # COPY en formato CSV desde un buffer en memoria, por bloques para acotar su tamaño
+    copy_query = f"COPY stg_fact_pageviews_daily ({', '.join(FACT_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+    for i in range(0, len(df_for_fact), FACT_COPY_CHUNK_ROWS):
+        buffer = io.StringIO(_facts_to_csv(df_for_fact.iloc[i:i + FACT_COPY_CHUNK_ROWS]))
+        cur.copy_expert(copy_query, buffer)
+
+    # Un INSERT por partición mensual, directo a la partición (sin enrutamiento de filas)
+    for partition in partitions:
+        day_filter = "WHERE day >= %s AND day < %s" if partition.start is not None else ""
+        cur.execute(f"""
+            INSERT INTO {partition.name} (
+                day, page_id, language, views_total, avg_views_7d, avg_views_28d, variations, trend_score
+            )
+            SELECT day, page_id, language, views_total, avg_views_7d, avg_views_28d, variations, trend_score
+            FROM stg_fact_pageviews_daily
+            {day_filter}
+            ON CONFLICT (day, page_id, language) DO UPDATE SET
+                views_total = EXCLUDED.views_total,
+                avg_views_7d = EXCLUDED.avg_views_7d,
+                avg_views_28d = EXCLUDED.avg_views_28d,
+                variations = EXCLUDED.variations,
+                trend_score = EXCLUDED.trend_score,
+                updated_at = NOW();
+        """, (partition.start, partition.end) if partition.start is not None else None)
 
-    return df_daily_total
+def upsert_fact_rows(
+    cur,
+    df_for_fact: pd.DataFrame,
+    method: str = FACT_LOAD_METHOD,
+    partitions: Optional[List[FactPartition]] = None
+):
+    # partitions: destino de cada mes (ensure_fact_partitions); por defecto la tabla padre
+    if partitions is None:
+        partitions = [FactPartition(FACT_TABLE, None, None)]
+    if method == FACT_LOAD_METHOD_COPY:
+        _upsert_facts_copy(cur, df_for_fact[FACT_COLUMNS], partitions)
+    elif method == FACT_LOAD_METHOD_VALUES:
+        for partition in partitions:
+            partition_rows = rows_in_partition(df_for_fact[FACT_COLUMNS], partition)
+            if not partition_rows.empty:
+                _upsert_facts_execute_values(cur, partition_rows, partition.name)
+    else:
+        raise ValueError(f"Método de carga de hechos no soportado: {method}")
 
-def load_data_to_postgres(df: pd.DataFrame):
+def load_data_to_postgres(
+    df: pd.DataFrame,
+    fact_load_method: str = FACT_LOAD_METHOD,
+    metrics: Optional[RunMetrics] = None,
+    job_id: Optional[str] = None,
+    shards: Optional[Set[Tuple[date, str]]] = None,
+    refresh_mode: str = VIEW_REFRESH_MODE,
+    serving_lists: bool = True
+) -> Set[Tuple[date, str]]:
+    # Devuelve las particiones (day, language) cargadas, para el refresco incremental de vistas.
+    # dim_page, los hechos y (con job_id) el progreso de los shards se confirman en una sola
+    # transacción: un fallo no deja páginas sin hechos ni shards marcados sin cargar.
+    # En modo 'serving' las tablas de servicio se escriben en esa misma transacción; las listas
+    # (Top-N y trending) sólo si df trae los días completos (serving_lists=False en streaming)
+    if metrics is None:
+        metrics = RunMetrics(db_round_trips)
     if df.empty:
         print("DataFrame vacío, no hay datos para cargar en PostgreSQL.")
-        return
+        return set()
 
     conn = get_db_connection()
     if conn is None:
@@ -276,127 +740,137 @@ def load_data_to_postgres(df: pd.DataFrame):
         cur = conn.cursor()
         
         conn.autocommit = False 
+
+        with metrics.stage('load_dim') as stage:
+            # Las particiones mensuales que falten se crean en una transacción corta propia:
+            # CREATE TABLE ... PARTITION OF bloquea fact_pageviews_daily hasta confirmar
+            fact_partitions = ensure_fact_partitions(cur, df['day'])
+            conn.commit()
         
-        # Proceso para dim_page
-        df['title_normalized'] = df['title_normalized'].astype(str).str.strip()
-        df['language'] = df['language'].astype(str).str.strip()
-        df['original_title'] = df['original_title'].astype(str).str.strip()
-        df['title_normalized'] = df['title_normalized'].str.replace('\x00', '', regex=False).str.strip()
-        
-        dim_page_data = df[['title_normalized', 'language', 'category', 'original_title']].drop_duplicates(
-            subset=['title_normalized', 'language'], 
-            keep='first'
-        ).copy()
+            # Proceso para dim_page
+            # En columnas de diccionario la limpieza se aplica a las categorías, no a cada fila
+            df['title_normalized'] = strip_strings(df['title_normalized'], remove='\x00')
+            df['language'] = strip_strings(df['language'])
+            df['original_title'] = strip_strings(df['original_title'])
         
-        dim_page_data = dim_page_data.reset_index(drop=True)
-        num_keys = len(dim_page_data)
-                
-        insert_dim_page_query = """
-            INSERT INTO dim_page (title_normalized, language, category, original_title)
-            VALUES %s
-            ON CONFLICT (title_normalized, language) DO UPDATE
-            SET
-                category = EXCLUDED.category,
-                original_title = EXCLUDED.original_title,
-                updated_at = NOW()
-            RETURNING page_id, title_normalized AS title_normalized_db, language AS language_db;
-        """
-        
-        all_inserted_pages = []
+            # Una fila por página: la caché de dim_page trabaja con cadenas
+            dim_page_data = df[['title_normalized', 'language', 'category', 'original_title']].drop_duplicates(
+                subset=['title_normalized', 'language'], 
+                keep='first'
+            ).astype(object).reset_index(drop=True)
 
-        for i in range(0, num_keys, DIM_BATCH_SIZE):
-            chunk = dim_page_data.iloc[i:i + DIM_BATCH_SIZE]
-            
-            extras.execute_values(
-                cur, 
-                insert_dim_page_query, 
-                chunk[['title_normalized', 'language', 'category', 'original_title']].values, 
-                page_size=DIM_BATCH_SIZE
-            ) 
-            inserted_dim_pages = cur.fetchall()
-            all_inserted_pages.extend(inserted_dim_pages)
-        
-        conn.commit()
+            # Sólo se insertan las claves nuevas y se actualizan las que cambiaron; el resto se
+            # resuelve con la caché en memoria
+            dim_page_cache = get_dim_page_cache()
+            dim_page_map_df, pending_cache_rows = dim_page_cache.resolve(cur, dim_page_data)
+            stage['rows_in'] = len(dim_page_data)
+            stage['rows_out'] = len(pending_cache_rows)
 
-        dim_page_map_df = pd.DataFrame(
-            all_inserted_pages, 
-            columns=['page_id', 'title_normalized_db', 'language_db']
-        )
-        
-        dim_page_map_df['title_normalized_db'] = dim_page_map_df['title_normalized_db'].astype(str).str.strip()
-        dim_page_map_df['language_db'] = dim_page_map_df['language_db'].astype(str).str.strip()
-        dim_page_map_df['title_normalized_db'] = (
-            dim_page_map_df['title_normalized_db']
-            .str.replace('\x00', '', regex=False)
-            .str.strip() 
-        )
-        
-        df = pd.merge(
-            df, 
-            dim_page_map_df, 
-            left_on=['title_normalized', 'language'],
-            right_on=['title_normalized_db', 'language_db'],
-            how='left'
-        )
+        serving_frames = None
+        if refresh_mode == REFRESH_MODE_SERVING:
+            serving_frames = (
+                series_rows(df),
+                top_n_rows(df, SERVING_TOP_K) if serving_lists else None,
+                trending_rows(df) if serving_lists else None,
+            )
+
+        with metrics.stage('load_fact') as stage:
+            df = pd.merge(
+                df,
+                dim_page_map_df,
+                on=['title_normalized', 'language'],
+                how='left'
+            )
 
-        if 'page_id' not in df.columns or df['page_id'].isnull().any():
-            unmapped_rows = df[df['page_id'].isnull()]
-            if not unmapped_rows.empty:
-                print("\nERROR: Los siguientes datos no pudieron mapear el page_id:")
-                print(unmapped_rows[['title_normalized', 'language']].drop_duplicates().head(5))
+            if 'page_id' not in df.columns or df['page_id'].isnull().any():
+                unmapped_rows = df[df['page_id'].isnull()]
+                if not unmapped_rows.empty:
+                    print("\nERROR: Los siguientes datos no pudieron mapear el page_id:")
+                    print(unmapped_rows[['title_normalized', 'language']].drop_duplicates().head(5))
             
-            raise Exception("Error al mapear page_id después del UPSERT de dim_page.")
+                raise Exception("Error al mapear page_id después del UPSERT de dim_page.")
         
-        df.drop(columns=['title_normalized_db', 'language_db', 'title_normalized', 'category', 'original_title'], inplace=True, errors='ignore')
+            df.drop(columns=['title_normalized', 'category', 'original_title'], inplace=True, errors='ignore')
 
-        # Proceso para fact_pageviews_daily
-        fact_columns = [
-            'day', 'page_id', 'language', 'views_total', 'avg_views_7d',
-            'avg_views_28d', 'variations', 'trend_score'
-        ]
-        
-        df['page_id'] = df['page_id'].astype(int)
-        
-        df_for_fact = df[fact_columns].copy()
-        df_for_fact = df_for_fact.where(pd.notnull(df_for_fact), None)
+            # Proceso para fact_pageviews_daily
+            df['page_id'] = df['page_id'].astype(int)
+            upsert_fact_rows(cur, df[FACT_COLUMNS], fact_load_method, fact_partitions)
+            loaded = touched_partitions(df)
+            if job_id:
+                mark_shards(
+                    cur, job_id, loaded if shards is None else shards, SHARD_STAGE_LOADED, rows_per_shard(df),
+                    lease=_job_leases.get(job_id)
+                )
+            stage['rows_in'] = stage['rows_out'] = len(df)
+
+        if serving_frames is not None:
+            with metrics.stage('load_serving') as stage:
+                series, top_n, trending = serving_frames
+                upsert_page_series(cur, series)
+                if top_n is not None:
+                    replace_serving_lists(cur, top_n, trending, loaded if shards is None else shards)
+                    stage['rows_out'] = len(top_n) + len(trending)
+                stage['rows_in'] = len(series)
 
-        insert_fact_query = """
-            INSERT INTO fact_pageviews_daily (
-                day, page_id, language, views_total, avg_views_7d, avg_views_28d, variations, trend_score
-            )
-            VALUES %s
-            ON CONFLICT (day, page_id, language) DO UPDATE SET
-                views_total = EXCLUDED.views_total,
-                avg_views_7d = EXCLUDED.avg_views_7d,
-                avg_views_28d = EXCLUDED.avg_views_28d,
-                variations = EXCLUDED.variations,
-                trend_score = EXCLUDED.trend_score,
-                updated_at = NOW();
-        """
-        
-        extras.execute_values(cur, insert_fact_query, df_for_fact.values, page_size=2000)
         conn.commit()
+        # Las páginas nuevas sólo pasan a la caché una vez confirmadas
+        dim_page_cache.remember(pending_cache_rows)
+        dim_page_cache.mark_synced(cur)
+        return loaded
 
     except (Exception, psycopg2.Error) as error:
         print(f"Error durante la carga de datos en PostgreSQL: {error}")
         if conn:
             conn.rollback()
+        # Ante un error la caché puede no reflejar la tabla; se fuerza la recarga
+        get_dim_page_cache().invalidate()
         raise
     finally:
         if conn:
             cur.close()
             conn.close()
 
-def refresh_materialized_views():
+def save_serving_lists(top_n: pd.DataFrame, trending: pd.DataFrame, partitions: Set[Tuple[date, str]]):
+    # Listas de servicio calculadas aparte de la carga (streaming: cada partición trae sólo parte de cada día)
+    conn = get_db_connection()
+    if conn is None:
+        raise Exception("Fallo al conectar a la base de datos para escribir las tablas de servicio.")
+    try:
+        cur = conn.cursor()
+        replaced = replace_serving_lists(cur, top_n, trending, partitions)
+        conn.commit()
+        print(f"Tablas de servicio actualizadas: {replaced} particiones (día, idioma).")
+    except (Exception, psycopg2.Error) as error:
+        print(f"Error al escribir las tablas de servicio: {error}")
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+def refresh_materialized_views(
+    partitions: Optional[Set[Tuple[date, str]]] = None,
+    mode: str = VIEW_REFRESH_MODE
+):
+    if mode not in REFRESH_MODES:
+        raise ValueError(f"Modo de refresco de vistas no soportado: {mode}")
+    if mode == REFRESH_MODE_SERVING:
+        # Las tablas de servicio se escribieron junto con los hechos: no hay vistas que refrescar
+        print("Modo serving: tablas de servicio escritas en la carga, sin refresco de vistas.")
+        return
     conn = get_db_connection()
     if conn is None:
         raise Exception("Fallo al conectar a la base de datos para la carga.")
     try:
         cur = conn.cursor()
 
-        cur.execute("REFRESH MATERIALIZED VIEW mv_top_n_daily_by_language;")
-        cur.execute("REFRESH MATERIALIZED VIEW mv_trending_daily;")
-        conn.commit()
+        if mode == REFRESH_MODE_INCREMENTAL:
+            # Sólo se reescriben las particiones cargadas; la API lee las tablas resumen
+            refreshed = refresh_summary_tables(cur, partitions)
+            conn.commit()
+            print(f"Tablas resumen actualizadas: {refreshed} particiones (día, idioma).")
+        else:
+            refresh_views(conn, cur, concurrently=mode == REFRESH_MODE_CONCURRENT)
 
     except (Exception, psycopg2.Error) as error:
         print(f"Error al refrescar vistas materializadas: {error}")
@@ -408,71 +882,424 @@ def refresh_materialized_views():
             cur.close()
             conn.close()
 
-def run_etl():
-    start_date_str = "2023-12-26"
-    end_date_str = "2024-01-01"
-    languages_to_extract = ["en", "es"]
-    exclude_bots = True
-    rank_by_views = 5000
-    worker_id = "local-dev-worker"
+def apply_fact_retention(keep_months: int = FACT_RETENTION_MONTHS, drop: bool = FACT_RETENTION_DROP) -> List[FactPartition]:
+    # Desconecta (o borra) las particiones de fact_pageviews_daily fuera de la retención
+    if keep_months <= 0:
+        return []
+    conn = get_db_connection()
+    if conn is None:
+        raise Exception("Fallo al conectar a la base de datos para aplicar la retención.")
+    try:
+        cur = conn.cursor()
+        expired = detach_old_partitions(cur, keep_months, datetime.now().date(), drop)
+        if expired:
+            # Las tablas resumen no se recalculan para días fuera de la retención
+            delete_summary_before(cur, max(partition.end for partition in expired))
+            delete_serving_before(cur, max(partition.end for partition in expired))
+        conn.commit()
+        if expired:
+            action = 'borradas' if drop else 'desconectadas (archivo)'
+            print(f"Retención de {keep_months} meses: particiones {action}: {', '.join(partition.name for partition in expired)}.")
+        return expired
+    except (Exception, psycopg2.Error) as error:
+        print(f"Error al aplicar la retención de fact_pageviews_daily: {error}")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            cur.close()
+            conn.close()
+
+def fetch_rolling_state(pages: pd.DataFrame) -> pd.DataFrame:
+    # Historial persistido sólo de las páginas pedidas (clave primaria de etl_rolling_state)
+    conn = get_db_connection()
+    if conn is None:
+        raise Exception("Fallo al conectar a la base de datos para leer el estado móvil.")
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT s.language, s.title_normalized, h.day, h.views_total
+            FROM unnest(%s::text[], %s::text[]) AS k(language, title_normalized)
+            JOIN etl_rolling_state s ON s.language = k.language AND s.title_normalized = k.title_normalized
+            CROSS JOIN LATERAL unnest(s.days, s.views) AS h(day, views_total);
+        """, (pages['language'].tolist(), pages['title_normalized'].tolist()))
+        history = pd.DataFrame(cur.fetchall(), columns=STATE_COLUMNS)
+        conn.commit()
+        print(f"Estado móvil: {len(history)} observaciones leídas para {len(pages)} páginas.")
+        return history
+    except (Exception, psycopg2.Error) as error:
+        print(f"Error al leer el estado móvil: {error}")
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+        conn.close()
+
+def load_rolling_state() -> RollingState:
+    # Con ETL_ROLLING_STATE_PATH se usa un archivo local (desarrollo); si no, la tabla
+    # etl_rolling_state, leída bajo demanda sólo para las páginas extraídas
+    state_path = os.getenv('ETL_ROLLING_STATE_PATH')
+    if state_path:
+        return RollingState.load(state_path)
+    return RollingState(loader=fetch_rolling_state)
+
+def save_rolling_state(state: RollingState, pages: pd.DataFrame):
+    state_path = os.getenv('ETL_ROLLING_STATE_PATH')
+    if state_path:
+        state.save(state_path)
+        return
+
+    # Sólo se reescriben las páginas tocadas por la ejecución: O(páginas del día)
+    history = state.history_for(pages)
+    if history.empty:
+        return
+    history = history.sort_values(by=STATE_KEYS + ['day'])
+    history['day'] = history['day'].dt.date
+    per_page = history.groupby(STATE_KEYS, sort=False, observed=True).agg(
+        days=('day', list),
+        views=('views_total', lambda values: [int(value) for value in values])
+    ).reset_index()
+
+    conn = get_db_connection()
+    if conn is None:
+        raise Exception("Fallo al conectar a la base de datos para guardar el estado móvil.")
+    try:
+        cur = conn.cursor()
+        extras.execute_values(
+            cur,
+            """
+                INSERT INTO etl_rolling_state (language, title_normalized, days, views)
+                VALUES %s
+                ON CONFLICT (language, title_normalized) DO UPDATE SET
+                    days = EXCLUDED.days,
+                    views = EXCLUDED.views,
+                    updated_at = NOW();
+            """,
+            per_page[['language', 'title_normalized', 'days', 'views']].values.tolist(),
+            template="(%s, %s, %s::date[], %s::bigint[])",
+            page_size=STATE_BATCH_SIZE
+        )
+        conn.commit()
+        print(f"Estado móvil guardado para {len(per_page)} páginas.")
+    except (Exception, psycopg2.Error) as error:
+        print(f"Error al guardar el estado móvil: {error}")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            cur.close()
+            conn.close()
+
+def prepare_rolling_state(
+    languages: List[str],
+    incremental: bool,
+    start_day: date,
+    resume_day: Optional[date]
+) -> Tuple[Optional[RollingState], pd.DataFrame]:
+    # Incremental: estado persistido. Al reanudar un job, los días ya cargados se leen de
+    # fact_pageviews_daily como historial: las ventanas móviles de los días pendientes son
+    # las mismas que con la ventana completa. Devuelve también las páginas de ese historial
+    rolling_state = load_rolling_state() if incremental else None
+    resumed_pages = pd.DataFrame(columns=STATE_KEYS)
+    if resume_day is not None and resume_day > start_day:
+        history = load_resume_history(languages, start_day, resume_day)
+        print(f"Reanudación: {len(history)} observaciones ya cargadas antes de {resume_day} como historial.")
+        if rolling_state is None:
+            rolling_state = RollingState()
+        if not history.empty:
+            rolling_state.update(history)
+            resumed_pages = history[STATE_KEYS].drop_duplicates()
+    return rolling_state, resumed_pages
+
+def run_etl(
+    start_date_str: str = "2023-12-26",
+    end_date_str: str = "2024-01-01",
+    languages_to_extract: Optional[List[str]] = None,
+    exclude_bots: bool = True,
+    rank_by_views: int = 5000,
+    worker_id: str = "local-dev-worker",
+    incremental: bool = False,
+    streaming: bool = False,
+    resume_job_id: Optional[str] = None,
+    extract_mode: str = EXTRACT_MODE,
+    claimed_job: Optional[ClaimedJob] = None,
+    lookback_days: int = 0,
+    window_mode: str = WINDOW_MODE
+):
+    # En modo incremental basta con extraer los días nuevos: las ventanas móviles se
+    # completan con el estado persistido (últimas 28 observaciones de cada página).
+    # Con resume_job_id se reanuda un job con sus parámetros originales: los shards
+    # (día, idioma) ya cargados se saltan y la extracción empieza en el primer día pendiente.
+    # claimed_job es un job reclamado de la cola por worker.py; se ejecuta igual que uno reanudado.
+    # lookback_days: días previos a start_date que se extraen sólo como historial de las ventanas
+    # móviles; únicamente se escriben los días del rango (tramos de backfill.py).
+    # window_mode: 'rows' o 'calendar' (ETL_WINDOW_MODE); se guarda en los parámetros del job
+    if languages_to_extract is None:
+        languages_to_extract = ["en", "es"]
+    if window_mode not in WINDOW_MODES:
+        raise ValueError(f"Modo de ventana no soportado: {window_mode}. Opciones: {WINDOW_MODES}")
     job_id = None
+    extractor = None
+    metrics = RunMetrics(db_round_trips)
+    job_options = {
+        'rank_by_views': rank_by_views,
+        'exclude_automated_traffic': exclude_bots,
+        'incremental': incremental,
+        'streaming': streaming,
+        'extract_mode': extract_mode,
+        'lookback_days': lookback_days,
+        'window_mode': window_mode,
+    }
+
+    job_params = None
+    if claimed_job is not None:
+        # Los jobs de la API sólo traen fechas e idiomas: el resto de opciones son las del
+        # worker y se guardan en params para que un reintento use las mismas
+        job_id = claimed_job.job_id
+        _job_leases[job_id] = (worker_id, claimed_job.attempts)
+        job_params = {**job_options, **claimed_job.params}
+        merge_etl_job_params(job_id, job_params)
+    elif resume_job_id:
+        job_params = resume_etl_job(resume_job_id, worker_id)
+        if job_params is None:
+            print(f"Fallo crítico: No se pudo reanudar el Job {resume_job_id}, abortando ETL.")
+            sys.exit(1)
+        job_id = resume_job_id
 
-    job_id = register_etl_job_start(start_date_str, end_date_str, languages_to_extract, worker_id)
-    if not job_id:
-        print("Fallo crítico: No se pudo registrar el Job, abortando ETL.")
-        sys.exit(1)
+    if job_params is not None:
+        start_date_str = job_params.get('start_date', start_date_str)
+        end_date_str = job_params.get('end_date', end_date_str)
+        languages_to_extract = job_params.get('languages', languages_to_extract)
+        rank_by_views = job_params.get('rank_by_views', rank_by_views)
+        exclude_bots = job_params.get('exclude_automated_traffic', exclude_bots)
+        incremental = job_params.get('incremental', incremental)
+        streaming = job_params.get('streaming', streaming)
+        extract_mode = job_params.get('extract_mode', EXTRACT_MODE_PLATFORM)
+        lookback_days = job_params.get('lookback_days', 0)
+        window_mode = job_params.get('window_mode', WINDOW_MODE_ROWS)
+    else:
+        job_id = register_etl_job_start(start_date_str, end_date_str, languages_to_extract, worker_id, job_options)
+        if not job_id:
+            print("Fallo crítico: No se pudo registrar el Job, abortando ETL.")
+            sys.exit(1)
 
     try:
         start_date_dt = datetime.strptime(start_date_str, "%Y-%m-%d")
         end_date_dt = datetime.strptime(end_date_str, "%Y-%m-%d")
-        update_etl_job_status(job_id, 'EXTRAYENDO', 'Conectando a BigQuery y ejecutando consulta de extracción.')
-        bq_client = get_bigquery_client()
-        extracted_data = extract_pageviews(
-            bq_client,
-            start_date_dt,
-            end_date_dt,
-            languages_to_extract,
-            rank_by_views,
-            exclude_bots
+        plan = plan_resume(
+            job_shards(start_date_dt.date(), end_date_dt.date(), languages_to_extract),
+            load_job_progress(job_id) if job_params is not None else {}
         )
+        # Los shards cargados en un intento anterior sólo necesitan el refresco de vistas
+        loaded_partitions = set(plan.to_refresh)
+        rows_processed_count = 0
+        if job_params is not None:
+            print(
+                f"Reanudación: {len(plan.completed)} shards completados, {len(plan.to_refresh)} cargados "
+                f"y {len(plan.to_load)} pendientes de carga."
+            )
 
-        rows_processed_count = len(extracted_data)
-        update_etl_job_status(
-            job_id, 
-            'EXTRACCION_COMPLETADA', 
-            f'Extracción completada. Filas extraídas: {rows_processed_count}.'
-        )
+        if plan.to_load:
+            extract_start_dt = datetime.combine(plan.resume_day - timedelta(days=lookback_days), datetime.min.time())
+            # Con lookback_days el historial de los días pendientes se extrae con ellos: no se lee
+            # el ya cargado en fact_pageviews_daily
+            history_start_day = plan.resume_day if lookback_days else start_date_dt.date()
+            # Origen de las ventanas por calendario, común a todas las particiones y lotes. En modo
+            # incremental el historial viene del estado: el origen es el primer día ya cargado
+            calendar_start = extract_start_dt.date() if lookback_days else start_date_dt.date()
+            if incremental and window_mode == WINDOW_MODE_CALENDAR:
+                calendar_start = load_first_loaded_day(languages_to_extract, calendar_start) or calendar_start
+            update_etl_job_status(job_id, 'EXTRAYENDO', 'Conectando a BigQuery y ejecutando consulta de extracción.')
+            bq_client = get_bigquery_client()
+            extractor = new_extractor(bq_client, STREAM_PAGE_SIZE if streaming else None)
+            if streaming:
+                # Extracción por páginas, repartida por (language, title_normalized); cada partición
+                # se transforma y se carga por separado con memoria acotada
+                with metrics.stage('rolling_state'):
+                    rolling_state, resumed_pages = prepare_rolling_state(
+                        languages_to_extract, incremental, history_start_day, plan.resume_day
+                    )
+
+                def transform_partition(extracted: pd.DataFrame) -> pd.DataFrame:
+                    with metrics.stage('transform') as stage:
+                        stage['rows_in'] = len(extracted)
+                        transformed = transform_data_parallel(
+                            extracted, TRANSFORM_WORKERS, window_mode=window_mode,
+                            rolling_state=rolling_state, calendar_start=calendar_start
+                        )
+                        stage['rows_out'] = len(transformed)
+                    return transformed
+
+                # Candidatos de las listas de servicio: el Top-K y el trending de cada día se
+                # completan al unir los de todas las particiones
+                serving_candidates = []
+
+                def load_partition(transformed: pd.DataFrame):
+                    # Cada partición trae páginas de todos los días: el progreso se registra al final
+                    pending = rows_in_shards(transformed, plan.to_load)
+                    loaded_partitions.update(load_data_to_postgres(pending, metrics=metrics, serving_lists=False))
+                    if VIEW_REFRESH_MODE == REFRESH_MODE_SERVING:
+                        serving_candidates.append((top_n_rows(pending, SERVING_TOP_K), trending_rows(pending)))
+                    if incremental:
+                        with metrics.stage('rolling_state'):
+                            save_rolling_state(rolling_state, transformed)
+
+                batches = iter_pageview_batches(
+                    bq_client,
+                    extract_start_dt,
+                    end_date_dt,
+                    languages_to_extract,
+                    rank_by_views,
+                    exclude_bots,
+                    extractor=extractor,
+                    extract_mode=extract_mode
+                )
+                update_etl_job_status(job_id, 'TRANSFORMANDO', 'Extracción, transformación y carga en streaming por particiones.')
+                stream_stats = run_streaming_pipeline(
+                    metrics.iter_stage('extract', batches),
+                    transform_partition,
+                    load_partition,
+                    n_partitions=STREAM_PARTITIONS,
+                    memory_limit_mb=STREAM_MEMORY_MB,
+                    spill_dir=STREAM_SPILL_DIR
+                )
+                metrics.add(
+                    'extract',
+                    bytes_scanned=extractor.processed_bytes,
+                    bytes_downloaded=extractor.downloaded_bytes
+                )
+                rows_processed_count = stream_stats['rows_extracted']
+                merge_etl_job_params(job_id, extract_cost_params(extractor))
+                update_etl_job_status(
+                    job_id,
+                    'TRANSFORMACION_COMPLETADA',
+                    f"Streaming completado: {stream_stats['partitions']} particiones, "
+                    f"{stream_stats['rows_loaded']} filas cargadas, pico de memoria {stream_stats['peak_rss_mb']} MB. "
+                    f"{describe_shards(extractor.stats)}"
+                )
+                if rows_processed_count == 0:
+                    print("\nNo se extrajeron datos para los parámetros proporcionados. No hay datos para transformar.")
+                    save_etl_job_metrics(job_id, metrics, success=True)
+                    # Sin un estado final, un worker tomaría el job por abandonado al vencer su lease
+                    update_etl_job_status(job_id, 'COMPLETADO', 'Job ETL sin datos para los parámetros indicados.', rows_processed=0)
+                    return
+                if incremental and not resumed_pages.empty:
+                    with metrics.stage('rolling_state'):
+                        save_rolling_state(rolling_state, resumed_pages)
+                if VIEW_REFRESH_MODE == REFRESH_MODE_SERVING:
+                    with metrics.stage('load_serving'):
+                        save_serving_lists(
+                            top_n_rows(concat_frames(top_n for top_n, _ in serving_candidates), SERVING_TOP_K),
+                            concat_frames(trending for _, trending in serving_candidates),
+                            plan.to_load
+                        )
+                save_job_progress(job_id, plan.to_load, SHARD_STAGE_LOADED)
+            else:
+                with metrics.stage('extract') as stage:
+                    extracted_data = extract_pageviews(
+                        bq_client,
+                        extract_start_dt,
+                        end_date_dt,
+                        languages_to_extract,
+                        rank_by_views,
+                        exclude_bots,
+                        extractor=extractor,
+                        extract_mode=extract_mode
+                    )
+                    stage['rows_out'] = len(extracted_data)
+                    stage['bytes_in_memory'] = int(extracted_data.memory_usage(deep=True).sum())
+                    stage['bytes_scanned'] = extractor.processed_bytes
+                    stage['bytes_downloaded'] = extractor.downloaded_bytes
 
-        if extracted_data.empty:
-            print("\nNo se extrajeron datos para los parámetros proporcionados. No hay datos para transformar.")
-            return
+                rows_processed_count = len(extracted_data)
+                merge_etl_job_params(job_id, extract_cost_params(extractor))
+                update_etl_job_status(
+                    job_id, 
+                    'EXTRACCION_COMPLETADA', 
+                    f'Extracción completada. Filas extraídas: {rows_processed_count}. {describe_shards(extractor.stats)}'
+                )
 
-        update_etl_job_status(job_id, 'TRANSFORMANDO', 'Iniciando cálculos de medias móviles y tendencias (Trend Score).')
-        transformed_data = transform_data(extracted_data)
+                if extracted_data.empty:
+                    print("\nNo se extrajeron datos para los parámetros proporcionados. No hay datos para transformar.")
+                    save_etl_job_metrics(job_id, metrics, success=True)
+                    # Sin un estado final, un worker tomaría el job por abandonado al vencer su lease
+                    update_etl_job_status(job_id, 'COMPLETADO', 'Job ETL sin datos para los parámetros indicados.', rows_processed=0)
+                    return
+
+                update_etl_job_status(job_id, 'TRANSFORMANDO', 'Iniciando cálculos de medias móviles y tendencias (Trend Score).')
+                with metrics.stage('rolling_state'):
+                    rolling_state, resumed_pages = prepare_rolling_state(
+                        languages_to_extract, incremental, history_start_day, plan.resume_day
+                    )
+                with metrics.stage('transform') as stage:
+                    stage['rows_in'] = len(extracted_data)
+                    transformed_data = transform_data_parallel(
+                        extracted_data, TRANSFORM_WORKERS, window_mode=window_mode,
+                        rolling_state=rolling_state, calendar_start=calendar_start
+                    )
+                    stage['rows_out'] = len(transformed_data)
+                    stage['bytes_in_memory'] = int(transformed_data.memory_usage(deep=True).sum())
+                print(
+                    f"Memoria por fila: extracción {bytes_per_row(extracted_data)} B, "
+                    f"transformación {bytes_per_row(transformed_data)} B."
+                )
+                update_etl_job_status(
+                    job_id, 
+                    'TRANSFORMACION_COMPLETADA', 
+                    f'Transformación completada. Filas listas para carga: {rows_processed_count}.'
+                )
+                update_etl_job_status(job_id, 'CARGANDO', 'Cargando datos en PostgreSQL (UPSERT de dim_page y fact_pageviews_daily).')
+                # Un bloque de días por transacción; un fallo sólo obliga a repetir los bloques sin confirmar
+                for checkpoint_shards, checkpoint_data in iter_checkpoints(transformed_data, plan.to_load, CHECKPOINT_DAYS):
+                    if checkpoint_data.empty:
+                        save_job_progress(job_id, checkpoint_shards, SHARD_STAGE_LOADED)
+                        continue
+                    loaded_partitions.update(load_data_to_postgres(
+                        checkpoint_data, metrics=metrics, job_id=job_id, shards=checkpoint_shards
+                    ))
+                if incremental:
+                    state_pages = transformed_data if resumed_pages.empty else pd.concat(
+                        [transformed_data[STATE_KEYS], resumed_pages], ignore_index=True
+                    )
+                    with metrics.stage('rolling_state'):
+                        save_rolling_state(rolling_state, state_pages)
+        update_etl_job_status(job_id, 'CARGA_COMPLETADA', 'Carga de datos finalizada. Iniciando refresco de vistas materializadas.')
+        with metrics.stage('retention'):
+            apply_fact_retention()
         update_etl_job_status(
-            job_id, 
-            'TRANSFORMACION_COMPLETADA', 
-            f'Transformación completada. Filas listas para carga: {rows_processed_count}.'
+            job_id,
+            'REFRESCANDO_VISTAS',
+            f'Refrescando vistas para Top-N y Trending (modo {VIEW_REFRESH_MODE}, {len(loaded_partitions)} particiones cargadas).'
         )
-        update_etl_job_status(job_id, 'CARGANDO', 'Cargando datos en PostgreSQL (UPSERT de dim_page y fact_pageviews_daily).')
-        load_data_to_postgres(transformed_data)
-        update_etl_job_status(job_id, 'CARGA_COMPLETADA', 'Carga de datos finalizada. Iniciando refresco de vistas materializadas.')
-        update_etl_job_status(job_id, 'REFRESCANDO_VISTAS', 'Refrescando vistas para Top-N y Trending.')
-        refresh_materialized_views()
+        with metrics.stage('refresh_views') as stage:
+            stage['rows_in'] = len(loaded_partitions)
+            refresh_materialized_views(loaded_partitions)
+        save_job_progress(job_id, plan.to_load | plan.to_refresh, SHARD_STAGE_COMPLETED)
 
     except Exception as e:
         import traceback
         print(f"El proceso falló con una excepción:")
         traceback.print_exc()
+        if job_id and extractor is not None:
+            merge_etl_job_params(job_id, extract_cost_params(extractor))
         if job_id:
+            save_etl_job_metrics(job_id, metrics, success=False)
+        if claimed_job is not None:
+            # Vuelve a la cola para otro intento, que continúa desde el último shard confirmado
+            release_claimed_etl_job(job_id, f"El proceso falló con una excepción: {e}")
+        elif job_id:
             update_etl_job_status(
                 job_id=job_id,
                 status='FALLIDO',
                 message='Proceso terminado con error fatal.',
                 error_message="El proceso falló con una excepción"
             )
+            print(f"Los shards confirmados se conservan; para reanudar: ETL_RESUME_JOB_ID={job_id}")
         exit(1)
     if job_id:
+        save_etl_job_metrics(job_id, metrics, success=True)
         update_etl_job_status(
             job_id=job_id,
             status='COMPLETADO',
@@ -481,6 +1308,9 @@ def run_etl():
         )
         print(f"Proceso ETL completado con éxito. Job ID: {job_id}")
 
-
 if __name__ == "__main__":
-    run_etl()
+    run_etl(
+        incremental=os.getenv('ETL_INCREMENTAL', 'false').lower() == 'true',
+        streaming=os.getenv('ETL_STREAMING', 'false').lower() == 'true',
+        resume_job_id=os.getenv('ETL_RESUME_JOB_ID') or None
+    )
@@ -0,0 +1,149 @@
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+from rolling_engine import WINDOW_MODE_CALENDAR, WINDOW_MODE_ROWS
+from rolling_state import RollingState, STATE_COLUMNS
+from streaming_etl import partition_numbers, key_partition_numbers
+from title_cache import TitleCache, DEFAULT_TITLE_CACHE_SIZE
+from frame_dtypes import concat_frames
+from transformation_etl import transform_data, resolve_titles, get_default_title_cache
+
+OUTPUT_ORDER = ['language', 'title_normalized', 'day']
+AGGREGATION_ORDER = ['day', 'language', 'title_normalized']
+PARTITIONS_PER_WORKER = 4
+SHARED_MEMORY_DIR = '/dev/shm'
+
+_worker_title_cache: Optional[TitleCache] = None
+
+
+def _exchange_dir() -> str:
+    # /dev/shm es memoria compartida en Linux: los archivos Arrow IPC no tocan el disco
+    base = SHARED_MEMORY_DIR if os.path.isdir(SHARED_MEMORY_DIR) else None
+    return tempfile.mkdtemp(prefix='etl_transform_', dir=base)
+
+
+def _write_ipc(df: pd.DataFrame, path: str):
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _read_ipc(path: str, dtypes: Optional[dict] = None) -> pd.DataFrame:
+    # Se restauran los dtypes originales: Arrow convierte las columnas object en cadenas
+    # de Arrow y la normalización de títulos se comporta distinto con ellas
+    with pa.memory_map(path, 'r') as source:
+        df = pa.ipc.open_file(source).read_all().to_pandas()
+    return df.astype(dtypes) if dtypes else df
+
+
+def _transform_partition(
+    input_path: str,
+    output_path: str,
+    input_dtypes: dict,
+    window_mode: str,
+    history_path: Optional[str],
+    history_dtypes: Optional[dict],
+    calendar_start=None
+) -> Tuple[int, dict]:
+    # Cada proceso usa su propia caché de títulos en memoria (sin SQLite compartido)
+    global _worker_title_cache
+    if _worker_title_cache is None:
+        _worker_title_cache = TitleCache(max_size=DEFAULT_TITLE_CACHE_SIZE)
+
+    extracted = _read_ipc(input_path, input_dtypes)
+    rolling_state = RollingState(_read_ipc(history_path, history_dtypes)) if history_path else None
+    transformed = transform_data(
+        extracted, title_cache=_worker_title_cache, window_mode=window_mode, rolling_state=rolling_state,
+        calendar_start=calendar_start
+    )
+    _write_ipc(transformed, output_path)
+    return len(transformed), transformed.dtypes.to_dict()
+
+
+def _restore_serial_order(df: pd.DataFrame) -> pd.DataFrame:
+    # transform_data devuelve las filas ordenadas por página y día, con el índice que tenían
+    # tras la agregación (ordenada por día, idioma y título); se reproduce lo mismo
+    df = df.sort_values(by=AGGREGATION_ORDER).reset_index(drop=True)
+    return df.sort_values(by=OUTPUT_ORDER)
+
+
+def transform_data_parallel(
+    df: pd.DataFrame,
+    workers: int,
+    window_mode: str = WINDOW_MODE_ROWS,
+    rolling_state: Optional[RollingState] = None,
+    n_partitions: Optional[int] = None,
+    calendar_start=None
+) -> pd.DataFrame:
+    """
+    transform_data repartido por hash de (language, title_normalized) entre procesos.
+    Las particiones viajan como Arrow IPC en memoria compartida. El resultado es
+    idéntico al de la ejecución en serie. En modo 'calendar', calendar_start (por
+    defecto, el primer día del lote) es el origen de todas las particiones.
+    """
+    if calendar_start is None and window_mode == WINDOW_MODE_CALENDAR and not df.empty:
+        calendar_start = pd.to_datetime(df['day']).min()
+    if workers <= 1 or df.empty:
+        return transform_data(df, window_mode=window_mode, rolling_state=rolling_state, calendar_start=calendar_start)
+
+    n_partitions = n_partitions or workers * PARTITIONS_PER_WORKER
+    partitions = partition_numbers(df, n_partitions)
+    if rolling_state is not None:
+        # Sólo se lee el estado de las páginas del lote; mismo corte que en serie: el
+        # historial anterior al primer día de todo el lote
+        titles_normalized, _ = resolve_titles(df['title'], get_default_title_cache(), df['language'])
+        rolling_state.load_pages(pd.DataFrame({
+            'language': df['language'].to_numpy(dtype=object),
+            'title_normalized': titles_normalized.to_numpy(dtype=object),
+        }))
+        history = rolling_state.history
+        history = history[history['day'] < pd.to_datetime(df['day']).min()]
+        history_partitions = key_partition_numbers(history['language'], history['title_normalized'], n_partitions)
+    exchange_dir = _exchange_dir()
+
+    try:
+        tasks = []
+        for partition, extracted in df.groupby(partitions, sort=True):
+            input_path = os.path.join(exchange_dir, f'in-{partition:04d}.arrow')
+            output_path = os.path.join(exchange_dir, f'out-{partition:04d}.arrow')
+            _write_ipc(extracted, input_path)
+
+            history_path = None
+            if rolling_state is not None:
+                history_path = os.path.join(exchange_dir, f'state-{partition:04d}.arrow')
+                _write_ipc(history[history_partitions == partition], history_path)
+            tasks.append((input_path, output_path, history_path))
+
+        input_dtypes = df.dtypes.to_dict()
+        history_dtypes = history.dtypes.to_dict() if rolling_state is not None else None
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(
+                    _transform_partition, input_path, output_path, input_dtypes,
+                    window_mode, history_path, history_dtypes, calendar_start
+                )
+                for input_path, output_path, history_path in tasks
+            ]
+            outcomes = [future.result() for future in futures]
+
+        rows = sum(rows for rows, _ in outcomes)
+        results = [
+            _read_ipc(output_path, output_dtypes)
+            for (_, output_path, _), (_, output_dtypes) in zip(tasks, outcomes)
+        ]
+    finally:
+        shutil.rmtree(exchange_dir, ignore_errors=True)
+
+    transformed = _restore_serial_order(concat_frames(results))
+    print(f"Transformación paralela: {len(tasks)} particiones, {workers} procesos, {rows} filas.")
+
+    if rolling_state is not None:
+        rolling_state.update(transformed[STATE_COLUMNS])
+    return transformed
@@ -0,0 +1,225 @@
+from datetime import datetime, timedelta, timezone
+from typing import List, NamedTuple, Optional
+
+from google.cloud import bigquery
+
+from transformation_etl import MAX_TITLE_LENGTH, TITLE_NORMALIZATION_REPLACEMENTS, UNKNOWN_PAGE_TITLE
+
+MOBILE_WIKI_SUFFIX = '.m'
+
+# Tráfico automatizado/no editorial excluido con exclude_automated_traffic
+EXCLUDED_TITLES = ['Main_Page', 'Special:Search', '404_error_page', 'Portal:Current_events']
+EXCLUDED_TITLE_PREFIXES = ['File:', 'MediaWiki:', 'User:', 'Wikipedia:', 'Talk:', 'Template:']
+
+# 'platform': filas por (día, idioma, plataforma, título) y top-N por plataforma
+# 'pushdown': BigQuery suma escritorio + móvil, normaliza el título y calcula el top-N por
+# (día, idioma) sobre el título normalizado; sólo se descargan esas filas
+EXTRACT_MODE_PLATFORM = 'platform'
+EXTRACT_MODE_PUSHDOWN = 'pushdown'
+EXTRACT_MODES = (EXTRACT_MODE_PLATFORM, EXTRACT_MODE_PUSHDOWN)
+
+class ExtractBudgetExceeded(Exception):
+    pass
+
+
+class PageviewsQuery(NamedTuple):
+    sql: str
+    parameters: list
+
+    def job_config(self, dry_run: bool = False, maximum_bytes_billed: Optional[int] = None) -> bigquery.QueryJobConfig:
+        config = bigquery.QueryJobConfig(query_parameters=self.parameters)
+        if dry_run:
+            config.dry_run = True
+            config.use_query_cache = False
+        if maximum_bytes_billed:
+            config.maximum_bytes_billed = maximum_bytes_billed
+        return config
+
+
+def wiki_codes(languages: List[str]) -> List[str]:
+    # 'es' -> Wikipedia de escritorio ('es') y móvil ('es.m'); otros proyectos (es.b, es.d...) quedan fuera
+    codes = []
+    for language in languages:
+        codes.extend([language, f'{language}{MOBILE_WIKI_SUFFIX}'])
+    return codes
+
+
+def sql_string_literal(value: str) -> str:
+    # Literal de cadena de BigQuery; los caracteres no imprimibles o no ASCII van como \uXXXX
+    escaped = []
+    for char in value:
+        if char in ("\\", "'"):
+            escaped.append(f"\\{char}")
+        elif ' ' <= char <= '~':
+            escaped.append(char)
+        else:
+            escaped.append(f"\\u{ord(char):04x}")
+    return f"'{''.join(escaped)}'"
+
+
+def title_normalized_sql(column: str = 'title') -> str:
+    """
+    Equivalente en SQL de build_title_normalized. NORMALIZE(..., NFD) separa las marcas
+    diacríticas, que el reemplazo de "todo lo que no sea a-z, 0-9 o espacio" elimina
+    junto con el resto de caracteres. Los patrones no usan \\s ni otras clases que RE2
+    (BigQuery) y re de Python interpreten distinto: los espacios de Unicode van como
+    caracteres literales (WHITESPACE_CHARACTERS).
+    """
+    expression = f"NORMALIZE(LOWER({column}), NFD)"
+    for pattern, replacement in TITLE_NORMALIZATION_REPLACEMENTS:
+        expression = f"REGEXP_REPLACE({expression}, {sql_string_literal(pattern)}, {sql_string_literal(replacement)})"
+    expression = f"NULLIF(TRIM({expression}, '_'), '')"
+    return f"SUBSTR(COALESCE({expression}, {sql_string_literal(UNKNOWN_PAGE_TITLE)}), 1, {MAX_TITLE_LENGTH})"
+
+
+def _utc_day_start(day: datetime) -> datetime:
+    return datetime(day.year, day.month, day.day, tzinfo=timezone.utc)
+
+
+def build_pageviews_query(
+    table_id: str,
+    start_date: datetime,
+    end_date: datetime,
+    languages: List[str],
+    rank_by_views: int,
+    exclude_automated_traffic: bool = True,
+    mode: str = EXTRACT_MODE_PLATFORM
+) -> PageviewsQuery:
+    """
+    Consulta de extracción para una tabla pageviews_{año}. El rango sobre datehour
+    (columna de partición) es un predicado directo [inicio, fin + 1 día), de modo
+    que BigQuery sólo lee las particiones del rango. Los valores van parametrizados.
+    """
+    if mode not in EXTRACT_MODES:
+        raise ValueError(f"Modo de extracción no soportado: {mode} (opciones: {', '.join(EXTRACT_MODES)})")
+
+    parameters = [
+        bigquery.ScalarQueryParameter('start_ts', 'TIMESTAMP', _utc_day_start(start_date)),
+        bigquery.ScalarQueryParameter('end_ts', 'TIMESTAMP', _utc_day_start(end_date) + timedelta(days=1)),
+        bigquery.ArrayQueryParameter('wikis', 'STRING', wiki_codes(languages)),
+    ]
+
+    automated_traffic_filter = ""
+    if exclude_automated_traffic:
+        automated_traffic_filter = """
+            AND title NOT IN UNNEST(@excluded_titles)
+            AND NOT EXISTS (
+                SELECT 1 FROM UNNEST(@excluded_prefixes) AS prefix WHERE STARTS_WITH(title, prefix)
+            )
+        """
+        parameters.extend([
+            bigquery.ArrayQueryParameter('excluded_titles', 'STRING', EXCLUDED_TITLES),
+            bigquery.ArrayQueryParameter('excluded_prefixes', 'STRING', EXCLUDED_TITLE_PREFIXES),
+        ])
+
+    aggregated_views = f"""
+        SELECT
+            DATE(datehour) AS day,
+            SPLIT(wiki, '.')[OFFSET(0)] AS language,
+            IF(ENDS_WITH(wiki, '{MOBILE_WIKI_SUFFIX}'), 'mobile', 'desktop') AS platform_type,
+            title,
+            SUM(views) AS views
+        FROM
+            `{table_id}`
+        WHERE
+            datehour >= @start_ts
+            AND datehour < @end_ts
+            AND wiki IN UNNEST(@wikis)
+            {automated_traffic_filter}
+        GROUP BY 1, 2, 3, 4
+    """
+
+    if mode == EXTRACT_MODE_PUSHDOWN:
+        return PageviewsQuery(_pushdown_sql(aggregated_views, parameters, rank_by_views), parameters)
+
+    if rank_by_views > 0:
+        parameters.append(bigquery.ScalarQueryParameter('rank_by_views', 'INT64', rank_by_views))
+        sql = f"""
+            WITH AggregatedViews AS ({aggregated_views}),
+            RankedViews AS (
+                SELECT
+                    *,
+                    ROW_NUMBER() OVER (
+                        PARTITION BY day, language, platform_type
+                        ORDER BY views DESC
+                    ) AS rank_by_views
+                FROM
+                    AggregatedViews
+            )
+            SELECT day, language, platform_type, title, views
+            FROM RankedViews
+            WHERE rank_by_views <= @rank_by_views
+            ORDER BY day, language, title, platform_type
+        """
+    else:
+        sql = f"""
+            {aggregated_views}
+            ORDER BY day, language, title, platform_type
+        """
+
+    return PageviewsQuery(sql, parameters)
+
+
+def _pushdown_sql(aggregated_views: str, parameters: list, rank_by_views: int) -> str:
+    """
+    Suma escritorio + móvil y agrupa por título normalizado antes del ranking, de modo
+    que el top-N es el de las páginas que ve la ETL. Se devuelve un título original por
+    grupo (el menor, igual que transform_data) y sin plataforma: el esquema coincide con
+    el del modo 'platform' sin platform_type, y la ETL vuelve a normalizar ese título.
+    La normalización se aplica sobre los títulos ya sumados por día, no por hora.
+    """
+    normalized_views = f"""
+        SELECT
+            day,
+            language,
+            {title_normalized_sql('title')} AS title_normalized,
+            MIN(title) AS title,
+            SUM(views) AS views
+        FROM
+            PlatformViews
+        GROUP BY 1, 2, 3
+    """
+    platform_views = f"""
+        SELECT day, language, title, SUM(views) AS views
+        FROM AggregatedViews
+        GROUP BY 1, 2, 3
+    """
+
+    if rank_by_views > 0:
+        parameters.append(bigquery.ScalarQueryParameter('rank_by_views', 'INT64', rank_by_views))
+        ranked_filter = "WHERE rank_by_views <= @rank_by_views"
+    else:
+        ranked_filter = ""
+    return f"""
+        WITH AggregatedViews AS ({aggregated_views}),
+        PlatformViews AS ({platform_views}),
+        NormalizedViews AS ({normalized_views}),
+        RankedViews AS (
+            SELECT
+                *,
+                ROW_NUMBER() OVER (
+                    PARTITION BY day, language
+                    ORDER BY views DESC, title_normalized
+                ) AS rank_by_views
+            FROM
+                NormalizedViews
+        )
+        SELECT day, language, title, views
+        FROM RankedViews
+        {ranked_filter}
+        ORDER BY day, language, title
+    """
+
+
+def estimate_query_bytes(client: bigquery.Client, query: PageviewsQuery) -> int:
+    # Dry run: BigQuery valida la consulta y devuelve los bytes que leería, sin costo
+    job = client.query(query.sql, job_config=query.job_config(dry_run=True))
+    return int(job.total_bytes_processed or 0)
+
+
+def check_extract_budget(estimated_bytes: int, budget_bytes: Optional[int]):
+    if budget_bytes and estimated_bytes > budget_bytes:
+        raise ExtractBudgetExceeded(
+            f"La extracción leería {estimated_bytes / 1024 ** 3:.2f} GB, por encima del presupuesto "
+            f"de {budget_bytes / 1024 ** 3:.2f} GB (ETL_EXTRACT_BUDGET_GB)."
+        )
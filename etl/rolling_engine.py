@@ -0,0 +1,204 @@
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence
+
+SHORT_WINDOW = 7
+LONG_WINDOW = 28
+
+# 'rows': ventanas por número de filas (comportamiento original)
+# 'calendar': ventanas por días de calendario; los días sin registro cuentan como 0 vistas
+WINDOW_MODE_ROWS = 'rows'
+WINDOW_MODE_CALENDAR = 'calendar'
+WINDOW_MODES = (WINDOW_MODE_ROWS, WINDOW_MODE_CALENDAR)
+
+# Con |vistas| por debajo de este límite, n * sum(x^2) de una ventana de 28 filas cabe en int64
+EXACT_INT_MAX_VALUE = 100_000_000
+
+
+def group_start_positions(df: pd.DataFrame, group_keys: Sequence[str]) -> np.ndarray:
+    # Para cada fila, posición de la primera fila de su grupo (el DataFrame debe venir ordenado por grupo)
+    n_rows = len(df)
+    if n_rows == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    is_start = np.zeros(n_rows, dtype=bool)
+    is_start[0] = True
+    for key in group_keys:
+        # Columnas de diccionario: se comparan los códigos enteros en lugar de las cadenas
+        column = df[key]
+        values = column.cat.codes.to_numpy() if isinstance(column.dtype, pd.CategoricalDtype) else column.to_numpy()
+        is_start[1:] |= values[1:] != values[:-1]
+
+    positions = np.arange(n_rows, dtype=np.int64)
+    return np.maximum.accumulate(np.where(is_start, positions, 0))
+
+
+def _window_sums(cumulative: np.ndarray, window_start: np.ndarray, window_end: np.ndarray) -> np.ndarray:
+    # cumulative[k] = suma de los primeros k valores; la ventana es [window_start, window_end]
+    return cumulative[window_end + 1] - cumulative[window_start]
+
+
+def _cumulative(values: np.ndarray) -> np.ndarray:
+    cumulative = np.zeros(len(values) + 1, dtype=values.dtype)
+    # En int64 la suma acumulada puede desbordar, pero la diferencia de una ventana sigue siendo exacta
+    with np.errstate(over='ignore'):
+        np.cumsum(values, out=cumulative[1:])
+    return cumulative
+
+
+def _exact_mean_std(values: np.ndarray, window_start: np.ndarray, window_end: np.ndarray, n_obs: np.ndarray):
+    # Sumas acumuladas enteras: ventanas constantes dan varianza 0 sin error de cancelación
+    # (los días faltantes valen 0, así que sólo cuentan en n_obs)
+    with np.errstate(over='ignore'):
+        sums = _window_sums(_cumulative(values), window_start, window_end)
+        sums_sq = _window_sums(_cumulative(values * values), window_start, window_end)
+        numerator = (n_obs * sums_sq - sums * sums).astype(np.float64)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = sums / n_obs
+        variance = numerator / (n_obs * (n_obs - 1))
+    return mean, variance
+
+
+def _two_pass_mean_std(values: np.ndarray, window_start: np.ndarray, window_end: np.ndarray, n_obs: np.ndarray):
+    # En coma flotante se evitan las sumas acumuladas globales: se suman los desplazamientos
+    # de la ventana (media y luego desviaciones respecto a la media, algoritmo de dos pasadas)
+    n_rows = window_end - window_start + 1
+    max_window = int(n_rows.max()) if len(n_rows) else 0
+    sums = np.zeros(len(values))
+    for lag in range(max_window):
+        rows = window_end - lag
+        valid = rows >= window_start
+        sums[valid] += values[rows[valid]]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mean = sums / n_obs
+
+    # Cada día faltante aporta (0 - media)^2
+    squared_deviations = (n_obs - n_rows) * mean ** 2
+    for lag in range(max_window):
+        rows = window_end - lag
+        valid = rows >= window_start
+        squared_deviations[valid] += (values[rows[valid]] - mean[valid]) ** 2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variance = squared_deviations / (n_obs - 1)
+    return mean, variance
+
+
+def _rolling_mean_std(
+    values: np.ndarray,
+    window_start: np.ndarray,
+    window_end: np.ndarray,
+    exact: bool,
+    n_obs: Optional[np.ndarray] = None
+):
+    if n_obs is None:
+        n_obs = window_end - window_start + 1
+    n_obs = n_obs.astype(np.int64)
+    if exact:
+        mean, variance = _exact_mean_std(values, window_start, window_end, n_obs)
+    else:
+        mean, variance = _two_pass_mean_std(values, window_start, window_end, n_obs)
+    std = np.sqrt(variance)
+    std[n_obs < 2] = np.nan
+    return mean, std
+
+
+def _day_numbers(days: pd.Series) -> np.ndarray:
+    return pd.to_datetime(days).to_numpy(dtype='datetime64[D]').astype(np.int64)
+
+
+def _calendar_windows(
+    day_numbers: np.ndarray,
+    group_start: np.ndarray,
+    window: int,
+    origins: np.ndarray
+):
+    # Inicio de ventana por búsqueda binaria sobre la clave compuesta (grupo, día): no se
+    # construye la matriz densa página x día. n_obs son los días de calendario de la ventana
+    # desde el origen de cada fila (antes del origen no hay datos, no 0 vistas).
+    n_rows = len(day_numbers)
+    positions = np.arange(n_rows, dtype=np.int64)
+    relative_days = day_numbers - (int(day_numbers.min()) if n_rows else 0)
+    span = (int(relative_days.max()) if n_rows else 0) + window + 1
+    group_number = np.cumsum(positions == group_start)
+    keys = group_number * span + relative_days
+    window_start = np.searchsorted(keys, keys - (window - 1), side='left')
+    n_obs = np.minimum(window, day_numbers - origins + 1)
+    return window_start, n_obs
+
+
+def _prepare_values(views: pd.Series):
+    if pd.api.types.is_integer_dtype(views.dtype) and not views.isna().any():
+        values = views.to_numpy(dtype=np.int64)
+        if len(values) == 0 or np.abs(values).max() < EXACT_INT_MAX_VALUE:
+            return values, True
+    return views.to_numpy(dtype=np.float64), False
+
+
+def grouped_rolling_metrics(
+    df: pd.DataFrame,
+    group_keys: Sequence[str] = ('language', 'title_normalized'),
+    value_column: str = 'views_total',
+    short_window: int = SHORT_WINDOW,
+    long_window: int = LONG_WINDOW,
+    window_mode: str = WINDOW_MODE_ROWS,
+    day_column: str = 'day',
+    calendar_start=None,
+) -> pd.DataFrame:
+    """
+    Calcula en una sola pasada sobre grupos contiguos las métricas móviles por fila:
+    avg_views_7d, avg_views_28d, rolling_std_28d (ddof=1) y variations.
+
+    En modo 'rows' equivale a groupby(group_keys)[value_column] con
+    rolling(window, min_periods=1) y shift(1). En modo 'calendar' las ventanas
+    abarcan días de calendario y los días sin registro cuentan como 0 vistas desde
+    calendar_start (obligatorio: el primer día de la ventana extraída), o desde el
+    primer día de la página si es anterior (historial del estado móvil). Así las
+    métricas de una página no dependen de qué otras páginas vienen en el DataFrame.
+    El DataFrame debe venir ordenado por group_keys y día.
+    """
+    if window_mode not in WINDOW_MODES:
+        raise ValueError(f"Modo de ventana no soportado: {window_mode}. Opciones: {WINDOW_MODES}")
+    if window_mode == WINDOW_MODE_CALENDAR and calendar_start is None:
+        raise ValueError("El modo de ventana 'calendar' requiere calendar_start (primer día de la ventana extraída).")
+
+    n_rows = len(df)
+    group_start = group_start_positions(df, group_keys)
+    positions = np.arange(n_rows, dtype=np.int64)
+    values, exact = _prepare_values(df[value_column])
+
+    current = df[value_column].to_numpy(dtype=np.float64)
+    previous = np.full(n_rows, np.nan)
+    has_previous = positions > group_start
+
+    if window_mode == WINDOW_MODE_CALENDAR and n_rows > 0:
+        day_numbers = _day_numbers(df[day_column])
+        origins = np.minimum(int(_day_numbers(pd.Series([calendar_start]))[0]), day_numbers[group_start])
+        short_start, short_obs = _calendar_windows(day_numbers, group_start, short_window, origins)
+        long_start, long_obs = _calendar_windows(day_numbers, group_start, long_window, origins)
+        # La variación sólo se calcula contra el día de calendario inmediatamente anterior;
+        # si ese día falta (0 vistas) la variación queda en 0, igual que una división por cero
+        previous_day = np.zeros(n_rows, dtype=bool)
+        previous_day[1:] = day_numbers[1:] - day_numbers[:-1] == 1
+        has_previous &= previous_day
+    else:
+        short_start = np.maximum(group_start, positions - short_window + 1)
+        long_start = np.maximum(group_start, positions - long_window + 1)
+        short_obs = long_obs = None
+
+    avg_short, _ = _rolling_mean_std(values, short_start, positions, exact, short_obs)
+    avg_long, std_long = _rolling_mean_std(values, long_start, positions, exact, long_obs)
+
+    previous[has_previous] = current[positions[has_previous] - 1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variations = ((current - previous) / previous) * 100
+    variations[~np.isfinite(variations)] = 0
+
+    return pd.DataFrame({
+        'avg_views_7d': avg_short,
+        'avg_views_28d': avg_long,
+        'rolling_std_28d': std_long,
+        'variations': variations,
+    }, index=df.index)
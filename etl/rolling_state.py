@@ -0,0 +1,117 @@
+import os
+from typing import Callable, Optional
+
+import pandas as pd
+
+from rolling_engine import LONG_WINDOW
+
+STATE_KEYS = ['language', 'title_normalized']
+STATE_COLUMNS = ['language', 'title_normalized', 'day', 'views_total']
+
+# La ventana de 28 días del día nuevo necesita las 27 observaciones previas; se guarda una
+# más para poder re-ejecutar el último día cargado sin perder historial
+STATE_HISTORY_ROWS = LONG_WINDOW
+
+
+class RollingState:
+    """
+    Estado móvil persistido por (language, title_normalized): las últimas 28
+    observaciones (día, vistas) de cada página. Con él, una ejecución diaria
+    calcula avg_views_7d/28d, variations y trend_score del día nuevo sin volver
+    a extraer ni transformar el mes anterior.
+
+    Con loader el historial se lee bajo demanda: la primera vez que se piden unas
+    páginas se cargan sólo esas, así que el costo es O(páginas tocadas) y no crece
+    con el total de páginas del estado persistido.
+    """
+
+    def __init__(
+        self,
+        history: Optional[pd.DataFrame] = None,
+        loader: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None
+    ):
+        self.loader = loader
+        self._loaded_keys = pd.DataFrame(columns=STATE_KEYS)
+        if history is None or history.empty:
+            history = pd.DataFrame({
+                'language': pd.Series(dtype=object),
+                'title_normalized': pd.Series(dtype=object),
+                'day': pd.Series(dtype='datetime64[ns]'),
+                'views_total': pd.Series(dtype='int64'),
+            })
+        self.history = self._normalize(history)
+
+    @staticmethod
+    def _normalize(history: pd.DataFrame) -> pd.DataFrame:
+        history = history[STATE_COLUMNS].copy()
+        history['day'] = pd.to_datetime(history['day'])
+        return history.sort_values(by=STATE_KEYS + ['day']).reset_index(drop=True)
+
+    def __len__(self) -> int:
+        return len(self.history)
+
+    def pages(self) -> int:
+        return len(self.history.drop_duplicates(subset=STATE_KEYS))
+
+    def load_pages(self, pages: pd.DataFrame):
+        # Lee con loader el historial de las páginas que aún no se han pedido
+        if self.loader is None or pages.empty:
+            return
+        keys = pages[STATE_KEYS].astype(object).drop_duplicates()
+        if not self._loaded_keys.empty:
+            known = keys.merge(self._loaded_keys.assign(known=True), on=STATE_KEYS, how='left')['known']
+            keys = keys[known.isna().to_numpy()]
+        if keys.empty:
+            return
+        loaded = self.loader(keys)
+        self._loaded_keys = pd.concat([self._loaded_keys, keys], ignore_index=True)
+        if not loaded.empty:
+            self.history = self._normalize(pd.concat([self.history, self._normalize(loaded)], ignore_index=True))
+
+    def history_for(self, pages: pd.DataFrame, before_day=None) -> pd.DataFrame:
+        # Historial de las páginas indicadas anterior al primer día nuevo (una re-ejecución
+        # del mismo día reemplaza lo que ya estaba en el estado)
+        self.load_pages(pages)
+        if self.history.empty:
+            return self.history.copy()
+        keys = pages[STATE_KEYS].drop_duplicates()
+        history = self.history
+        if before_day is not None:
+            history = history[history['day'] < pd.Timestamp(before_day)]
+        return history.merge(keys, on=STATE_KEYS, how='inner')
+
+    def update(self, new_rows: pd.DataFrame) -> pd.DataFrame:
+        # Incorpora las filas nuevas y conserva sólo las últimas observaciones de cada página.
+        # Devuelve el historial de las páginas modificadas (lo que hay que persistir).
+        self.load_pages(new_rows)
+        new_rows = self._normalize(new_rows)
+        first_new_day = new_rows['day'].min()
+        touched = new_rows[STATE_KEYS].drop_duplicates()
+
+        # Sólo se reemplazan los días de las páginas recibidas: otras páginas (otro idioma u
+        # otra partición de la misma ejecución) conservan su historial
+        is_touched = self.history.merge(
+            touched.assign(touched=True), on=STATE_KEYS, how='left'
+        )['touched'].notna().to_numpy()
+        replaced = is_touched & (self.history['day'] >= first_new_day).to_numpy()
+        kept = self.history[~replaced]
+        combined = pd.concat([kept, new_rows], ignore_index=True)
+        combined = combined.sort_values(by=STATE_KEYS + ['day'])
+        position_from_end = combined.groupby(STATE_KEYS, observed=True).cumcount(ascending=False)
+        self.history = combined[position_from_end < STATE_HISTORY_ROWS].reset_index(drop=True)
+
+        return self.history.merge(touched, on=STATE_KEYS, how='inner')
+
+    @classmethod
+    def load(cls, path: str) -> 'RollingState':
+        if not os.path.exists(path):
+            print(f"No existe estado móvil en {path}; se inicia vacío.")
+            return cls()
+        return cls(pd.read_parquet(path))
+
+    def save(self, path: str):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        temporary_path = f"{path}.tmp"
+        self.history.to_parquet(temporary_path, index=False)
+        os.replace(temporary_path, path)
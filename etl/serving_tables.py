@@ -0,0 +1,130 @@
+import csv
+import io
+from datetime import date
+from typing import Iterable, Tuple
+
+import pandas as pd
+from psycopg2 import extras
+
+# Umbral de tendencia de mv_trending_daily (03_create_materialized_views.sql)
+TRENDING_THRESHOLD = 2.0
+DEFAULT_SERVING_TOP_K = 1000
+
+TOP_N_COLUMNS = ['day', 'language', 'title_normalized', 'original_title', 'views_total', 'rank_by_views']
+TRENDING_COLUMNS = ['day', 'language', 'title_normalized', 'original_title', 'category', 'views_total', 'trend_score']
+SERIES_COLUMNS = [
+    'language', 'title_normalized', 'day', 'category',
+    'views_total', 'avg_views_7d', 'avg_views_28d', 'variations', 'trend_score'
+]
+
+SERVING_LIST_TABLES = {
+    'serving_top_n_daily': TOP_N_COLUMNS,
+    'serving_trending_daily': TRENDING_COLUMNS,
+}
+SERVING_SERIES_TABLE = 'serving_page_series'
+
+
+def top_n_rows(df: pd.DataFrame, top_k: int = DEFAULT_SERVING_TOP_K) -> pd.DataFrame:
+    """
+    Top-K por vistas de cada (day, language) con RANK() (empates con el mismo puesto,
+    como mv_top_n_daily_by_language). El top-K de la unión de varios top-K parciales es
+    el top-K global, así que se puede calcular por partes y volver a aplicar al unirlas.
+    """
+    if df.empty:
+        return pd.DataFrame(columns=TOP_N_COLUMNS)
+    ranks = df.groupby(['day', 'language'], observed=True)['views_total'].rank(method='min', ascending=False)
+    top = df.loc[ranks <= top_k, TOP_N_COLUMNS[:-1]].assign(rank_by_views=ranks[ranks <= top_k].astype('int64'))
+    return top.sort_values(['day', 'language', 'rank_by_views'], kind='stable').reset_index(drop=True)
+
+
+def trending_rows(df: pd.DataFrame, threshold: float = TRENDING_THRESHOLD) -> pd.DataFrame:
+    if df.empty:
+        return pd.DataFrame(columns=TRENDING_COLUMNS)
+    return df.loc[df['trend_score'].notna() & (df['trend_score'] >= threshold), TRENDING_COLUMNS].reset_index(drop=True)
+
+
+def series_rows(df: pd.DataFrame) -> pd.DataFrame:
+    return df[SERIES_COLUMNS]
+
+
+def _to_csv(df: pd.DataFrame) -> io.StringIO:
+    # Los títulos pueden tener comas y comillas: CSV con comillas mínimas; NaN -> campo vacío (NULL)
+    buffer = io.StringIO()
+    frame = df.assign(day=pd.to_datetime(df['day']).dt.strftime('%Y-%m-%d'))
+    frame.to_csv(buffer, index=False, header=False, quoting=csv.QUOTE_MINIMAL, na_rep='')
+    buffer.seek(0)
+    return buffer
+
+
+def _copy_to_staging(cur, table: str, columns: list, df: pd.DataFrame) -> str:
+    # Tabla temporal con la estructura de la de destino, sin WAL, que desaparece al confirmar
+    staging = f"stg_{table}"
+    cur.execute(f"DROP TABLE IF EXISTS {staging};")
+    cur.execute(f"CREATE TEMP TABLE {staging} (LIKE {table} INCLUDING DEFAULTS) ON COMMIT DROP;")
+    if not df.empty:
+        # FORCE_NOT_NULL: un título vacío es la cadena vacía, no NULL
+        not_null = [column for column in ('title_normalized', 'original_title') if column in columns]
+        cur.copy_expert(
+            f"COPY {staging} ({', '.join(columns)}) FROM STDIN "
+            f"WITH (FORMAT csv, FORCE_NOT_NULL ({', '.join(not_null)}))",
+            _to_csv(df[columns])
+        )
+    return staging
+
+
+def replace_serving_lists(
+    cur,
+    top_n: pd.DataFrame,
+    trending: pd.DataFrame,
+    partitions: Iterable[Tuple[date, str]]
+) -> int:
+    """
+    Reemplaza, en la transacción en curso, el Top-N y el trending de las particiones
+    (day, language) indicadas; una partición sin filas queda vacía. Devuelve el número
+    de particiones reemplazadas.
+    """
+    partitions = sorted(partitions)
+    if not partitions:
+        return 0
+    cur.execute("DROP TABLE IF EXISTS serving_partitions;")
+    cur.execute("""
+        CREATE TEMP TABLE serving_partitions (
+            day DATE NOT NULL,
+            language VARCHAR(10) NOT NULL
+        ) ON COMMIT DROP;
+    """)
+    extras.execute_values(cur, "INSERT INTO serving_partitions (day, language) VALUES %s;", partitions)
+
+    for (table, columns), rows in zip(SERVING_LIST_TABLES.items(), (top_n, trending)):
+        staging = _copy_to_staging(cur, table, columns, rows)
+        cur.execute(f"""
+            DELETE FROM {table} s
+            USING serving_partitions sp
+            WHERE s.day = sp.day AND s.language = sp.language;
+        """)
+        cur.execute(f"""
+            INSERT INTO {table} ({', '.join(columns)})
+            SELECT {', '.join(f's.{column}' for column in columns)}
+            FROM {staging} s
+            JOIN serving_partitions sp ON sp.day = s.day AND sp.language = s.language;
+        """)
+    return len(partitions)
+
+
+def upsert_page_series(cur, series: pd.DataFrame):
+    # Mismo criterio que fact_pageviews_daily: cada carga sobrescribe sus filas (page, day)
+    if series.empty:
+        return
+    staging = _copy_to_staging(cur, SERVING_SERIES_TABLE, SERIES_COLUMNS, series)
+    updates = ', '.join(f"{column} = EXCLUDED.{column}" for column in SERIES_COLUMNS[3:])
+    cur.execute(f"""
+        INSERT INTO {SERVING_SERIES_TABLE} ({', '.join(SERIES_COLUMNS)})
+        SELECT {', '.join(SERIES_COLUMNS)} FROM {staging}
+        ON CONFLICT (language, title_normalized, day) DO UPDATE SET {updates};
+    """)
+
+
+def delete_serving_before(cur, day: date):
+    # Retención: los días anteriores a 'day' ya no están en fact_pageviews_daily
+    for table in list(SERVING_LIST_TABLES) + [SERVING_SERIES_TABLE]:
+        cur.execute(f"DELETE FROM {table} WHERE day < %s;", (day,))
@@ -0,0 +1,156 @@
+import queue
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+import psycopg2
+
+FINAL_STATUSES = ('COMPLETADO', 'FALLIDO')
+DEFAULT_STATUS_FLUSH_SECONDS = 0.5
+# Un job reclamado de la cola sólo lo escribe el worker e intento que lo reclamaron mientras
+# su lease siga vigente: si el lease venció y el job volvió a la cola, el proceso viejo ya no lo pisa
+JOB_LEASE_CONDITION = "worker_id = %s AND attempts = %s AND lease_expires_at IS NOT NULL"
+
+JobLease = Tuple[str, int]
+
+
+def job_status_fields(
+    status: str,
+    message: Optional[str] = None,
+    rows_processed: Optional[int] = None,
+    error_message: Optional[str] = None,
+    lease: Optional[JobLease] = None
+) -> dict:
+    fields = {'status': status}
+    if message is not None:
+        fields['message'] = message
+    if rows_processed is not None:
+        fields['rows_processed'] = rows_processed
+    if error_message is not None:
+        fields['error_message'] = error_message
+    if status in FINAL_STATUSES:
+        fields['finished'] = True
+    if lease is not None:
+        fields['lease'] = lease
+    return fields
+
+
+def job_status_update(job_id: str, fields: dict) -> Tuple[str, tuple]:
+    update_parts = ["updated_at = NOW()"]
+    params = []
+    for column in ('status', 'message', 'rows_processed', 'error_message'):
+        if column in fields:
+            update_parts.append(f"{column} = %s")
+            params.append(fields[column])
+    if fields.get('finished'):
+        update_parts.append("finished_at = NOW()")
+    params.append(job_id)
+    condition = "job_id = %s"
+    if fields.get('lease'):
+        condition += f" AND {JOB_LEASE_CONDITION}"
+        params.extend(fields['lease'])
+    update_query = f"""
+        UPDATE etl_jobs 
+        SET {', '.join(update_parts)}
+        WHERE {condition};
+    """
+    return update_query, tuple(params)
+
+
+def coalesce_status_updates(updates: List[Tuple[str, dict]]) -> List[Tuple[str, dict]]:
+    # etl_jobs guarda sólo el estado actual: varias actualizaciones del mismo job en un lote
+    # se combinan en una (los valores posteriores ganan; finished_at se conserva)
+    merged = {}
+    for job_id, fields in updates:
+        current = merged.setdefault(job_id, {})
+        finished = current.get('finished', False) or fields.get('finished', False)
+        current.update(fields)
+        if finished:
+            current['finished'] = True
+    return list(merged.items())
+
+
+class AsyncStatusWriter:
+    """
+    Envía las actualizaciones de etl_jobs desde un hilo en segundo plano por una
+    conexión propia, agrupándolas por lote; así nunca bloquean la extracción ni la carga.
+    """
+
+    def __init__(self, connect: Callable[[], Optional[object]], flush_seconds: float = DEFAULT_STATUS_FLUSH_SECONDS):
+        self._connect = connect
+        self.flush_seconds = flush_seconds
+        self._queue: queue.Queue = queue.Queue()
+        self._conn = None
+        self._closed = False
+        self.batches = 0
+        self.statements = 0
+        self._thread = threading.Thread(target=self._run, name='etl-status-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, job_id: str, fields: dict):
+        if self._closed:
+            raise RuntimeError("El escritor de estados ya fue cerrado.")
+        self._queue.put((job_id, fields))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        if self._closed:
+            return
+        self.flush(timeout)
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            # Se junta lo que llegue durante flush_seconds; un flush o el cierre cortan la espera
+            deadline = time.monotonic() + self.flush_seconds
+            while isinstance(items[-1], tuple):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            updates = [entry for entry in items if isinstance(entry, tuple)]
+            if updates:
+                self._write(coalesce_status_updates(updates))
+            for entry in items:
+                if isinstance(entry, threading.Event):
+                    entry.set()
+            if any(entry is None for entry in items):
+                return
+
+    def _write(self, updates: List[Tuple[str, dict]]):
+        try:
+            if self._conn is None or self._conn.closed:
+                self._conn = self._connect()
+            if self._conn is None:
+                print("No se pudo conectar a la BD para actualizar estados de Jobs; se descartan.")
+                return
+            cur = self._conn.cursor()
+            for job_id, fields in updates:
+                cur.execute(*job_status_update(job_id, fields))
+                print(f"Job ETL {job_id} actualizado a estado: {fields.get('status')} - {fields.get('message', '')}")
+            self._conn.commit()
+            cur.close()
+            self.batches += 1
+            self.statements += len(updates)
+        except (Exception, psycopg2.Error) as error:
+            print(f"ERROR: No se pudieron actualizar los estados de Jobs ETL: {error}")
+            if self._conn is not None:
+                try:
+                    self._conn.rollback()
+                except psycopg2.Error:
+                    self._conn.close()
+                    self._conn = None
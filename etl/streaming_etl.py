@@ -0,0 +1,166 @@
+import os
+import resource
+import shutil
+import sys
+import tempfile
+from typing import Callable, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from frame_dtypes import concat_frames
+from title_cache import TitleCache
+from transformation_etl import get_default_title_cache, resolve_titles
+
+DEFAULT_STREAM_PARTITIONS = 16
+DEFAULT_STREAM_MEMORY_MB = 512
+DEFAULT_STREAM_PAGE_SIZE = 100_000
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return peak / (1024 ** 2)
+    return peak / 1024
+
+
+def partition_numbers(batch: pd.DataFrame, n_partitions: int, title_cache: Optional[TitleCache] = None) -> np.ndarray:
+    # Se particiona por el título normalizado (no el original): todas las variantes de un
+    # mismo título caen en la misma partición y sus ventanas móviles quedan completas
+    if title_cache is None:
+        title_cache = get_default_title_cache()
+    title_normalized, _ = resolve_titles(batch['title'], title_cache)
+    return key_partition_numbers(batch['language'], title_normalized, n_partitions)
+
+
+def key_partition_numbers(languages: pd.Series, titles_normalized: pd.Series, n_partitions: int) -> np.ndarray:
+    keys = pd.DataFrame({
+        'language': languages.to_numpy(dtype=object),
+        'title_normalized': titles_normalized.to_numpy(dtype=object),
+    })
+    hashes = pd.util.hash_pandas_object(keys, index=False).to_numpy()
+    return (hashes % np.uint64(n_partitions)).astype(np.int64)
+
+
+class PartitionSpiller:
+    """
+    Acumula lotes repartidos por partición con un límite de memoria. Al superarlo,
+    la partición más grande en memoria se escribe a Parquet en disco; al final cada
+    partición se reconstruye respetando el orden de llegada de sus filas.
+    """
+
+    def __init__(self, n_partitions: int, memory_limit_bytes: int, spill_dir: Optional[str] = None):
+        self.n_partitions = n_partitions
+        self.memory_limit_bytes = memory_limit_bytes
+        self._own_dir = spill_dir is None
+        self.spill_dir = spill_dir or tempfile.mkdtemp(prefix='etl_spill_')
+        os.makedirs(self.spill_dir, exist_ok=True)
+        self._buffers = [[] for _ in range(n_partitions)]
+        self._buffer_bytes = [0] * n_partitions
+        self._spill_files = [[] for _ in range(n_partitions)]
+        self.rows = 0
+        self.spilled_bytes = 0
+        self.spill_count = 0
+
+    @property
+    def buffered_bytes(self) -> int:
+        return sum(self._buffer_bytes)
+
+    def add(self, batch: pd.DataFrame, partitions: np.ndarray):
+        # Un solo reordenamiento estable por lote; cada partición es un tramo contiguo
+        self.rows += len(batch)
+        if batch.empty:
+            return
+        bytes_per_row = batch.memory_usage(deep=True).sum() / len(batch)
+        order = np.argsort(partitions, kind='stable')
+        sorted_batch = batch.iloc[order].reset_index(drop=True)
+        sorted_partitions = partitions[order]
+        boundaries = np.flatnonzero(np.diff(sorted_partitions)) + 1
+        starts = np.concatenate([[0], boundaries])
+        ends = np.concatenate([boundaries, [len(batch)]])
+        for start, end in zip(starts, ends):
+            partition = int(sorted_partitions[start])
+            self._buffers[partition].append(sorted_batch.iloc[start:end])
+            self._buffer_bytes[partition] += int(bytes_per_row * (end - start))
+
+        while self.buffered_bytes > self.memory_limit_bytes:
+            self._spill(int(np.argmax(self._buffer_bytes)))
+
+    def _spill(self, partition: int):
+        pieces = self._buffers[partition]
+        if not pieces:
+            return
+        path = os.path.join(self.spill_dir, f'part-{partition:04d}-{len(self._spill_files[partition]):05d}.parquet')
+        concat_frames(pieces).to_parquet(path, index=False)
+        self._spill_files[partition].append(path)
+        self.spilled_bytes += os.path.getsize(path)
+        self.spill_count += 1
+        self._buffers[partition] = []
+        self._buffer_bytes[partition] = 0
+
+    def iter_partitions(self) -> Iterator[Tuple[int, pd.DataFrame]]:
+        # Los archivos volcados siempre preceden a lo que sigue en memoria
+        try:
+            for partition in range(self.n_partitions):
+                pieces = [pd.read_parquet(path) for path in self._spill_files[partition]]
+                pieces.extend(self._buffers[partition])
+                self._buffers[partition] = []
+                self._buffer_bytes[partition] = 0
+                for path in self._spill_files[partition]:
+                    os.remove(path)
+                self._spill_files[partition] = []
+                if pieces:
+                    yield partition, concat_frames(pieces)
+        finally:
+            self.close()
+
+    def close(self):
+        if self._own_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+def run_streaming_pipeline(
+    batches: Iterable[pd.DataFrame],
+    transform: Callable[[pd.DataFrame], pd.DataFrame],
+    load: Callable[[pd.DataFrame], None],
+    n_partitions: int = DEFAULT_STREAM_PARTITIONS,
+    memory_limit_mb: float = DEFAULT_STREAM_MEMORY_MB,
+    spill_dir: Optional[str] = None,
+    title_cache: Optional[TitleCache] = None
+) -> dict:
+    """
+    Extracción, transformación y carga por partición (language, title_normalized).
+    Sólo una partición transformada vive en memoria a la vez; los lotes extraídos
+    se vuelcan a disco cuando superan memory_limit_mb.
+    """
+    spiller = PartitionSpiller(n_partitions, int(memory_limit_mb * 1024 ** 2), spill_dir)
+    stats = {'rows_extracted': 0, 'rows_loaded': 0, 'batches': 0, 'partitions': 0}
+
+    try:
+        for batch in batches:
+            if batch.empty:
+                continue
+            spiller.add(batch, partition_numbers(batch, n_partitions, title_cache))
+            stats['batches'] += 1
+        stats['rows_extracted'] = spiller.rows
+        print(
+            f"Extracción en streaming: {spiller.rows} filas en {stats['batches']} lotes; "
+            f"{spiller.spill_count} volcados a disco ({spiller.spilled_bytes / 1024 ** 2:.1f} MB)."
+        )
+
+        for partition, extracted in spiller.iter_partitions():
+            transformed = transform(extracted)
+            del extracted
+            load(transformed)
+            stats['rows_loaded'] += len(transformed)
+            stats['partitions'] += 1
+            del transformed
+    finally:
+        spiller.close()
+
+    stats['spill_count'] = spiller.spill_count
+    stats['spilled_mb'] = round(spiller.spilled_bytes / 1024 ** 2, 2)
+    stats['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    print(f"Pipeline en streaming completado: {stats}")
+    return stats
@@ -0,0 +1,134 @@
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_TITLE_CACHE_SIZE = 500_000
+SQLITE_MAX_PARAMS = 900
+
+TitleEntry = Tuple[str, str]
+
+
+class TitleCache:
+    """
+    Caché LRU acotada: título original (o 'idioma:título' si la categoría depende
+    del idioma) -> (title_normalized, category).
+
+    Opcionalmente persiste en un archivo SQLite local para que ejecuciones
+    posteriores reutilicen los títulos ya vistos. Cada entrada pertenece a una
+    versión de reglas; si la versión cambia, la caché se invalida por completo.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_TITLE_CACHE_SIZE, path: Optional[str] = None):
+        self.max_size = max_size
+        self.path = path
+        self.version: Optional[str] = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, TitleEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._store = self._open_store(path) if path else None
+
+    def _open_store(self, path: str) -> sqlite3.Connection:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        store = sqlite3.connect(path, check_same_thread=False)
+        store.execute("CREATE TABLE IF NOT EXISTS cache_meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        store.execute("""
+            CREATE TABLE IF NOT EXISTS title_cache (
+                title TEXT PRIMARY KEY,
+                title_normalized TEXT NOT NULL,
+                category TEXT NOT NULL
+            )
+        """)
+        store.commit()
+        return store
+
+    def ensure_version(self, version: str):
+        with self._lock:
+            if self.version == version:
+                return
+            self._entries.clear()
+            self.version = version
+
+            if self._store is None:
+                return
+            row = self._store.execute("SELECT value FROM cache_meta WHERE key = 'rules_version'").fetchone()
+            if row is None or row[0] != version:
+                self._store.execute("DELETE FROM title_cache")
+                self._store.execute(
+                    "INSERT OR REPLACE INTO cache_meta (key, value) VALUES ('rules_version', ?)",
+                    (version,)
+                )
+                self._store.commit()
+
+    def get_many(self, titles: Iterable[str]) -> Dict[str, TitleEntry]:
+        found: Dict[str, TitleEntry] = {}
+        pending: List[str] = []
+
+        with self._lock:
+            for title in titles:
+                entry = self._entries.get(title)
+                if entry is None:
+                    pending.append(title)
+                    continue
+                self._entries.move_to_end(title)
+                found[title] = entry
+            self.hits += len(found)
+
+            if pending and self._store is not None:
+                from_disk = self._read_store(pending)
+                self.disk_hits += len(from_disk)
+                self._remember(from_disk)
+                found.update(from_disk)
+                self.misses += len(pending) - len(from_disk)
+            else:
+                self.misses += len(pending)
+        return found
+
+    def put_many(self, entries: Dict[str, TitleEntry]):
+        if not entries:
+            return
+        with self._lock:
+            self._remember(entries)
+            if self._store is not None:
+                self._store.executemany(
+                    "INSERT OR REPLACE INTO title_cache (title, title_normalized, category) VALUES (?, ?, ?)",
+                    [(title, normalized, category) for title, (normalized, category) in entries.items()]
+                )
+                self._store.commit()
+
+    def _read_store(self, titles: List[str]) -> Dict[str, TitleEntry]:
+        rows = {}
+        for i in range(0, len(titles), SQLITE_MAX_PARAMS):
+            chunk = titles[i:i + SQLITE_MAX_PARAMS]
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor = self._store.execute(
+                f"SELECT title, title_normalized, category FROM title_cache WHERE title IN ({placeholders})",
+                chunk
+            )
+            for title, normalized, category in cursor:
+                rows[title] = (normalized, category)
+        return rows
+
+    def _remember(self, entries: Dict[str, TitleEntry]):
+        for title, entry in entries.items():
+            self._entries[title] = entry
+            self._entries.move_to_end(title)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+            self._store = None
@@ -1,7 +1,47 @@
 import pandas as pd
 import unicodedata
-import re
+import os
+import sys
+import json
+import hashlib
 import numpy as np
+from functools import lru_cache
+from typing import Optional, Tuple
+from title_cache import TitleCache, DEFAULT_TITLE_CACHE_SIZE
+from rolling_engine import grouped_rolling_metrics, WINDOW_MODE_ROWS
+from rolling_state import RollingState, STATE_COLUMNS
+from frame_dtypes import as_dictionary, compact_pageviews, concat_frames, dictionary_from_codes, drop_unused_categories
+from category_classifier import CategoryClassifier, DEFAULT_RULES_PATH
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - pyarrow llega como dependencia de db-dtypes
+    pa = None
+    pc = None
+
+# Reglas de clasificación por idioma (categorías en orden de prioridad y palabras clave)
+CATEGORY_RULES_PATH = os.getenv('ETL_CATEGORY_RULES_PATH') or DEFAULT_RULES_PATH
+UNKNOWN_PAGE_TITLE = 'unknown_page'
+MAX_TITLE_LENGTH = 250
+# Espacios en blanco de Unicode (los de str.isspace), como caracteres literales: \s no sirve
+# porque en RE2 (BigQuery y pandas sobre cadenas de Arrow) sólo abarca los ASCII y en re de
+# Python todos, y los títulos con p. ej. U+00A0 se agruparían bajo claves distintas
+WHITESPACE_CHARACTERS = (
+    '\t\n\x0b\x0c\r\x1c\x1d\x1e\x1f \x85\xa0\u1680\u2000\u2001\u2002\u2003\u2004\u2005'
+    '\u2006\u2007\u2008\u2009\u200a\u2028\u2029\u202f\u205f\u3000'
+)
+# Reemplazos sobre el título en minúsculas y sin diacríticos; query_builder los reutiliza en SQL
+TITLE_NORMALIZATION_REPLACEMENTS = [
+    (r'[_\-\.]', ' '),
+    (f'[^a-z0-9{WHITESPACE_CHARACTERS}]', ''),
+    (f'[{WHITESPACE_CHARACTERS}]+', '_'),
+]
+
+# Cambiar este valor cuando se modifique la cadena de normalización de títulos
+TITLE_NORMALIZATION_VERSION = 2
+
+_default_title_cache: Optional[TitleCache] = None
 
 def normalize_string(text):
     if pd.isna(text) or text is None:
@@ -13,78 +53,189 @@ def normalize_string(text):
     
     return cleaned
 
-def classify_page(title):
-    title_lower = str(title).lower()
-    
-    if re.search(r'movie|film|actor|series|tv|netflix', title_lower):
-        return 'Cine_TV'
-    if re.search(r'software|program|ai|data|python|java', title_lower):
-        return 'Tecnologia'
-    if re.search(r'earthquake|physics|chemistry|space|science|astronomy', title_lower):
-        return 'Ciencia'
-    if re.search(r'sport|football|soccer|basket|world_cup', title_lower):
-        return 'Deportes'
-    
-    return 'General'
+def classify_page(title, language: Optional[str] = None):
+    title_normalized = build_title_normalized(pd.Series([title], dtype=object)).iloc[0]
+    return CATEGORY_CLASSIFIER.classify(title_normalized, language)
+
+
+@lru_cache(maxsize=1)
+def _combining_marks_table() -> dict:
+    # Tabla de traducción que elimina todas las marcas diacríticas (categoría Unicode 'Mn')
+    return {
+        codepoint: None
+        for codepoint in range(sys.maxunicode + 1)
+        if unicodedata.category(chr(codepoint)) == 'Mn'
+    }
+
+def _as_lowered_strings(titles: pd.Series) -> pd.Series:
+    # Se trabaja sobre dtype object para conservar la semántica exacta de str.lower() de Python
+    values = pd.Series(titles.to_numpy(dtype=object, na_value=''), index=titles.index, dtype=object)
+    return values.str.lower()
+
+def _to_arrow_strings(values: pd.Series):
+    return pa.array(values.to_numpy(dtype=object), type=pa.large_string())
+
+def _is_ascii(values: pd.Series) -> np.ndarray:
+    if pa is not None:
+        return pc.string_is_ascii(_to_arrow_strings(values)).to_numpy(zero_copy_only=False)
+    return np.fromiter((value.isascii() for value in values), dtype=bool, count=len(values))
+
+def normalize_titles(titles: pd.Series) -> pd.Series:
+    # Equivalente vectorizado de titles.apply(normalize_string)
+    cleaned = _as_lowered_strings(titles)
+
+    # Los títulos ASCII no tienen diacríticos: sólo se descomponen los que no lo son
+    non_ascii = ~_is_ascii(cleaned)
+    if non_ascii.any():
+        decomposed = cleaned[non_ascii].str.normalize('NFD')
+        cleaned[non_ascii] = decomposed.str.translate(_combining_marks_table())
+
+    if titles.dtype != object:
+        cleaned = cleaned.astype(titles.dtype)
+    return cleaned
+
+def classify_titles(titles: pd.Series, languages=None) -> pd.Series:
+    # Equivalente vectorizado de classify_page: toda la columna en una pasada
+    categories = CATEGORY_CLASSIFIER.classify_many(build_title_normalized(titles), languages)
+    return pd.Series(categories, index=titles.index, dtype=object)
+
+def build_title_normalized(titles: pd.Series) -> pd.Series:
+    # Normalización del título para la dimensión dim_page
+    title_normalized = normalize_titles(titles)
+    for pattern, replacement in TITLE_NORMALIZATION_REPLACEMENTS:
+        title_normalized = title_normalized.str.replace(pattern, replacement, regex=True)
+    title_normalized = title_normalized.str.strip('_')
+    title_normalized = title_normalized.str.replace('\x00', '', regex=False).str.strip()
+    title_normalized = title_normalized.mask(title_normalized.str.len() == 0, UNKNOWN_PAGE_TITLE)
+    return title_normalized.str.slice(0, MAX_TITLE_LENGTH)
+
+
+CATEGORY_CLASSIFIER = CategoryClassifier.from_file(CATEGORY_RULES_PATH, build_title_normalized)
+DEFAULT_CATEGORY = CATEGORY_CLASSIFIER.default_category
+
+# Huella de las reglas: invalida automáticamente la caché de títulos si cambian
+TITLE_RULES_VERSION = hashlib.sha256(json.dumps({
+    'category_rules': CATEGORY_CLASSIFIER.fingerprint,
+    'normalization_version': TITLE_NORMALIZATION_VERSION,
+    'unknown_page_title': UNKNOWN_PAGE_TITLE,
+    'max_title_length': MAX_TITLE_LENGTH,
+}, sort_keys=True).encode('utf-8')).hexdigest()
 
 
-def transform_data(df: pd.DataFrame) -> pd.DataFrame:
+def get_default_title_cache() -> TitleCache:
+    global _default_title_cache
+    if _default_title_cache is None:
+        _default_title_cache = TitleCache(
+            max_size=int(os.getenv('ETL_TITLE_CACHE_SIZE', DEFAULT_TITLE_CACHE_SIZE)),
+            path=os.getenv('ETL_TITLE_CACHE_PATH') or None
+        )
+    return _default_title_cache
+
+def _normalize_and_classify(titles: pd.Series, languages: Optional[np.ndarray]) -> Tuple[list, list]:
+    normalized = build_title_normalized(titles)
+    return normalized.tolist(), CATEGORY_CLASSIFIER.classify_many(normalized, languages).tolist()
+
+def resolve_titles(
+    titles: pd.Series,
+    title_cache: Optional[TitleCache] = None,
+    languages: Optional[pd.Series] = None
+) -> Tuple[pd.Series, pd.Series]:
+    # Sólo se calculan los títulos únicos que no estén en caché; el resultado se propaga a todas las
+    # filas como diccionario (códigos por fila). Un título nulo se trata como la cadena vacía.
+    # Con languages, cada idioma se clasifica con sus reglas y la unidad es el par (idioma, título)
+    codes, uniques = pd.factorize(titles)
+    unique_titles = pd.Series(np.asarray(uniques, dtype=object))
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(unique_titles), codes)
+        unique_titles = pd.concat([unique_titles, pd.Series([''], dtype=object)], ignore_index=True)
+
+    unique_languages = None
+    keys = unique_titles.tolist()
+    if languages is not None:
+        language_codes, language_values = pd.factorize(languages, use_na_sentinel=False)
+        pairs, codes = np.unique(language_codes.astype(np.int64) * len(unique_titles) + codes, return_inverse=True)
+        codes = codes.reshape(-1)
+        unique_languages = np.asarray(language_values, dtype=object)[pairs // len(unique_titles)]
+        unique_titles = unique_titles.iloc[pairs % len(unique_titles)].reset_index(drop=True)
+        keys = [f'{language}:{title}' for language, title in zip(unique_languages, unique_titles)]
+
+    if title_cache is None:
+        normalized, categories = _normalize_and_classify(unique_titles, unique_languages)
+    else:
+        title_cache.ensure_version(TITLE_RULES_VERSION)
+        cached = title_cache.get_many(keys)
+        is_missing = np.fromiter((key not in cached for key in keys), dtype=bool, count=len(keys))
+        if is_missing.any():
+            missing_languages = None if unique_languages is None else unique_languages[is_missing]
+            computed = dict(zip(
+                [key for key, missing in zip(keys, is_missing) if missing],
+                zip(*_normalize_and_classify(unique_titles[is_missing], missing_languages))
+            ))
+            title_cache.put_many(computed)
+            cached.update(computed)
+        entries = [cached[key] for key in keys]
+        normalized = [entry[0] for entry in entries]
+        categories = [entry[1] for entry in entries]
+
+    return (
+        pd.Series(dictionary_from_codes(np.array(normalized, dtype=object), codes), index=titles.index),
+        pd.Series(dictionary_from_codes(np.array(categories, dtype=object), codes), index=titles.index),
+    )
+
+
+def transform_data(
+    df: pd.DataFrame,
+    title_cache: Optional[TitleCache] = None,
+    window_mode: str = WINDOW_MODE_ROWS,
+    rolling_state: Optional[RollingState] = None,
+    calendar_start=None
+) -> pd.DataFrame:
+    # calendar_start: primer día de la ventana extraída (modo 'calendar'). Debe ser el de todo
+    # el lote, no el de este DataFrame: una partición o un lote de streaming puede no traerlo
     if df.empty:
         print("No hay datos, no se aplicarán transformaciones.")
         return df
 
-    df = df.copy()    
-    df_platform_agg = df.groupby(['day', 'language', 'title']).agg(
-        views_total=('views_total', 'sum')
-    ).reset_index()
-    
-    df = df_platform_agg.copy()
-    df = df.sort_values(by=['language', 'title', 'day'])
-
-    df['category'] = df['title'].apply(classify_page)
-    df['original_title'] = df['title'].copy() 
+    # Columnas de texto como diccionario; las agregaciones devuelven DataFrames nuevos, así que
+    # no hace falta copiar la entrada. Las vistas se suman en int64 (el motor móvil lo requiere)
+    df = compact_pageviews(df)
+    views = df['views_total'].astype('int64')
+    df = views.groupby([df['day'], df['language'], df['title']], observed=True).sum().reset_index()
 
-    # Normalización del título para la dimensión dim_page
-    df['title_normalized'] = df['title'].apply(normalize_string)    
-    df['title_normalized'] = df['title_normalized'].str.replace(r'[_\-\.]', ' ', regex=True) 
-    df['title_normalized'] = df['title_normalized'].str.replace(r'[^a-z0-9\s]', '', regex=True)
-    df['title_normalized'] = df['title_normalized'].str.replace(r'\s+', '_', regex=True)
-    df['title_normalized'] = df['title_normalized'].str.strip('_')
-    df['title_normalized'] = df['title_normalized'].str.replace('\x00', '', regex=False).str.strip()
-    df['title_normalized'] = df['title_normalized'].apply(lambda x: 'unknown_page' if len(x) == 0 else x) 
-    df['title_normalized'] = df['title_normalized'].str.slice(0, 250)
+    if title_cache is None:
+        title_cache = get_default_title_cache()
+    df['title_normalized'], df['category'] = resolve_titles(df['title'], title_cache, df['language'])
+    # original_title comparte el diccionario (y los códigos) de title
+    df['original_title'] = df['title']
+    print(f"Caché de títulos: {title_cache.stats()}")
     
-    df_final_agg = df.groupby(['day', 'language', 'title_normalized']).agg(
+    df = df.groupby(['day', 'language', 'title_normalized'], observed=True).agg(
         views_total=('views_total', 'sum'),
         category=('category', 'first'),
         original_title=('original_title', 'first') 
     ).reset_index()
-    
-    df = df_final_agg.copy()
+
+    # Modo incremental: se anteponen las últimas observaciones persistidas de cada página
+    # para que las ventanas del día nuevo sean correctas sin re-extraer el mes anterior
+    if rolling_state is not None:
+        df['day'] = pd.to_datetime(df['day'])
+        history = rolling_state.history_for(df, df['day'].min())
+        print(f"Estado móvil: {len(history)} filas de historial para {len(df)} filas nuevas.")
+        history = history.astype({'day': df['day'].dtype, 'views_total': df['views_total'].dtype})
+        history = history.assign(language=as_dictionary(history['language']), title_normalized=as_dictionary(history['title_normalized']))
+        df = concat_frames([df.assign(from_state=False), history.assign(from_state=True)])
+
     df = df.sort_values(by=['language', 'title_normalized', 'day'])
     
-    # Cálculo de promedio móvil (7 días)
-    df['avg_views_7d'] = df.groupby(['language', 'title_normalized'])['views_total'].transform(
-        lambda x: x.rolling(window=7, min_periods=1).mean()
-    )
-    
-    # Cálculo de promedio móvil (28 días)
-    df['avg_views_28d'] = df.groupby(['language', 'title_normalized'])['views_total'].transform(
-        lambda x: x.rolling(window=28, min_periods=1).mean()
+    # Medias móviles (7 y 28 días), desviación estándar de 28 días y variaciones
+    # (crecimiento porcentual respecto al día anterior) en una sola pasada por grupo.
+    # window_mode='calendar' usa ventanas por fecha y trata los días faltantes como 0 vistas
+    rolling_metrics = grouped_rolling_metrics(
+        df, ('language', 'title_normalized'), 'views_total', window_mode=window_mode, calendar_start=calendar_start
     )
+    for column in rolling_metrics.columns:
+        df[column] = rolling_metrics[column]
 
-    # Cálculo de variaciones (Crecimiento porcentual de las vistas de una página)
-    df['previous_day_views'] = df.groupby(['language', 'title_normalized'])['views_total'].shift(1)
-    df['variations'] = ((df['views_total'] - df['previous_day_views']) / df['previous_day_views']) * 100
-    df['variations'] = df['variations'].replace([float('inf'), float('-inf')], 0) 
-    df = df.drop(columns=['previous_day_views'])
-    df['variations'] = df['variations'].fillna(0)
-
-    # Cálculo de tendencias
-    df['rolling_std_28d'] = df.groupby(['language', 'title_normalized'])['views_total'].transform(
-        lambda x: x.rolling(window=28, min_periods=1).std()
-    )
-    
     # Z-score = (valor_actual - media_rolling) / desviacion_estandar_rolling
     std_col = df['rolling_std_28d']
     diff_col = df['views_total'] - df['avg_views_28d']
@@ -99,4 +250,10 @@ def transform_data(df: pd.DataFrame) -> pd.DataFrame:
     df['trend_score'] = df['trend_score'].fillna(0)
 
     df = df.drop(columns=['rolling_std_28d'])    
+
+    if rolling_state is not None:
+        df = df[~df['from_state']].drop(columns=['from_state'])
+    df = drop_unused_categories(df)
+    if rolling_state is not None:
+        rolling_state.update(df[STATE_COLUMNS])
     return df
@@ -0,0 +1,127 @@
+from datetime import date
+from typing import Iterable, Optional, Set, Tuple
+
+import pandas as pd
+from psycopg2 import errors, extras
+
+REFRESH_MODE_CONCURRENT = 'concurrent'
+REFRESH_MODE_FULL = 'full'
+REFRESH_MODE_INCREMENTAL = 'incremental'
+# Sin vistas: el ETL escribe las tablas de servicio al cargar (serving_tables.py)
+REFRESH_MODE_SERVING = 'serving'
+REFRESH_MODES = (REFRESH_MODE_CONCURRENT, REFRESH_MODE_FULL, REFRESH_MODE_INCREMENTAL, REFRESH_MODE_SERVING)
+
+MATERIALIZED_VIEWS = ['mv_top_n_daily_by_language', 'mv_trending_daily']
+
+# Serializa el mantenimiento de las tablas resumen entre ejecuciones simultáneas del ETL
+SUMMARY_LOCK_KEY = 'etl_summary_tables'
+
+# Mismas consultas que las vistas materializadas (03_create_materialized_views.sql),
+# restringidas a las particiones de touched_partitions. El ranking se calcula por
+# (day, language), así que reescribir una partición completa da el mismo resultado.
+SUMMARY_TABLES = {
+    'summary_top_n_daily_by_language': """
+        INSERT INTO summary_top_n_daily_by_language
+            (day, language, title_normalized, original_title, views_total, rank_by_views)
+        SELECT
+            fpd.day,
+            fpd.language,
+            dp.title_normalized,
+            dp.original_title,
+            fpd.views_total,
+            RANK() OVER (PARTITION BY fpd.day, fpd.language ORDER BY fpd.views_total DESC)
+        FROM fact_pageviews_daily fpd
+        JOIN touched_partitions tp ON tp.day = fpd.day AND tp.language = fpd.language
+        JOIN dim_page dp ON fpd.page_id = dp.page_id
+        WHERE fpd.views_total IS NOT NULL;
+    """,
+    'summary_trending_daily': """
+        INSERT INTO summary_trending_daily
+            (day, language, title_normalized, original_title, views_total, trend_score)
+        SELECT
+            fpd.day,
+            fpd.language,
+            dp.title_normalized,
+            dp.original_title,
+            fpd.views_total,
+            fpd.trend_score
+        FROM fact_pageviews_daily fpd
+        JOIN touched_partitions tp ON tp.day = fpd.day AND tp.language = fpd.language
+        JOIN dim_page dp ON fpd.page_id = dp.page_id
+        WHERE fpd.trend_score IS NOT NULL AND fpd.trend_score >= 2.0;
+    """,
+}
+
+
+def touched_partitions(df: pd.DataFrame) -> Set[Tuple[date, str]]:
+    # Particiones (day, language) presentes en un lote cargado
+    if df.empty:
+        return set()
+    pairs = df[['day', 'language']].drop_duplicates()
+    days = pd.to_datetime(pairs['day']).dt.date
+    return set(zip(days, pairs['language'].astype(str)))
+
+
+def refresh_views(conn, cur, concurrently: bool = True):
+    """
+    Refresca las vistas materializadas, una transacción por vista. Con CONCURRENTLY
+    la API sigue leyendo la versión anterior mientras se recalcula; si la vista no
+    admite el refresco concurrente (sin índice único o sin poblar) se usa el bloqueante.
+    """
+    for view in MATERIALIZED_VIEWS:
+        if concurrently:
+            try:
+                cur.execute(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view};")
+                conn.commit()
+                continue
+            except (errors.ObjectNotInPrerequisiteState, errors.FeatureNotSupported) as error:
+                conn.rollback()
+                print(f"No se puede refrescar {view} de forma concurrente ({error}); se usa el refresco completo.")
+        cur.execute(f"REFRESH MATERIALIZED VIEW {view};")
+        conn.commit()
+
+
+def refresh_summary_tables(cur, partitions: Optional[Iterable[Tuple[date, str]]] = None) -> int:
+    """
+    Reescribe en la transacción en curso las particiones (day, language) indicadas de
+    las tablas resumen; sin particiones, o si las tablas están vacías, las reconstruye
+    completas. Devuelve el número de particiones procesadas.
+    """
+    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s));", (SUMMARY_LOCK_KEY,))
+    cur.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS touched_partitions (
+            day DATE NOT NULL,
+            language VARCHAR(10) NOT NULL
+        ) ON COMMIT DROP;
+    """)
+    cur.execute("SELECT NOT EXISTS (SELECT 1 FROM summary_top_n_daily_by_language);")
+    if partitions is None or cur.fetchone()[0]:
+        print("Reconstruyendo las tablas resumen completas.")
+        cur.execute("""
+            INSERT INTO touched_partitions (day, language)
+            SELECT DISTINCT day, language FROM fact_pageviews_daily;
+        """)
+    else:
+        extras.execute_values(
+            cur,
+            "INSERT INTO touched_partitions (day, language) VALUES %s;",
+            sorted(partitions)
+        )
+    cur.execute("ANALYZE touched_partitions;")
+
+    for table, insert_sql in SUMMARY_TABLES.items():
+        cur.execute(f"""
+            DELETE FROM {table} s
+            USING touched_partitions tp
+            WHERE s.day = tp.day AND s.language = tp.language;
+        """)
+        cur.execute(insert_sql)
+
+    cur.execute("SELECT COUNT(*) FROM touched_partitions;")
+    return cur.fetchone()[0]
+
+
+def delete_summary_before(cur, day: date):
+    # Retención: los días anteriores a 'day' ya no están en fact_pageviews_daily
+    for table in SUMMARY_TABLES:
+        cur.execute(f"DELETE FROM {table} WHERE day < %s;", (day,))
@@ -0,0 +1,212 @@
+import multiprocessing
+import os
+import signal
+import socket
+import time
+from datetime import date
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+import psycopg2
+
+from job_queue import (
+    ClaimedJob, claim_job, heartbeat_jobs, expire_leases, release_job, enqueue_job, job_statuses, jobs_by_param,
+    unattended_jobs, fail_unattended_job,
+    DEFAULT_LEASE_SECONDS, DEFAULT_MAX_ATTEMPTS
+)
+
+# Jobs simultáneos por host (un proceso cada uno), espera entre sondeos de la cola,
+# frecuencia de heartbeats y duración del lease, e intentos antes de marcar un job FALLIDO
+WORKER_CONCURRENCY = int(os.getenv('ETL_WORKER_CONCURRENCY', '1'))
+WORKER_POLL_SECONDS = float(os.getenv('ETL_WORKER_POLL_SECONDS', '5'))
+WORKER_HEARTBEAT_SECONDS = float(os.getenv('ETL_WORKER_HEARTBEAT_SECONDS', '30'))
+WORKER_LEASE_SECONDS = float(os.getenv('ETL_WORKER_LEASE_SECONDS', DEFAULT_LEASE_SECONDS))
+WORKER_MAX_ATTEMPTS = int(os.getenv('ETL_WORKER_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS))
+WORKER_ID = os.getenv('ETL_WORKER_ID') or f"{socket.gethostname()}-{os.getpid()}"
+
+
+class PostgresJobQueue:
+    """Operaciones de la cola sobre etl_jobs, cada una en su propia transacción."""
+
+    def __init__(
+        self,
+        connect: Callable[[], Optional[object]],
+        lease_seconds: float = WORKER_LEASE_SECONDS,
+        max_attempts: int = WORKER_MAX_ATTEMPTS
+    ):
+        self._connect = connect
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+
+    def _run(self, operation: Callable, default):
+        conn = self._connect()
+        if conn is None:
+            print("No se pudo conectar a la BD para operar la cola de jobs.")
+            return default
+        cur = None
+        try:
+            cur = conn.cursor()
+            result = operation(cur)
+            conn.commit()
+            return result
+        except (Exception, psycopg2.Error) as error:
+            print(f"ERROR: Operación de la cola de jobs fallida: {error}")
+            conn.rollback()
+            return default
+        finally:
+            if cur is not None:
+                cur.close()
+            conn.close()
+
+    def claim(self, worker_id: str) -> Optional[ClaimedJob]:
+        return self._run(lambda cur: claim_job(cur, worker_id, self.lease_seconds), None)
+
+    def heartbeat(self, worker_id: str, job_ids: List[str]) -> Optional[Set[str]]:
+        # None si no se pudo renovar (p. ej. BD caída): no se da ningún job por perdido
+        return self._run(lambda cur: heartbeat_jobs(cur, worker_id, job_ids, self.lease_seconds), None)
+
+    def expire_leases(self) -> list:
+        return self._run(lambda cur: expire_leases(cur, self.max_attempts), [])
+
+    def release(self, job_id: str, worker_id: str, reason: str, requeue: bool = False) -> list:
+        max_attempts = None if requeue else self.max_attempts
+        return self._run(lambda cur: release_job(cur, job_id, worker_id, reason, max_attempts), [])
+
+    def enqueue(self, params: dict, job_type: str, data_date: date, message: str) -> Optional[str]:
+        return self._run(lambda cur: enqueue_job(cur, params, job_type, data_date, message), None)
+
+    def statuses(self, job_ids: List[str]) -> Optional[Dict[str, str]]:
+        return self._run(lambda cur: job_statuses(cur, job_ids), None)
+
+    def unattended(self, job_ids: List[str]) -> Optional[Set[str]]:
+        return self._run(lambda cur: unattended_jobs(cur, job_ids), None)
+
+    def fail_unattended(self, job_id: str, reason: str) -> bool:
+        return self._run(lambda cur: fail_unattended_job(cur, job_id, reason), False)
+
+    def jobs_by_param(self, job_type: str, key: str, value: str) -> Optional[Dict[str, Tuple[str, str]]]:
+        return self._run(lambda cur: jobs_by_param(cur, job_type, key, value), None)
+
+
+def run_claimed_job(job: ClaimedJob, worker_id: str):
+    # Proceso hijo: si el job falla, run_etl lo devuelve a la cola (o lo marca FALLIDO al agotar
+    # los intentos) y termina con exit(1). Sus escrituras llevan el lease (worker, intento), así que
+    # tras perder el job no pisan el estado del siguiente intento
+    from main_etl import run_etl
+    run_etl(worker_id=worker_id, claimed_job=job)
+
+
+def spawn_job_process(job: ClaimedJob, worker_id: str):
+    # 'spawn': el hijo no hereda las conexiones del pool del proceso principal
+    process = multiprocessing.get_context('spawn').Process(
+        target=run_claimed_job, args=(job, worker_id), name=f'etl-job-{job.job_id}'
+    )
+    process.start()
+    return process
+
+
+class EtlWorker:
+    """
+    Drena la cola de etl_jobs con hasta concurrency jobs a la vez, cada uno en su proceso.
+    Varios workers (en el mismo o en distintos hosts) pueden compartir la cola: el reclamo
+    usa SKIP LOCKED. El proceso principal envía los heartbeats de sus jobs, detiene los que
+    perdió (lease vencido y reclamado por otro) y devuelve a la cola los de workers caídos.
+    """
+
+    def __init__(
+        self,
+        queue: PostgresJobQueue,
+        worker_id: str = WORKER_ID,
+        concurrency: int = WORKER_CONCURRENCY,
+        poll_seconds: float = WORKER_POLL_SECONDS,
+        heartbeat_seconds: float = WORKER_HEARTBEAT_SECONDS,
+        launch: Callable = spawn_job_process,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.concurrency = max(1, concurrency)
+        self.poll_seconds = poll_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.launch = launch
+        self.clock = clock
+        self.running: Dict[str, object] = {}
+        self.jobs_started = 0
+        self._stopping = False
+        self._last_heartbeat: Optional[float] = None
+
+    def stop(self, *_):
+        self._stopping = True
+
+    def _reap_finished(self):
+        for job_id, process in list(self.running.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            del self.running[job_id]
+            # Si run_etl no llegó a un estado final (proceso terminado por una señal, OOM...), el
+            # job se reintenta o se marca FALLIDO según sus intentos; uno ya terminado no cambia
+            self.queue.release(
+                job_id, self.worker_id, f'El proceso del job terminó (código {process.exitcode}) sin un estado final.'
+            )
+            print(f"Worker {self.worker_id}: job {job_id} terminado (código {process.exitcode}).")
+
+    def _heartbeat(self):
+        now = self.clock()
+        if self._last_heartbeat is not None and now - self._last_heartbeat < self.heartbeat_seconds:
+            return
+        self._last_heartbeat = now
+        if self.running:
+            owned = self.queue.heartbeat(self.worker_id, list(self.running))
+            for job_id in set(self.running) - (owned if owned is not None else set(self.running)):
+                print(f"Worker {self.worker_id}: el job {job_id} ya no es de este worker, se detiene.")
+                process = self.running.pop(job_id)
+                process.terminate()
+                process.join()
+        for job_id, status in self.queue.expire_leases():
+            print(f"Worker {self.worker_id}: lease vencido del job {job_id}, ahora {status}.")
+
+    def _claim(self):
+        while not self._stopping and len(self.running) < self.concurrency:
+            job = self.queue.claim(self.worker_id)
+            if job is None:
+                return
+            print(f"Worker {self.worker_id}: job {job.job_id} reclamado (intento {job.attempts}).")
+            stale = self.running.pop(job.job_id, None)
+            if stale is not None:
+                # Perdió el lease de un intento anterior entre un heartbeat y este reclamo
+                stale.terminate()
+                stale.join()
+            self.running[job.job_id] = self.launch(job, self.worker_id)
+            self.jobs_started += 1
+
+    def run_once(self):
+        self._reap_finished()
+        self._heartbeat()
+        self._claim()
+
+    def shutdown(self):
+        # Los jobs interrumpidos vuelven a la cola sin agotar intentos; retoman desde su último shard
+        for job_id, process in list(self.running.items()):
+            process.terminate()
+            process.join()
+            self.queue.release(job_id, self.worker_id, 'Worker detenido: job devuelto a la cola.', requeue=True)
+        self.running.clear()
+
+    def run(self):
+        print(f"Worker {self.worker_id} iniciado: hasta {self.concurrency} jobs simultáneos.")
+        try:
+            while not self._stopping:
+                self.run_once()
+                time.sleep(self.poll_seconds)
+        finally:
+            self.shutdown()
+        print(f"Worker {self.worker_id} detenido tras iniciar {self.jobs_started} jobs.")
+
+
+if __name__ == "__main__":
+    from main_etl import get_db_connection
+
+    worker = EtlWorker(PostgresJobQueue(get_db_connection))
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+    worker.run()
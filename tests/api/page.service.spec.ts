@@ -1,4 +1,5 @@
 import { Test, TestingModule } from '@nestjs/testing';
+import { ConfigService } from '@nestjs/config';
 import { DataSource } from 'typeorm';
 import { BadRequestException } from '@nestjs/common';
 import { PageService } from '../../api/src/page/page.service';
@@ -27,6 +28,10 @@ const mockDataSource = {
   query: jest.fn(),
 };
 
+const mockConfigService = {
+  get: jest.fn((key: string, defaultValue?: string) => defaultValue),
+};
+
 describe('Pruebas unitarias - Servicio de Páginas (Wikipedia)', () => {
   let service: PageService;
   let dataSource: DataSource;
@@ -37,6 +42,7 @@ describe('Pruebas unitarias - Servicio de Páginas (Wikipedia)', () => {
         PageService,
         { provide: DataSource, useValue: mockDataSource },
         { provide: PaginationService, useValue: mockPaginationService },
+        { provide: ConfigService, useValue: mockConfigService },
       ],
     }).compile();
 
@@ -119,6 +125,39 @@ describe('Pruebas unitarias - Servicio de Páginas (Wikipedia)', () => {
       expect(resultado.items).toEqual(itemsTrendingMock);
       expect(resultado.total).toBe(10);
     });
+
+    it('debería leer las tablas resumen con API_VIEW_SOURCE=summary', async () => {
+      const configResumen = { get: jest.fn(() => 'summary') };
+      const servicioResumen = new PageService(
+        mockDataSource as unknown as DataSource,
+        mockPaginationService as unknown as PaginationService,
+        configResumen as unknown as ConfigService,
+      );
+      mockDataSource.query.mockResolvedValueOnce([{ total: '1' }]);
+      mockDataSource.query.mockResolvedValueOnce(itemsTrendingMock);
+
+      await servicioResumen.getTrendingPages(solicitudTrending);
+
+      expect(mockDataSource.query.mock.calls[0][0]).toContain('summary_trending_daily');
+      expect(mockDataSource.query.mock.calls[1][0]).toContain('summary_trending_daily');
+    });
+
+    it('debería leer las tablas de servicio sin unir dim_page con API_VIEW_SOURCE=serving', async () => {
+      const configServicio = { get: jest.fn(() => 'serving') };
+      const servicioServing = new PageService(
+        mockDataSource as unknown as DataSource,
+        mockPaginationService as unknown as PaginationService,
+        configServicio as unknown as ConfigService,
+      );
+      mockDataSource.query.mockResolvedValueOnce([{ total: '1' }]);
+      mockDataSource.query.mockResolvedValueOnce(itemsTrendingMock);
+
+      await servicioServing.getTrendingPages(solicitudTrending);
+
+      const sqlItems = mockDataSource.query.mock.calls[1][0];
+      expect(sqlItems).toContain('serving_trending_daily');
+      expect(sqlItems).not.toContain('dim_page');
+    });
   });
 
     // Pruebas para getPageSeries
@@ -150,6 +189,25 @@ describe('Pruebas unitarias - Servicio de Páginas (Wikipedia)', () => {
       expect(resultado.items).toEqual(seriesMock);
     });
 
+    it('debería leer la serie de serving_page_series en una sola consulta con API_VIEW_SOURCE=serving', async () => {
+      const configServicio = { get: jest.fn(() => 'serving') };
+      const servicioServing = new PageService(
+        mockDataSource as unknown as DataSource,
+        mockPaginationService as unknown as PaginationService,
+        configServicio as unknown as ConfigService,
+      );
+      mockDataSource.query.mockResolvedValueOnce(seriesMock);
+
+      const resultado = await servicioServing.getPageSeries(params, request);
+
+      expect(mockDataSource.query).toHaveBeenCalledTimes(1);
+      expect(mockDataSource.query.mock.calls[0][0]).toContain('serving_page_series');
+      expect(mockDataSource.query.mock.calls[0][1]).toEqual([
+        request.lang, params.title, request.date_from, request.date_to,
+      ]);
+      expect(resultado.items).toEqual(seriesMock);
+    });
+
     it('debería lanzar BadRequestException si el formato de fecha es inválido', async () => {
       const requestInvalido: GetPageSeriesDto = { ...request, date_from: '2025/01/01' };
       await expect(service.getPageSeries(params, requestInvalido)).rejects.toThrow(BadRequestException);
@@ -0,0 +1,93 @@
+import os
+import sys
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+# Los módulos del ETL se importan de forma plana, igual que en el contenedor (python /app/etl/main_etl.py)
+ETL_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'etl'))
+if ETL_DIR not in sys.path:
+    sys.path.insert(0, ETL_DIR)
+
+
+class FakeRowIterator:
+    def __init__(self, frame: pd.DataFrame, page_size: int):
+        self.frame = frame
+        self.page_size = page_size
+
+    def to_dataframe_iterable(self):
+        for start in range(0, len(self.frame), self.page_size):
+            yield self.frame.iloc[start:start + self.page_size].reset_index(drop=True)
+
+    def to_arrow_iterable(self, bqstorage_client=None):
+        yield from pa.Table.from_pandas(self.frame, preserve_index=False).to_batches(max_chunksize=self.page_size)
+
+
+class FakeQueryJob:
+    def __init__(self, frame: pd.DataFrame, client: 'FakeBigQueryClient'):
+        self.frame = frame
+        self.client = client
+        self.total_bytes_processed = len(frame) * 100
+
+    def _wait(self):
+        with self.client.lock:
+            self.client.in_flight += 1
+            self.client.max_in_flight = max(self.client.max_in_flight, self.client.in_flight)
+        time.sleep(self.client.latency)
+        with self.client.lock:
+            self.client.in_flight -= 1
+
+    def to_dataframe(self):
+        self._wait()
+        return self.frame
+
+    def to_arrow(self, bqstorage_client=None, create_bqstorage_client=True):
+        # Tabla Arrow local en lugar de la Storage Read API (o de REST con create_bqstorage_client=False)
+        self._wait()
+        if create_bqstorage_client and self.client.storage_error is not None:
+            raise self.client.storage_error
+        self.client.arrow_downloads.append('storage' if create_bqstorage_client else 'rest')
+        return pa.Table.from_pandas(self.frame, preserve_index=False)
+
+    def result(self, page_size=None):
+        self._wait()
+        return FakeRowIterator(self.frame, page_size)
+
+
+class FakeDryRunJob:
+    def __init__(self, total_bytes_processed: int):
+        self.total_bytes_processed = total_bytes_processed
+
+
+class FakeBigQueryClient:
+    """Sustituto de bigquery.Client: la consulta es 'inicio|fin' y devuelve una fila por día."""
+
+    def __init__(self, latency: float = 0.05, failing_query: str = None, storage_error: Exception = None):
+        self.latency = latency
+        self.failing_query = failing_query
+        self.storage_error = storage_error
+        self.arrow_downloads = []
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.queries = []
+        self.dry_runs = []
+
+    def query(self, query: str, job_config=None):
+        start, end = query.split('|')
+        days = pd.date_range(start, end, freq='D')
+        if job_config is not None and job_config.dry_run:
+            self.dry_runs.append(query)
+            return FakeDryRunJob(len(days) * 100)
+        self.queries.append(query)
+        if query == self.failing_query:
+            raise RuntimeError('fallo simulado')
+        return FakeQueryJob(pd.DataFrame({'day': days.date, 'views': range(len(days))}), self)
+
+
+@pytest.fixture
+def fake_bigquery_client():
+    return FakeBigQueryClient
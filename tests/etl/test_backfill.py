@@ -0,0 +1,122 @@
+from datetime import date, timedelta
+
+from backfill import JOB_TYPE_BACKFILL, BackfillScheduler, backfill_id_for, plan_backfill
+
+
+class FakeQueue:
+    """Cola en memoria: cada sondeo (sleep) los 'workers' terminan el job pendiente más antiguo."""
+
+    def __init__(self, existing=None, failing=()):
+        self.jobs = {}
+        self.start_dates = {}
+        self.enqueued = []
+        self.max_in_flight = 0
+        self.existing = existing or {}
+        self.failing = set(failing)
+
+    def jobs_by_param(self, job_type, key, value):
+        assert (job_type, key) == (JOB_TYPE_BACKFILL, 'backfill_id')
+        for job_id, status in self.existing.values():
+            self.jobs[job_id] = status
+        return dict(self.existing)
+
+    def enqueue(self, params, job_type, data_date, message):
+        job_id = f'job-{len(self.enqueued)}'
+        self.enqueued.append(params)
+        self.jobs[job_id] = 'PENDIENTE'
+        self.start_dates[job_id] = params['start_date']
+        in_flight = sum(status == 'PENDIENTE' for status in self.jobs.values())
+        self.max_in_flight = max(self.max_in_flight, in_flight)
+        return job_id
+
+    def statuses(self, job_ids):
+        return {job_id: self.jobs[job_id] for job_id in job_ids}
+
+    def unattended(self, job_ids):
+        # Los 'workers' sólo toman jobs PENDIENTE: uno en otro estado no final no lo atiende nadie
+        return {job_id for job_id in job_ids if self.jobs[job_id] not in ('PENDIENTE', 'COMPLETADO', 'FALLIDO')}
+
+    def fail_unattended(self, job_id, reason):
+        self.jobs[job_id] = 'FALLIDO'
+        return True
+
+    def work(self, seconds):
+        for job_id, status in self.jobs.items():
+            if status == 'PENDIENTE':
+                self.jobs[job_id] = 'FALLIDO' if self.start_dates.get(job_id) in self.failing else 'COMPLETADO'
+                return
+
+
+def test_plan_cubre_el_rango_sin_solapar_los_dias_escritos():
+    chunks = plan_backfill(date(2024, 1, 1), date(2024, 1, 20), chunk_days=7, lookback_days=27)
+
+    assert [(chunk.start_day.day, chunk.end_day.day) for chunk in chunks] == [(1, 7), (8, 14), (15, 20)]
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.start_day == previous.end_day + timedelta(days=1)
+    # Cada tramo extrae la ventana completa de su primer día
+    assert chunks[1].extract_start_day == date(2023, 12, 12)
+
+
+def test_scheduler_encola_en_orden_con_paralelismo_acotado():
+    queue = FakeQueue()
+    chunks = plan_backfill(date(2024, 1, 1), date(2024, 1, 10), chunk_days=2, lookback_days=27)
+
+    summary = BackfillScheduler(queue, chunks, ['en'], 'bf1', parallelism=2, sleep=queue.work).run()
+
+    assert summary == {'backfill_id': 'bf1', 'chunks': 5, 'completed': 5, 'failed': []}
+    assert [params['start_date'] for params in queue.enqueued] == [
+        '2024-01-01', '2024-01-03', '2024-01-05', '2024-01-07', '2024-01-09'
+    ]
+    assert queue.max_in_flight == 2
+    assert queue.enqueued[0]['lookback_days'] == 27
+    assert queue.enqueued[0]['backfill_id'] == 'bf1'
+
+
+def test_scheduler_reporta_fallidos_sin_detener_el_resto():
+    queue = FakeQueue(failing={'2024-01-03'})
+    chunks = plan_backfill(date(2024, 1, 1), date(2024, 1, 6), chunk_days=2, lookback_days=0)
+
+    summary = BackfillScheduler(queue, chunks, ['en'], 'bf1', parallelism=1, sleep=queue.work).run()
+
+    assert summary['completed'] == 2
+    assert summary['failed'] == ['2024-01-03..2024-01-04']
+
+
+def test_relanzar_adopta_los_jobs_existentes_y_reencola_los_fallidos():
+    existing = {
+        '2024-01-01': ('old-0', 'COMPLETADO'),
+        '2024-01-03': ('old-1', 'FALLIDO'),
+        '2024-01-05': ('old-2', 'PENDIENTE'),
+    }
+    queue = FakeQueue(existing=existing)
+    chunks = plan_backfill(date(2024, 1, 1), date(2024, 1, 8), chunk_days=2, lookback_days=0)
+
+    summary = BackfillScheduler(queue, chunks, ['en'], 'bf1', parallelism=4, sleep=queue.work).run()
+
+    assert summary['completed'] == 4
+    assert [params['start_date'] for params in queue.enqueued] == ['2024-01-03', '2024-01-07']
+
+
+def test_el_id_del_backfill_depende_del_historial_extraído():
+    args = (date(2024, 1, 1), date(2024, 1, 31), ['es', 'en'], 7)
+
+    assert backfill_id_for(*args, 27, {}) == backfill_id_for(date(2024, 1, 1), date(2024, 1, 31), ['en', 'es'], 7, 27, {})
+    assert backfill_id_for(*args, 27, {}) != backfill_id_for(*args, 60, {})
+
+
+def test_scheduler_abandona_los_tramos_en_curso_sin_lease():
+    # Un job que quedó CARGANDO sin worker (proceso muerto sin lease) no bloquea el backfill
+    queue = FakeQueue(existing={'2024-01-01': ('old-0', 'CARGANDO')})
+    chunks = plan_backfill(date(2024, 1, 1), date(2024, 1, 4), chunk_days=2, lookback_days=0)
+    polls = []
+
+    def sleep(seconds):
+        polls.append(seconds)
+        queue.work(seconds)
+
+    summary = BackfillScheduler(queue, chunks, ['en'], 'bf1', parallelism=2, sleep=sleep, stale_polls=3).run()
+
+    assert summary['completed'] == 1
+    assert summary['failed'] == ['2024-01-01..2024-01-02']
+    assert queue.jobs['old-0'] == 'FALLIDO'
+    assert len(polls) == 2
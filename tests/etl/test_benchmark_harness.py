@@ -0,0 +1,57 @@
+import os
+import sys
+
+import pandas as pd
+
+BENCHMARKS_DIR = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'benchmarks', 'etl'))
+if BENCHMARKS_DIR not in sys.path:
+    sys.path.insert(0, BENCHMARKS_DIR)
+
+from harness import compare_to_baseline  # noqa: E402
+from synthetic import generate_pageviews, generate_titles  # noqa: E402
+from transformation_etl import normalize_string  # noqa: E402
+
+
+def test_generate_pageviews_tiene_el_esquema_de_la_extraccion_y_es_determinista():
+    df = generate_pageviews(pages=50, days=3, languages=['en', 'es'], seed=7)
+
+    assert list(df.columns) == ['day', 'language', 'platform_type', 'title', 'views_total']
+    assert len(df) == 50 * 3 * 2 * 2
+    assert (df['views_total'] >= 1).all()
+    pd.testing.assert_frame_equal(df, generate_pageviews(pages=50, days=3, languages=['en', 'es'], seed=7))
+
+
+def test_generate_pageviews_sigue_una_distribucion_zipf():
+    df = generate_pageviews(pages=1000, days=5, languages=['en'], zipf_exponent=1.2, density=1.0)
+    per_page = df.groupby('title')['views_total'].sum().sort_values(ascending=False)
+
+    # Con Zipf, el 1% de páginas más vistas concentra una fracción desproporcionada de las vistas
+    assert per_page.iloc[:10].sum() / per_page.sum() > 0.3
+
+
+def test_generate_titles_controla_la_mezcla_unicode_y_las_variantes():
+    ascii_only = generate_titles(500, unicode_mix=0.0, variant_fraction=0.0)
+    mixed = generate_titles(500, unicode_mix=0.8, variant_fraction=0.2)
+
+    assert all(title.isascii() for title in ascii_only)
+    assert sum(not title.isascii() for title in mixed) > 200
+    assert len(set(mixed)) == len(mixed)
+    assert len({normalize_string(title) for title in mixed}) < len(mixed)
+
+
+def test_compare_to_baseline_marca_regresiones_por_caso():
+    baseline = [
+        {'benchmark': 'transform_data', 'params': {'pages': 10}, 'seconds': 1.0},
+        {'benchmark': 'classify_page', 'params': {'titles': 5}, 'seconds': 0.5},
+    ]
+    results = [
+        {'benchmark': 'transform_data', 'params': {'pages': 10}, 'seconds': 1.5},
+        {'benchmark': 'classify_page', 'params': {'titles': 5}, 'seconds': 0.55},
+        {'benchmark': 'normalize_string', 'params': {}, 'seconds': 0.1},
+    ]
+
+    comparison = compare_to_baseline(results, baseline, tolerance=0.25)
+
+    assert [(entry['benchmark'], entry['regression']) for entry in comparison] == [
+        ('transform_data', True), ('classify_page', False)
+    ]
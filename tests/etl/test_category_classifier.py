@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+import category_classifier
+from category_classifier import CategoryClassifier
+from transformation_etl import build_title_normalized, classify_titles, resolve_titles
+
+RULES = {
+    'default_category': 'General',
+    'fallback_language': 'en',
+    'categories': [
+        {'category': 'Cine_TV', 'keywords': {'*': ['netflix'], 'en': ['film', 'science fiction'], 'es': ['película']}},
+        {'category': 'Tecnologia', 'keywords': {'en': ['ai', 'data science'], 'es': ['inteligencia artificial']}},
+        {'category': 'Deportes', 'keywords': {'en': ['world cup'], 'es': ['copa mundial', 'fútbol']}},
+    ],
+}
+
+TITLES = pd.Series([
+    'Tainan', 'AI_safety', 'Data_science_fiction', 'Data_science', 'The_World_Cup_final',
+    'World_Cupcake', 'Película_de_fútbol', 'Netflix', 'Copa_Mundial_de_Fútbol', '', 'Filmography',
+])
+
+
+@pytest.fixture
+def classifier():
+    return CategoryClassifier(RULES, build_title_normalized)
+
+
+def _classify(classifier, titles, language):
+    return classifier.classify_many(build_title_normalized(titles), language).tolist()
+
+
+def test_solo_coinciden_palabras_completas_y_gana_la_categoria_prioritaria(classifier):
+    assert _classify(classifier, TITLES, 'en') == [
+        'General', 'Tecnologia', 'Cine_TV', 'Tecnologia', 'Deportes',
+        'General', 'General', 'Cine_TV', 'General', 'General', 'General',
+    ]
+
+
+def test_cada_idioma_usa_sus_palabras_clave_y_las_compartidas(classifier):
+    assert _classify(classifier, TITLES, 'es') == [
+        'General', 'General', 'General', 'General', 'General',
+        'General', 'Cine_TV', 'Cine_TV', 'Deportes', 'General', 'General',
+    ]
+    # Idiomas sin reglas propias: las del idioma por defecto
+    assert _classify(classifier, TITLES, 'fr') == _classify(classifier, TITLES, 'en')
+
+
+@pytest.mark.parametrize('without_pyarrow', [False, True])
+def test_columna_y_titulo_individual_coinciden(classifier, monkeypatch, without_pyarrow):
+    if without_pyarrow:
+        monkeypatch.setattr(category_classifier, 'pa', None)
+    languages = pd.Series(['en', 'es', None, 'fr'] * 3)[:len(TITLES)]
+    normalized = build_title_normalized(TITLES)
+
+    expected = [classifier.classify(title, language) for title, language in zip(normalized, languages)]
+    assert classifier.classify_many(normalized, languages).tolist() == expected
+
+
+def test_reglas_repetidas_o_sin_idioma_por_defecto_se_rechazan():
+    with pytest.raises(ValueError, match='repetidas'):
+        CategoryClassifier(dict(RULES, categories=RULES['categories'] * 2), build_title_normalized)
+    with pytest.raises(ValueError, match="'de'"):
+        CategoryClassifier(dict(RULES, fallback_language='de'), build_title_normalized)
+
+
+def test_resolve_titles_clasifica_por_idioma():
+    titles = pd.Series(['Inteligencia_artificial', 'Inteligencia_artificial', 'Artificial_intelligence'])
+    languages = pd.Series(['es', 'en', 'en'])
+
+    normalized, categories = resolve_titles(titles, languages=languages)
+
+    assert normalized.tolist() == ['inteligencia_artificial', 'inteligencia_artificial', 'artificial_intelligence']
+    assert categories.tolist() == ['Tecnologia', 'General', 'Tecnologia']
+    assert categories.tolist() == [
+        classify_titles(titles[[index]], language).iloc[0] for index, language in enumerate(languages)
+    ]
@@ -0,0 +1,112 @@
+import threading
+
+import psycopg2
+import pytest
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+from db_pool import ConnectionPool
+
+
+class FakeInfo:
+    def __init__(self):
+        self.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        if self.conn.broken:
+            raise psycopg2.OperationalError('server closed the connection unexpectedly')
+        self.conn.info.transaction_status = extensions.TRANSACTION_STATUS_INTRANS
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Misma interfaz que PooledConnection, sin servidor."""
+
+    pool = None
+    last_used = 0.0
+    checked_out = False
+
+    def __init__(self):
+        self.info = FakeInfo()
+        self.closed = 0
+        self.broken = False
+        self.autocommit = False
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        if self.broken:
+            raise psycopg2.InterfaceError('connection already closed')
+        self.rollbacks += 1
+        self.info.transaction_status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        if self.pool is not None and self.checked_out:
+            self.pool.release(self)
+        elif self.pool is None:
+            self.closed = 1
+
+    def discard(self):
+        self.pool = None
+        self.closed = 1
+
+
+def _pool(**kwargs) -> ConnectionPool:
+    return ConnectionPool(FakeConnection, **kwargs)
+
+
+def test_close_returns_connection_to_pool_and_it_is_reused():
+    pool = _pool(max_size=2)
+    first = pool.getconn()
+    first.cursor().execute('SELECT 1')
+    first.close()
+    first.close()
+
+    second = pool.getconn()
+
+    assert second is first
+    assert first.rollbacks == 1 and not first.closed
+    assert pool.stats()['created'] == 1 and pool.stats()['reused'] == 1
+
+
+def test_broken_idle_connection_is_replaced_after_health_check():
+    pool = _pool(health_check_seconds=0)
+    conn = pool.getconn()
+    conn.close()
+    conn.broken = True
+
+    replacement = pool.getconn()
+
+    assert replacement is not conn and conn.closed
+    assert pool.stats()['discarded'] == 1
+
+
+def test_pool_blocks_at_max_size_until_a_connection_is_returned():
+    pool = _pool(max_size=1, acquire_timeout=5)
+    conn = pool.getconn()
+    acquired = []
+    waiter = threading.Thread(target=lambda: acquired.append(pool.getconn()))
+    waiter.start()
+    waiter.join(0.2)
+    assert acquired == []
+
+    conn.close()
+    waiter.join(5)
+    assert acquired == [conn]
+
+
+def test_exhausted_pool_times_out():
+    pool = _pool(max_size=1, acquire_timeout=0.05)
+    pool.getconn()
+
+    with pytest.raises(PoolError):
+        pool.getconn()
@@ -0,0 +1,55 @@
+import pandas as pd
+
+from dim_page_cache import DimPageCache, plan_dim_page_changes
+
+
+def _cached():
+    return pd.DataFrame({
+        'page_id': [1, 2, 3],
+        'title_normalized': ['netflix', 'python', 'null'],
+        'language': ['en', 'en', 'es'],
+        'category': ['Cine_TV', 'Tecnologia', 'General'],
+        'original_title': ['Netflix', 'Python', 'Null'],
+    })
+
+
+def test_plan_splits_new_changed_and_unchanged_keys():
+    incoming = pd.DataFrame({
+        'title_normalized': ['netflix', 'python', 'null', 'netflix'],
+        'language': ['en', 'en', 'es', 'es'],
+        'category': ['Cine_TV', 'Tecnologia', 'General', 'Cine_TV'],
+        'original_title': ['Netflix', 'Python_(lenguaje)', 'Null', 'Netflix'],
+    })
+
+    new_pages, changed_pages, known_ids = plan_dim_page_changes(_cached(), incoming)
+
+    assert new_pages[['title_normalized', 'language']].values.tolist() == [['netflix', 'es']]
+    assert changed_pages['page_id'].tolist() == [2]
+    assert changed_pages['original_title'].tolist() == ['Python_(lenguaje)']
+    assert sorted(known_ids['page_id'].tolist()) == [1, 2, 3]
+
+
+def test_plan_with_empty_cache_treats_everything_as_new():
+    cache = DimPageCache()
+    incoming = _cached().drop(columns=['page_id'])
+
+    new_pages, changed_pages, known_ids = plan_dim_page_changes(cache.pages, incoming)
+
+    assert len(new_pages) == 3
+    assert changed_pages.empty and known_ids.empty
+
+
+def test_remember_keeps_latest_attributes_per_key():
+    cache = DimPageCache()
+    cache.remember(_cached())
+    cache.remember(pd.DataFrame({
+        'page_id': [2, 4],
+        'title_normalized': ['python', 'fisica'],
+        'language': ['en', 'es'],
+        'category': ['Tecnologia', 'Ciencia'],
+        'original_title': ['Python_(lenguaje)', 'Física'],
+    }))
+
+    pages = cache.pages.set_index('page_id')
+    assert len(pages) == 4
+    assert pages.loc[2, 'original_title'] == 'Python_(lenguaje)'
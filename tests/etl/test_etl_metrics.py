@@ -0,0 +1,77 @@
+import pandas as pd
+import pytest
+
+from etl_metrics import RunMetrics, prometheus_text, write_prometheus_textfile
+
+
+class FakeRoundTrips:
+    def __init__(self):
+        self.value = 0
+
+    def __call__(self):
+        return self.value
+
+
+def test_stage_acumula_tiempos_contadores_y_viajes_a_la_base():
+    round_trips = FakeRoundTrips()
+    metrics = RunMetrics(round_trips)
+
+    for rows in (10, 5):
+        with metrics.stage('load_fact') as stage:
+            round_trips.value += 3
+            stage['rows_in'] = rows
+
+    record = metrics.to_dict()['stages']['load_fact']
+    assert record['calls'] == 2
+    assert record['rows_in'] == 15
+    assert record['db_round_trips'] == 6
+    assert record['wall_seconds'] >= 0
+    assert record['peak_rss_mb'] > 0
+    assert metrics.to_dict()['total']['db_round_trips'] == 6
+
+
+def test_stage_registra_la_etapa_aunque_falle():
+    metrics = RunMetrics()
+
+    with pytest.raises(RuntimeError):
+        with metrics.stage('refresh_views'):
+            raise RuntimeError('fallo simulado')
+
+    assert metrics.to_dict()['stages']['refresh_views']['calls'] == 1
+
+
+def test_iter_stage_cuenta_las_filas_producidas_y_add_suma_contadores():
+    metrics = RunMetrics()
+    batches = [pd.DataFrame({'views': range(3)}), pd.DataFrame({'views': range(4)})]
+
+    assert [len(batch) for batch in metrics.iter_stage('extract', batches)] == [3, 4]
+    metrics.add('extract', bytes_scanned=1000, bytes_downloaded=None)
+
+    record = metrics.to_dict()['stages']['extract']
+    assert record['rows_out'] == 7
+    assert record['bytes_scanned'] == 1000
+    assert 'bytes_downloaded' not in record
+
+
+def test_prometheus_text_una_serie_por_etapa():
+    metrics = RunMetrics()
+    with metrics.stage('transform') as stage:
+        stage['rows_out'] = 42
+
+    text = prometheus_text(metrics.to_dict(), success=True, finished_at=1700000000)
+
+    assert '# TYPE etl_stage_rows_out gauge' in text
+    assert 'etl_stage_rows_out{stage="transform"} 42' in text
+    assert 'etl_stage_bytes_scanned{' not in text
+    assert 'etl_run_success 1' in text
+    assert text.endswith('etl_run_finished_timestamp_seconds 1700000000\n')
+
+
+def test_write_prometheus_textfile_reemplaza_el_archivo(tmp_path):
+    path = tmp_path / 'etl.prom'
+    path.write_text('anterior')
+
+    write_prometheus_textfile(str(path), RunMetrics().to_dict(), success=False)
+
+    assert 'etl_run_success 0' in path.read_text()
+    assert [entry.name for entry in tmp_path.iterdir()] == ['etl.prom']
@@ -0,0 +1,151 @@
+import os
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+import main_etl
+from extract_cache import ExtractCache, plan_missing_shards
+from extraction import ExtractShard, ShardedExtractor
+
+PARAMS = {'languages': ['en', 'es'], 'rank_by_views': 5000, 'exclude_automated_traffic': True}
+
+
+def _frame(rows: int, day: int = 1) -> pd.DataFrame:
+    return pd.DataFrame({'day': [datetime(2024, 1, day).date()] * rows, 'title': ['Netflix'] * rows, 'views': range(rows)})
+
+
+def _seed(cache: ExtractCache, day: int, frame: pd.DataFrame):
+    # Igual que la extracción: una página por shard de un día
+    writer = cache.open_shard(ExtractShard(2024, datetime(2024, 1, day), datetime(2024, 1, day)), PARAMS)
+    writer.write(frame)
+    writer.commit()
+
+
+def test_missing_days_are_grouped_into_contiguous_shards():
+    days = [datetime(2023, 12, 30), datetime(2023, 12, 31), datetime(2024, 1, 1), datetime(2024, 1, 5)]
+
+    shards = plan_missing_shards(days)
+
+    assert [(s.year, s.start_date.day, s.end_date.day) for s in shards] == [(2023, 30, 31), (2024, 1, 1), (2024, 5, 5)]
+
+
+def test_round_trip_and_key_depends_on_parameters(tmp_path):
+    cache = ExtractCache(str(tmp_path), max_bytes=10 ** 9)
+    key = cache.key(2024, datetime(2024, 1, 1), PARAMS)
+    _seed(cache, 1, _frame(5))
+
+    # Los aciertos vuelven con las columnas de la extracción Arrow: texto como diccionario, el resto Arrow
+    expected = _frame(5).astype({'day': 'date32[pyarrow]', 'title': 'category', 'views': 'int64[pyarrow]'})
+    pd.testing.assert_frame_equal(cache.get(key), expected)
+    assert cache.get(cache.key(2024, datetime(2024, 1, 1), dict(PARAMS, rank_by_views=10))) is None
+
+
+def test_eviction_removes_least_recently_used_entries(tmp_path):
+    cache = ExtractCache(str(tmp_path), max_bytes=10 ** 9)
+    keys = [cache.key(2024, datetime(2024, 1, day), PARAMS) for day in (1, 2, 3)]
+    for age, (day, key) in enumerate(zip((1, 2, 3), keys)):
+        _seed(cache, day, _frame(2000, day))
+        os.utime(cache._path(key), (1_000_000 + age, 1_000_000 + age))
+    cache.get(keys[0])
+
+    cache.max_bytes = os.path.getsize(cache._path(keys[0])) * 2
+    cache.evict()
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+
+
+def test_shard_pages_are_written_as_they_arrive(tmp_path):
+    cache = ExtractCache(str(tmp_path), max_bytes=10 ** 9)
+    shard = ExtractShard(2024, datetime(2024, 1, 1), datetime(2024, 1, 2))
+    pages = [
+        pd.DataFrame({'day': [datetime(2024, 1, day).date()] * 3, 'title': pd.Categorical([f'T{day}{page}'] * 3), 'views': [1, 2, 3]})
+        for page in range(3) for day in (1, 2)
+    ]
+    keys = [cache.key(2024, datetime(2024, 1, day), PARAMS) for day in (1, 2)]
+
+    writer = cache.open_shard(shard, PARAMS)
+    for page in pages:
+        writer.write(page)
+    # Nada es visible hasta terminar el shard
+    assert all(cache.get(key) is None for key in keys)
+    writer.commit()
+
+    first_day = cache.get(keys[0])
+    assert first_day['title'].astype(str).tolist() == ['T10'] * 3 + ['T11'] * 3 + ['T12'] * 3
+    assert len(cache.get(keys[1])) == 9
+
+
+def test_aborted_shard_leaves_no_entries(tmp_path):
+    cache = ExtractCache(str(tmp_path), max_bytes=10 ** 9)
+    shard = ExtractShard(2024, datetime(2024, 1, 1), datetime(2024, 1, 1))
+
+    writer = cache.open_shard(shard, PARAMS)
+    writer.write(_frame(5))
+    writer.abort()
+
+    assert os.listdir(tmp_path) == []
+
+
+@pytest.fixture
+def cached_extraction(tmp_path, monkeypatch, fake_bigquery_client):
+    monkeypatch.setenv('ETL_EXTRACT_CACHE_DIR', str(tmp_path))
+    monkeypatch.setattr(main_etl, '_extract_cache', None)
+    monkeypatch.setattr(
+        main_etl, 'build_pageviews_query',
+        lambda table_id, start, end, *args: f"{start:%Y-%m-%d}|{end:%Y-%m-%d}"
+    )
+
+    def extract(client, page_size=None):
+        batches = main_etl.iter_pageview_batches(
+            client, datetime(2023, 12, 28), datetime(2024, 1, 4), ['en', 'es'], 5000,
+            extractor=ShardedExtractor(client, max_in_flight=2, page_size=page_size)
+        )
+        return pd.concat(list(batches), ignore_index=True).sort_values('day').reset_index(drop=True)
+
+    return extract, fake_bigquery_client
+
+
+@pytest.mark.parametrize('page_size', [None, 1])
+def test_second_run_is_served_from_cache(cached_extraction, page_size):
+    extract, client_class = cached_extraction
+    first_client, second_client = client_class(latency=0), client_class(latency=0)
+
+    first = extract(first_client, page_size)
+    second = extract(second_client)
+
+    assert sorted(first_client.queries) == ['2023-12-28|2023-12-31', '2024-01-01|2024-01-04']
+    assert second_client.queries == []
+    assert second['day'].tolist() == first['day'].tolist()
+    assert second['views_total'].tolist() == first['views_total'].tolist()
+
+
+def test_only_missing_days_are_queried(cached_extraction, monkeypatch):
+    extract, client_class = cached_extraction
+    extract(client_class(latency=0))
+    cache = main_etl.get_extract_cache()
+    for day in (datetime(2023, 12, 29), datetime(2023, 12, 30), datetime(2024, 1, 3)):
+        key = cache.key(day.year, day, {
+            'languages': ['en', 'es'], 'rank_by_views': 5000,
+            'exclude_automated_traffic': True, 'query_version': main_etl.EXTRACT_QUERY_VERSION,
+        })
+        os.remove(cache._path(key))
+
+    client = client_class(latency=0)
+    extracted = extract(client)
+
+    assert sorted(client.queries) == ['2023-12-29|2023-12-30', '2024-01-03|2024-01-03']
+    assert len(extracted) == 8
+
+
+def test_force_refresh_queries_everything(cached_extraction, monkeypatch):
+    extract, client_class = cached_extraction
+    extract(client_class(latency=0))
+    monkeypatch.setenv('ETL_EXTRACT_CACHE_REFRESH', 'true')
+    monkeypatch.setattr(main_etl, '_extract_cache', None)
+
+    client = client_class(latency=0)
+    extract(client)
+
+    assert len(client.queries) == 2
@@ -0,0 +1,103 @@
+import time
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+from extraction import EXTRACT_BACKEND_ARROW, ShardedExtractor, arrow_to_pageviews, plan_shards
+
+
+def _build_query(shard):
+    return f"{shard.start_date:%Y-%m-%d}|{shard.end_date:%Y-%m-%d}"
+
+
+def test_plan_shards_splits_by_year_and_days():
+    shards = plan_shards(datetime(2023, 12, 20), datetime(2024, 1, 10), shard_days=7)
+
+    assert [(s.year, s.start_date.day, s.end_date.day) for s in shards] == [
+        (2023, 20, 26), (2023, 27, 31), (2024, 1, 7), (2024, 8, 10)
+    ]
+    assert [s.year for s in plan_shards(datetime(2022, 6, 1), datetime(2024, 2, 1))] == [2022, 2023, 2024]
+
+
+@pytest.mark.parametrize('page_size', [None, 3])
+def test_extractor_runs_shards_concurrently_within_limit(page_size, fake_bigquery_client):
+    client = fake_bigquery_client()
+    extractor = ShardedExtractor(client, max_in_flight=3, page_size=page_size)
+    shards = plan_shards(datetime(2024, 1, 1), datetime(2024, 3, 31), shard_days=7)
+
+    started = time.perf_counter()
+    frames = list(extractor.iter_batches(shards, _build_query))
+    elapsed = time.perf_counter() - started
+
+    extracted = pd.concat(frames, ignore_index=True)
+    assert sorted(extracted['day']) == list(pd.date_range('2024-01-01', '2024-03-31').date)
+    assert client.max_in_flight == 3
+    assert elapsed < len(shards) * client.latency
+    assert [stats['shard'] for stats in extractor.stats] == list(range(len(shards)))
+    assert sum(stats['rows'] for stats in extractor.stats) == 91
+    assert all(stats['bytes_processed'] == stats['rows'] * 100 for stats in extractor.stats)
+
+
+def test_extractor_propagates_shard_errors(fake_bigquery_client):
+    shards = plan_shards(datetime(2024, 1, 1), datetime(2024, 1, 31), shard_days=7)
+    client = fake_bigquery_client(failing_query=_build_query(shards[2]))
+
+    with pytest.raises(RuntimeError, match='fallo simulado'):
+        list(ShardedExtractor(client, max_in_flight=2).iter_batches(shards, _build_query))
+
+
+def test_consumer_can_stop_early_without_hanging(fake_bigquery_client):
+    client = fake_bigquery_client(latency=0.01)
+    shards = plan_shards(datetime(2024, 1, 1), datetime(2024, 12, 31), shard_days=1)
+    batches = ShardedExtractor(client, max_in_flight=2).iter_batches(shards, _build_query)
+
+    next(batches)
+    batches.close()
+    assert len(client.queries) < len(shards)
+
+
+@pytest.mark.parametrize('page_size', [None, 10])
+def test_arrow_backend_returns_arrow_columns(page_size, fake_bigquery_client):
+    client = fake_bigquery_client(latency=0)
+    extractor = ShardedExtractor(client, page_size=page_size, backend=EXTRACT_BACKEND_ARROW)
+    shards = plan_shards(datetime(2024, 1, 1), datetime(2024, 2, 29), shard_days=30)
+
+    frames = list(extractor.iter_batches(shards, _build_query))
+
+    extracted = pd.concat(frames, ignore_index=True)
+    assert str(extracted['day'].dtype) == 'date32[day][pyarrow]'
+    assert sorted(extracted['day']) == list(pd.date_range('2024-01-01', '2024-02-29').date)
+    assert sum(stats['rows'] for stats in extractor.stats) == 60
+
+
+def test_arrow_backend_falls_back_to_rest_when_storage_api_fails(fake_bigquery_client):
+    client = fake_bigquery_client(latency=0, storage_error=PermissionError('readsessions.create denegado'))
+    shards = plan_shards(datetime(2024, 1, 1), datetime(2024, 1, 14), shard_days=7)
+
+    frames = list(ShardedExtractor(client, backend=EXTRACT_BACKEND_ARROW).iter_batches(shards, _build_query))
+
+    assert sum(len(frame) for frame in frames) == 14
+    assert client.arrow_downloads == ['rest', 'rest']
+
+
+def test_arrow_to_pageviews_unifies_batch_dictionaries_without_object_columns():
+    # Dos lotes con el esquema de la consulta de BigQuery (DATE, STRING, INT64)
+    schema = pa.schema([('day', pa.date32()), ('language', pa.string()), ('title', pa.string()), ('views', pa.int64())])
+    batches = [
+        pa.record_batch([[datetime(2024, 1, 1).date()] * 2, ['en', 'es'], ['Python', 'Java'], [5, 3]], schema=schema),
+        pa.record_batch([[datetime(2024, 1, 2).date()], ['es'], ['Ñandú'], [7]], schema=schema),
+    ]
+
+    frame = arrow_to_pageviews(pa.Table.from_batches(batches))
+
+    assert sorted(frame['title'].cat.categories) == ['Java', 'Python', 'Ñandú']
+    assert frame['title'].tolist() == ['Python', 'Java', 'Ñandú']
+    assert not any(dtype == object for dtype in frame.dtypes)
+    assert frame['views'].tolist() == [5, 3, 7]
+
+
+def test_unknown_backend_is_rejected(fake_bigquery_client):
+    with pytest.raises(ValueError, match='Backend de extracción no soportado'):
+        ShardedExtractor(fake_bigquery_client(), backend='csv')
@@ -0,0 +1,42 @@
+import csv
+import io
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from main_etl import _facts_to_csv, upsert_fact_rows, FACT_COLUMNS
+
+
+@pytest.fixture
+def fact_rows():
+    return pd.DataFrame({
+        'day': pd.to_datetime(['2024-01-01', '2024-01-02']),
+        'page_id': [10, 11],
+        'language': ['es', 'en'],
+        'views_total': [100, 2_000_000_000],
+        'avg_views_7d': [100.0, 1 / 3],
+        'avg_views_28d': [1e-7, 123456789.123456789],
+        'variations': [0.0, -26.666666666666668],
+        'trend_score': [np.nan, 1.1547005383792517],
+    })[FACT_COLUMNS]
+
+
+def test_facts_to_csv_round_trips_values(fact_rows):
+    rows = list(csv.reader(io.StringIO(_facts_to_csv(fact_rows))))
+
+    assert rows[0][:4] == ['2024-01-01', '10', 'es', '100']
+    assert rows[0][7] == ''
+    assert [float(value) for value in rows[1][4:]] == fact_rows.iloc[1, 4:].tolist()
+
+
+def test_facts_to_csv_accepts_date_objects(fact_rows):
+    fact_rows['day'] = [date(2024, 1, 1), date(2024, 1, 2)]
+    rows = list(csv.reader(io.StringIO(_facts_to_csv(fact_rows))))
+    assert [row[0] for row in rows] == ['2024-01-01', '2024-01-02']
+
+
+def test_unknown_load_method_is_rejected(fact_rows):
+    with pytest.raises(ValueError):
+        upsert_fact_rows(None, fact_rows, 'insert_one_by_one')
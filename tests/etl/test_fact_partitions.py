@@ -0,0 +1,108 @@
+from datetime import date
+
+import pandas as pd
+
+from fact_partitions import (
+    FactPartition, detach_old_partitions, ensure_fact_partitions, partitions_for_days, rows_in_partition
+)
+
+
+class FakeCursor:
+    """Responde a las consultas de catálogo de fact_partitions y registra el resto."""
+
+    def __init__(self, partitioned=True, partitions=(), detached=()):
+        self.partitioned = partitioned
+        self.partitions = list(partitions)
+        self.detached = list(detached)
+        self.statements = []
+        self._result = None
+
+    def execute(self, query, params=None):
+        if 'relispartition' in query:
+            self._result = [(name,) for name in self.detached if name in params[0]]
+        elif 'relkind' in query:
+            self._result = [(self.partitioned,)]
+        elif 'pg_inherits' in query:
+            self._result = [
+                (name, f"FOR VALUES FROM ('{start}') TO ('{end}')") for name, start, end in self.partitions
+            ]
+        else:
+            self.statements.append(' '.join(query.split()))
+
+    def fetchone(self):
+        return self._result[0]
+
+    def fetchall(self):
+        return self._result
+
+
+def test_partitions_for_days_agrupa_por_mes_y_cruza_el_año():
+    days = pd.to_datetime(['2023-12-30', '2023-12-31', '2024-01-01', '2024-01-15'])
+
+    assert partitions_for_days(days) == [
+        FactPartition('fact_pageviews_daily_2023_12', date(2023, 12, 1), date(2024, 1, 1)),
+        FactPartition('fact_pageviews_daily_2024_01', date(2024, 1, 1), date(2024, 2, 1)),
+    ]
+
+
+def test_rows_in_partition_filtra_por_rango_semiabierto():
+    df = pd.DataFrame({'day': pd.to_datetime(['2023-12-31', '2024-01-01', '2024-02-01']), 'page_id': [1, 2, 3]})
+
+    january = rows_in_partition(df, FactPartition('fact_pageviews_daily_2024_01', date(2024, 1, 1), date(2024, 2, 1)))
+    whole_table = rows_in_partition(df, FactPartition('fact_pageviews_daily', None, None))
+
+    assert january['page_id'].tolist() == [2]
+    assert len(whole_table) == 3
+
+
+def test_ensure_fact_partitions_sólo_crea_las_que_faltan():
+    cur = FakeCursor(partitions=[('fact_pageviews_daily_2024_01', '2024-01-01', '2024-02-01')])
+
+    partitions = ensure_fact_partitions(cur, pd.to_datetime(['2024-01-31', '2024-02-01']))
+
+    assert [partition.name for partition in partitions] == [
+        'fact_pageviews_daily_2024_01', 'fact_pageviews_daily_2024_02'
+    ]
+    created = [statement for statement in cur.statements if statement.startswith('CREATE TABLE')]
+    assert len(created) == 1
+    assert 'fact_pageviews_daily_2024_02 PARTITION OF fact_pageviews_daily' in created[0]
+
+
+def test_ensure_fact_partitions_reconecta_un_mes_archivado():
+    # La retención desconectó enero: la tabla existe pero ya no es partición
+    cur = FakeCursor(detached=['fact_pageviews_daily_2024_01'])
+
+    partitions = ensure_fact_partitions(cur, pd.to_datetime(['2024-01-31', '2024-02-01']))
+
+    assert [partition.name for partition in partitions] == [
+        'fact_pageviews_daily_2024_01', 'fact_pageviews_daily_2024_02'
+    ]
+    assert any(
+        statement.startswith('ALTER TABLE fact_pageviews_daily ATTACH PARTITION fact_pageviews_daily_2024_01')
+        for statement in cur.statements
+    )
+    created = [statement for statement in cur.statements if statement.startswith('CREATE TABLE')]
+    assert len(created) == 1 and 'fact_pageviews_daily_2024_02' in created[0]
+
+
+def test_ensure_fact_partitions_con_tabla_sin_particionar_carga_en_la_tabla():
+    cur = FakeCursor(partitioned=False)
+
+    assert ensure_fact_partitions(cur, pd.to_datetime(['2024-01-01'])) == [
+        FactPartition('fact_pageviews_daily', None, None)
+    ]
+    assert cur.statements == []
+
+
+def test_detach_old_partitions_conserva_los_ultimos_meses():
+    cur = FakeCursor(partitions=[
+        ('fact_pageviews_daily_2023_11', '2023-11-01', '2023-12-01'),
+        ('fact_pageviews_daily_2023_12', '2023-12-01', '2024-01-01'),
+        ('fact_pageviews_daily_2024_01', '2024-01-01', '2024-02-01'),
+    ])
+
+    expired = detach_old_partitions(cur, keep_months=2, today=date(2024, 1, 20))
+
+    assert [partition.name for partition in expired] == ['fact_pageviews_daily_2023_11']
+    assert 'ALTER TABLE fact_pageviews_daily DETACH PARTITION fact_pageviews_daily_2023_11;' in cur.statements
+    assert not any(statement.startswith('DROP TABLE') for statement in cur.statements)
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from frame_dtypes import compact_pageviews, concat_frames, memory_report, strip_strings
+from transformation_etl import resolve_titles
+
+
+def _extract():
+    return pd.DataFrame({
+        'day': pd.to_datetime(['2024-01-01', '2024-01-01', '2024-01-02', '2024-01-02']).date,
+        'language': ['en', 'en', 'es', 'es'],
+        'platform_type': ['desktop', 'mobile', 'desktop', 'mobile'],
+        'title': ['Python', 'Python', 'Canción', 'Canción'],
+        'views_total': np.array([10, 20, 30, 40], dtype='int64'),
+    })
+
+
+def test_compact_pageviews_usa_diccionarios_y_enteros_reducidos_sin_modificar_la_entrada():
+    df = _extract()
+
+    compact = compact_pageviews(df)
+
+    for column in ('language', 'platform_type', 'title'):
+        assert isinstance(compact[column].dtype, pd.CategoricalDtype)
+    assert compact['views_total'].dtype == np.uint8
+    assert compact['title'].tolist() == df['title'].tolist()
+    assert df['views_total'].dtype == np.int64
+
+
+def test_concat_frames_une_diccionarios_distintos_y_columnas_ausentes():
+    first = compact_pageviews(_extract().iloc[:2])
+    second = compact_pageviews(_extract().iloc[2:]).drop(columns=['platform_type'])
+
+    combined = concat_frames([first, second])
+
+    assert isinstance(combined['title'].dtype, pd.CategoricalDtype)
+    assert list(combined['title'].cat.categories) == ['Canción', 'Python']
+    assert combined['language'].tolist() == ['en', 'en', 'es', 'es']
+    assert combined['platform_type'].isna().tolist() == [False, False, True, True]
+
+
+def test_resolve_titles_devuelve_diccionarios_y_trata_nulos_como_vacío():
+    titles = pd.Series(['Netflix', None, 'NETFLIX', 'Netflix'], dtype=object)
+
+    normalized, categories = resolve_titles(titles)
+
+    assert isinstance(normalized.dtype, pd.CategoricalDtype)
+    assert normalized.tolist() == ['netflix', 'unknown_page', 'netflix', 'netflix']
+    assert list(normalized.cat.categories) == ['netflix', 'unknown_page']
+    assert categories.tolist() == ['Cine_TV', 'General', 'Cine_TV', 'Cine_TV']
+
+
+def test_strip_strings_limpia_las_categorías_y_fusiona_las_que_coinciden():
+    values = pd.Series(pd.Categorical([' a\x00', 'a', 'b ']))
+
+    cleaned = strip_strings(values, remove='\x00')
+
+    assert cleaned.tolist() == ['a', 'a', 'b']
+
+
+def test_memory_report_compara_con_la_representación_expandida():
+    report = memory_report(compact_pageviews(_extract()))
+
+    assert report['rows'] == 4
+    assert report['bytes_per_row'] < report['bytes_per_row_expanded']
+    assert 0 < report['reduction'] < 1
@@ -0,0 +1,95 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from job_progress import (
+    SHARD_STAGE_COMPLETED, SHARD_STAGE_LOADED, iter_checkpoints, job_shards, mark_shards, plan_resume, rows_per_shard
+)
+
+
+def _transformed(days, languages=('en', 'es')):
+    return pd.DataFrame([
+        {'day': pd.Timestamp(day), 'language': language, 'title_normalized': f'page_{i}', 'views_total': i + 1}
+        for day in days for language in languages for i in range(2)
+    ])
+
+
+def test_plan_resume_separa_shards_por_etapa_y_reanuda_en_el_primer_pendiente():
+    shards = job_shards(date(2024, 1, 1), date(2024, 1, 4), ['en', 'es'])
+    progress = {
+        (date(2024, 1, 1), 'en'): SHARD_STAGE_COMPLETED,
+        (date(2024, 1, 1), 'es'): SHARD_STAGE_COMPLETED,
+        (date(2024, 1, 2), 'en'): SHARD_STAGE_LOADED,
+        (date(2024, 1, 2), 'es'): SHARD_STAGE_LOADED,
+        (date(2024, 1, 3), 'en'): SHARD_STAGE_LOADED,
+    }
+
+    plan = plan_resume(shards, progress)
+
+    assert len(shards) == 8
+    assert plan.completed == {(date(2024, 1, 1), 'en'), (date(2024, 1, 1), 'es')}
+    assert len(plan.to_refresh) == 3
+    assert plan.to_load == {(date(2024, 1, 3), 'es'), (date(2024, 1, 4), 'en'), (date(2024, 1, 4), 'es')}
+    assert plan.resume_day == date(2024, 1, 3)
+
+
+def test_plan_resume_sin_pendientes_no_extrae():
+    shards = job_shards(date(2024, 1, 1), date(2024, 1, 1), ['en'])
+
+    plan = plan_resume(shards, {(date(2024, 1, 1), 'en'): SHARD_STAGE_LOADED})
+
+    assert plan.to_load == set()
+    assert plan.resume_day is None
+
+
+def test_iter_checkpoints_agrupa_días_y_descarta_shards_ya_cargados():
+    days = pd.date_range('2024-01-01', '2024-01-05').date
+    df = _transformed(days)
+    pending = job_shards(date(2024, 1, 1), date(2024, 1, 5), ['en', 'es']) - {(date(2024, 1, 2), 'en')}
+
+    blocks = list(iter_checkpoints(df, pending, days_per_checkpoint=2))
+
+    assert [sorted({day for day, _ in shards}) for shards, _ in blocks] == [
+        [date(2024, 1, 1), date(2024, 1, 2)], [date(2024, 1, 3), date(2024, 1, 4)], [date(2024, 1, 5)]
+    ]
+    first_shards, first_rows = blocks[0]
+    assert (date(2024, 1, 2), 'en') not in first_shards
+    assert set(rows_per_shard(first_rows)) == first_shards
+    assert sum(len(rows) for _, rows in blocks) == len(df) - 2
+
+
+def test_iter_checkpoints_entrega_shards_sin_filas_para_registrarlos():
+    df = _transformed([date(2024, 1, 1)], languages=('en',))
+    pending = job_shards(date(2024, 1, 1), date(2024, 1, 2), ['en'])
+
+    blocks = list(iter_checkpoints(df, pending, days_per_checkpoint=1))
+
+    assert blocks[1][0] == {(date(2024, 1, 2), 'en')}
+    assert blocks[1][1].empty
+
+
+class LeaseCursor:
+    """Cursor que responde a la comprobación del lease; registra el resto de sentencias."""
+
+    def __init__(self, owned: bool):
+        self.owned = owned
+        self.statements = []
+
+    def execute(self, query, params=None):
+        self.statements.append((query, params))
+
+    def fetchone(self):
+        return (1,) if self.owned else None
+
+
+def test_mark_shards_con_el_lease_vencido_no_registra_el_progreso():
+    shards = {(date(2024, 1, 1), 'en')}
+    cur = LeaseCursor(owned=False)
+
+    with pytest.raises(RuntimeError, match='ya no es de este worker'):
+        mark_shards(cur, 'job-1', shards, SHARD_STAGE_LOADED, lease=('host-1', 2))
+
+    query, params = cur.statements[0]
+    assert 'FOR SHARE' in query and params == ('job-1', 'host-1', 2)
+    assert len(cur.statements) == 1
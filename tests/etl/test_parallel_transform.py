@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from parallel_transform import transform_data_parallel
+from rolling_engine import WINDOW_MODE_ROWS, WINDOW_MODE_CALENDAR
+from rolling_state import RollingState
+from transformation_etl import transform_data
+
+
+@pytest.fixture
+def extract():
+    rng = np.random.default_rng(5)
+    titles = ['Python', 'python', 'Canción', 'Cancion', 'Netflix', 'Física', 'Fútbol', 'Null']
+    titles += [f'Page_{i}' for i in range(40)]
+    rows = []
+    for day in pd.date_range('2024-01-01', periods=40, freq='D'):
+        for language in ['en', 'es']:
+            for title in titles:
+                if rng.random() < 0.3:
+                    continue
+                for platform in ['desktop', 'mobile']:
+                    rows.append({
+                        'day': day.date(), 'language': language, 'platform_type': platform,
+                        'title': title, 'views_total': int(rng.integers(0, 10_000))
+                    })
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize('window_mode', [WINDOW_MODE_ROWS, WINDOW_MODE_CALENDAR])
+def test_parallel_output_is_identical_to_serial(extract, window_mode):
+    serial = transform_data(extract, window_mode=window_mode, calendar_start=pd.Timestamp('2024-01-01'))
+    parallel = transform_data_parallel(extract, workers=3, window_mode=window_mode)
+
+    pd.testing.assert_frame_equal(parallel, serial)
+
+
+def test_parallel_output_does_not_depend_on_partition_count(extract):
+    first = transform_data_parallel(extract, workers=2, n_partitions=3)
+    second = transform_data_parallel(extract, workers=4, n_partitions=11)
+
+    pd.testing.assert_frame_equal(first, second)
+
+
+def test_parallel_incremental_matches_serial_incremental(extract):
+    days = sorted(extract['day'].unique())
+    history_part = extract[extract['day'] < days[30]]
+    new_part = extract[extract['day'] >= days[30]]
+
+    serial_state, parallel_state = RollingState(), RollingState()
+    transform_data(history_part, rolling_state=serial_state)
+    transform_data(history_part, rolling_state=parallel_state)
+
+    serial = transform_data(new_part, rolling_state=serial_state)
+    parallel = transform_data_parallel(new_part, workers=3, rolling_state=parallel_state)
+
+    pd.testing.assert_frame_equal(parallel, serial)
+    pd.testing.assert_frame_equal(parallel_state.history, serial_state.history)
+
+
+def test_calendar_mode_partitions_share_the_window_start():
+    # Beta empieza el día 10: su partición no trae el primer día de la ventana extraída
+    rows = [
+        {'day': day.date(), 'language': 'en', 'platform_type': 'desktop', 'title': title, 'views_total': 100}
+        for title, start in [('Alpha', '2024-01-01'), ('Beta', '2024-01-10')]
+        for day in pd.date_range(start, '2024-01-20', freq='D')
+    ]
+    extract = pd.DataFrame(rows)
+    calendar_start = pd.Timestamp('2024-01-01')
+
+    serial = transform_data(extract, window_mode=WINDOW_MODE_CALENDAR, calendar_start=calendar_start)
+    parallel = transform_data_parallel(
+        extract, workers=2, n_partitions=8, window_mode=WINDOW_MODE_CALENDAR, calendar_start=calendar_start
+    )
+
+    pd.testing.assert_frame_equal(parallel, serial)
+    beta = parallel[parallel['title_normalized'] == 'beta']
+    assert beta['avg_views_28d'].iloc[:3].round(2).tolist() == [10.0, 18.18, 25.0]
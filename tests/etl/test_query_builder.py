@@ -0,0 +1,133 @@
+import re
+import unicodedata
+from datetime import datetime, timezone
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pytest
+from google.cloud import bigquery
+
+from extraction import ShardedExtractor, plan_shards
+from query_builder import (
+    ExtractBudgetExceeded, PageviewsQuery, build_pageviews_query, sql_string_literal, title_normalized_sql,
+    wiki_codes, EXTRACT_MODE_PUSHDOWN
+)
+from transformation_etl import (
+    build_title_normalized, MAX_TITLE_LENGTH, TITLE_NORMALIZATION_REPLACEMENTS, UNKNOWN_PAGE_TITLE
+)
+
+TABLE_ID = 'bigquery-public-data.wikipedia.pageviews_2024'
+
+
+def _parameters(query: PageviewsQuery) -> dict:
+    return {
+        parameter.name: parameter.values if isinstance(parameter, bigquery.ArrayQueryParameter) else parameter.value
+        for parameter in query.parameters
+    }
+
+
+def test_query_uses_prunable_datehour_range_and_wiki_list():
+    query = build_pageviews_query(TABLE_ID, datetime(2024, 1, 1), datetime(2024, 1, 7), ['en', 'es'], 5000)
+    parameters = _parameters(query)
+
+    assert 'datehour >= @start_ts' in query.sql and 'datehour < @end_ts' in query.sql
+    assert 'wiki IN UNNEST(@wikis)' in query.sql
+    assert 'FORMAT_TIMESTAMP' not in query.sql and 'REGEXP' not in query.sql
+    assert parameters['start_ts'] == datetime(2024, 1, 1, tzinfo=timezone.utc)
+    assert parameters['end_ts'] == datetime(2024, 1, 8, tzinfo=timezone.utc)
+    assert parameters['wikis'] == ['en', 'en.m', 'es', 'es.m']
+    assert parameters['rank_by_views'] == 5000
+
+
+def test_optional_filters_only_add_their_parameters():
+    query = build_pageviews_query(TABLE_ID, datetime(2024, 1, 1), datetime(2024, 1, 1), ['es'], 0, False)
+
+    assert set(_parameters(query)) == {'start_ts', 'end_ts', 'wikis'}
+    assert 'RankedViews' not in query.sql and 'excluded' not in query.sql
+
+
+def test_values_are_never_interpolated_into_sql():
+    query = build_pageviews_query(TABLE_ID, datetime(2024, 1, 1), datetime(2024, 1, 2), ["es'; DROP"], 10)
+
+    assert "DROP" not in query.sql
+    assert wiki_codes(['pt']) == ['pt', 'pt.m']
+
+
+def test_pushdown_ranks_normalized_titles_across_platforms():
+    query = build_pageviews_query(
+        TABLE_ID, datetime(2024, 1, 1), datetime(2024, 1, 7), ['en'], 100, mode=EXTRACT_MODE_PUSHDOWN
+    )
+    ranking = query.sql[query.sql.index('RankedViews AS'):]
+
+    assert 'PARTITION BY day, language\n' in ranking and 'platform_type' not in ranking
+    assert 'NORMALIZE(LOWER(title), NFD)' in query.sql and 'MIN(title) AS title' in query.sql
+    assert 'SELECT day, language, title, views' in ranking
+    assert _parameters(query)['rank_by_views'] == 100
+    with pytest.raises(ValueError):
+        build_pageviews_query(TABLE_ID, datetime(2024, 1, 1), datetime(2024, 1, 1), ['en'], 100, mode='otro')
+
+
+def _sql_normalization(title: str) -> str:
+    # Los pasos de title_normalized_sql, en el mismo orden, con re de Python
+    value = unicodedata.normalize('NFD', title.lower())
+    for pattern, replacement in TITLE_NORMALIZATION_REPLACEMENTS:
+        value = re.sub(pattern, replacement, value)
+    return (value.strip('_') or UNKNOWN_PAGE_TITLE)[:MAX_TITLE_LENGTH]
+
+
+def _re2_normalization(titles) -> list:
+    # Los mismos pasos con RE2 (el motor de BigQuery), vía pyarrow
+    values = pa.array([unicodedata.normalize('NFD', title.lower()) for title in titles])
+    for pattern, replacement in TITLE_NORMALIZATION_REPLACEMENTS:
+        values = pc.replace_substring_regex(values, pattern, replacement)
+    return [(value.strip('_') or UNKNOWN_PAGE_TITLE)[:MAX_TITLE_LENGTH] for value in values.to_pylist()]
+
+
+def test_sql_normalization_matches_title_normalized():
+    titles = [
+        'Café_Society', 'Cafe\u0301-Society', 'São.Paulo_(city)', 'Москва', '東京_2020', '__Ñandú__',
+        'Tab\there', 'x' * 300, '🎬', 'Dvořák:_Symphony_No._9',
+    ]
+    sql = title_normalized_sql('title')
+
+    assert [_sql_normalization(title) for title in titles] == build_title_normalized(pd.Series(titles)).tolist()
+    assert sql.count('REGEXP_REPLACE') == len(TITLE_NORMALIZATION_REPLACEMENTS)
+    assert "'[^a-z0-9\\u0009" in sql and "TRIM(" in sql and f'1, {MAX_TITLE_LENGTH})' in sql
+    assert sql_string_literal("a'\\é") == "'a\\'\\\\\\u00e9'"
+
+
+def test_unicode_whitespace_normalizes_the_same_in_re2_and_python():
+    titles = ['a\u00a0b', 'a\u2009b', 'a\u3000b', 'a\x0bb', 'a\x1cb', 'a\u2028\u2029b', 'Día\u202fde\u00a0Muertos']
+    expected = build_title_normalized(pd.Series(titles, dtype=object)).tolist()
+
+    assert expected[:6] == ['a_b'] * 6 and expected[6] == 'dia_de_muertos'
+    assert [_sql_normalization(title) for title in titles] == expected
+    assert _re2_normalization(titles) == expected
+    assert build_title_normalized(pd.Series(titles, dtype='string[pyarrow]')).tolist() == expected
+
+
+def _fake_query(shard):
+    return PageviewsQuery(f"{shard.start_date:%Y-%m-%d}|{shard.end_date:%Y-%m-%d}", [])
+
+
+def test_dry_run_estimates_every_shard_before_running(fake_bigquery_client):
+    client = fake_bigquery_client(latency=0)
+    extractor = ShardedExtractor(client, dry_run=True, budget_bytes=10_000)
+    shards = plan_shards(datetime(2024, 1, 1), datetime(2024, 1, 14), shard_days=7)
+
+    list(extractor.iter_batches(shards, _fake_query))
+
+    assert len(client.dry_runs) == 2 and len(client.queries) == 2
+    assert extractor.estimated_bytes == 14 * 100
+    assert extractor.processed_bytes == 14 * 100
+
+
+def test_budget_guard_aborts_before_any_query(fake_bigquery_client):
+    client = fake_bigquery_client(latency=0)
+    extractor = ShardedExtractor(client, dry_run=True, budget_bytes=1_000)
+    shards = plan_shards(datetime(2024, 1, 1), datetime(2024, 1, 14), shard_days=7)
+
+    with pytest.raises(ExtractBudgetExceeded):
+        list(extractor.iter_batches(shards, _fake_query))
+    assert client.queries == []
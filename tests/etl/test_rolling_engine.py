@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from rolling_engine import grouped_rolling_metrics, WINDOW_MODE_CALENDAR
+
+GROUP_KEYS = ['language', 'title_normalized']
+
+
+def _reference_metrics(df: pd.DataFrame) -> pd.DataFrame:
+    # Implementación original con groupby + lambda por grupo
+    grouped = df.groupby(GROUP_KEYS)['views_total']
+    result = pd.DataFrame(index=df.index)
+    result['avg_views_7d'] = grouped.transform(lambda x: x.rolling(window=7, min_periods=1).mean())
+    result['avg_views_28d'] = grouped.transform(lambda x: x.rolling(window=28, min_periods=1).mean())
+    result['rolling_std_28d'] = grouped.transform(lambda x: x.rolling(window=28, min_periods=1).std())
+    previous = grouped.shift(1)
+    variations = ((df['views_total'] - previous) / previous) * 100
+    result['variations'] = variations.replace([float('inf'), float('-inf')], 0).fillna(0)
+    return result
+
+
+def _dense_calendar_reference(df: pd.DataFrame) -> pd.DataFrame:
+    # Referencia ingenua: reindexa cada página sobre el calendario completo con 0 vistas
+    calendar = pd.date_range(df['day'].min(), df['day'].max(), freq='D')
+    frames = []
+    for (language, title), group in df.groupby(GROUP_KEYS):
+        dense = group.set_index('day')['views_total'].astype(float).reindex(calendar, fill_value=0)
+        previous = dense.shift(1)
+        variations = (((dense - previous) / previous) * 100).replace([float('inf'), float('-inf')], 0).fillna(0)
+        metrics = pd.DataFrame({
+            'avg_views_7d': dense.rolling(window=7, min_periods=1).mean(),
+            'avg_views_28d': dense.rolling(window=28, min_periods=1).mean(),
+            'rolling_std_28d': dense.rolling(window=28, min_periods=1).std(),
+            'variations': variations,
+        })
+        metrics = metrics.loc[group['day']]
+        metrics.index = group.index
+        frames.append(metrics)
+    return pd.concat(frames).loc[df.index]
+
+
+def _random_pageviews(seed: int, views_dtype, scale: int, gap_probability: float = 0.0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for language in ['en', 'es']:
+        for page in range(40):
+            n_days = int(rng.integers(1, 60))
+            days = pd.date_range('2024-01-01', periods=n_days, freq='D')
+            days = days[rng.random(n_days) >= gap_probability]
+            n_days = len(days)
+            views = rng.integers(0, scale, size=n_days)
+            views[rng.random(n_days) < 0.1] = 0
+            for day, value in zip(days, views):
+                rows.append((day, language, f'page_{page}', value))
+    df = pd.DataFrame(rows, columns=['day', 'language', 'title_normalized', 'views_total'])
+    df['views_total'] = df['views_total'].astype(views_dtype)
+    return df.sort_values(by=['language', 'title_normalized', 'day'])
+
+
+@pytest.mark.parametrize('views_dtype, scale', [
+    ('int64', 1_000),
+    ('int64', 50_000_000),
+    ('Int64', 10_000),
+    ('float64', 10_000),
+    ('int64', 2_000_000_000),
+])
+def test_grouped_rolling_metrics_matches_groupby_rolling(views_dtype, scale):
+    df = _random_pageviews(seed=7, views_dtype=views_dtype, scale=scale)
+
+    result = grouped_rolling_metrics(df, GROUP_KEYS, 'views_total')
+    expected = _reference_metrics(df)
+
+    for column in expected.columns:
+        np.testing.assert_allclose(
+            result[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+            rtol=1e-9, atol=1e-6, equal_nan=True, err_msg=column
+        )
+
+
+@pytest.mark.parametrize('views_dtype, scale', [('int64', 10_000), ('float64', 10_000), ('int64', 2_000_000_000)])
+def test_calendar_mode_matches_dense_reindex(views_dtype, scale):
+    df = _random_pageviews(seed=11, views_dtype=views_dtype, scale=scale, gap_probability=0.4)
+
+    result = grouped_rolling_metrics(
+        df, GROUP_KEYS, 'views_total', window_mode=WINDOW_MODE_CALENDAR, calendar_start=df['day'].min()
+    )
+    expected = _dense_calendar_reference(df)
+
+    for column in expected.columns:
+        np.testing.assert_allclose(
+            result[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+            rtol=1e-9, atol=1e-6, equal_nan=True, err_msg=column
+        )
+
+
+def test_calendar_mode_counts_missing_days_as_zero():
+    df = pd.DataFrame({
+        'day': pd.to_datetime(['2024-01-01', '2024-01-02', '2024-01-10']),
+        'language': ['es'] * 3,
+        'title_normalized': ['pagina'] * 3,
+        'views_total': [70, 70, 70],
+    })
+    rows = grouped_rolling_metrics(df, GROUP_KEYS, 'views_total')
+    calendar = grouped_rolling_metrics(
+        df, GROUP_KEYS, 'views_total', window_mode=WINDOW_MODE_CALENDAR, calendar_start='2024-01-01'
+    )
+
+    assert rows['avg_views_7d'].tolist() == [70.0, 70.0, 70.0]
+    assert calendar['avg_views_7d'].tolist() == [70.0, 70.0, 10.0]
+    assert calendar['avg_views_28d'].iloc[-1] == 210 / 10
+    assert calendar['variations'].tolist() == [0.0, 0.0, 0.0]
+
+
+def test_calendar_mode_does_not_depend_on_other_pages_in_the_frame():
+    df = _random_pageviews(seed=5, views_dtype='int64', scale=1_000, gap_probability=0.4)
+    late_pages = df.groupby(GROUP_KEYS)['day'].transform('min') > df['day'].min()
+
+    together = grouped_rolling_metrics(df, GROUP_KEYS, window_mode=WINDOW_MODE_CALENDAR, calendar_start=df['day'].min())
+    alone = grouped_rolling_metrics(
+        df[late_pages], GROUP_KEYS, window_mode=WINDOW_MODE_CALENDAR, calendar_start=df['day'].min()
+    )
+
+    assert late_pages.any()
+    pd.testing.assert_frame_equal(alone, together[late_pages.to_numpy()])
+
+
+def test_calendar_mode_requires_calendar_start():
+    df = _random_pageviews(seed=1, views_dtype='int64', scale=10)
+    with pytest.raises(ValueError, match='calendar_start'):
+        grouped_rolling_metrics(df, GROUP_KEYS, 'views_total', window_mode=WINDOW_MODE_CALENDAR)
+
+
+def test_unknown_window_mode_is_rejected():
+    df = _random_pageviews(seed=1, views_dtype='int64', scale=10)
+    with pytest.raises(ValueError):
+        grouped_rolling_metrics(df, GROUP_KEYS, 'views_total', window_mode='weeks')
+
+
+def test_constant_window_has_exact_zero_std():
+    df = pd.DataFrame({
+        'language': ['es'] * 30,
+        'title_normalized': ['pagina'] * 30,
+        'views_total': [123_456_789 // 3] * 30,
+    })
+    result = grouped_rolling_metrics(df, GROUP_KEYS, 'views_total')
+    assert np.isnan(result['rolling_std_28d'].iloc[0])
+    assert (result['rolling_std_28d'].iloc[1:] == 0).all()
+
+
+def test_empty_frame():
+    df = pd.DataFrame({'language': [], 'title_normalized': [], 'views_total': pd.Series([], dtype='int64')})
+    result = grouped_rolling_metrics(df, GROUP_KEYS, 'views_total')
+    assert result.empty
+    assert list(result.columns) == ['avg_views_7d', 'avg_views_28d', 'rolling_std_28d', 'variations']
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from frame_dtypes import concat_frames
+from rolling_engine import WINDOW_MODE_ROWS, WINDOW_MODE_CALENDAR
+from rolling_state import RollingState, STATE_HISTORY_ROWS
+from transformation_etl import transform_data
+
+METRIC_COLUMNS = ['views_total', 'avg_views_7d', 'avg_views_28d', 'variations', 'trend_score']
+KEYS = ['day', 'language', 'title_normalized']
+
+
+@pytest.fixture
+def daily_extracts():
+    rng = np.random.default_rng(3)
+    days = pd.date_range('2024-01-01', periods=40, freq='D')
+    titles = ['Python_(programming_language)', 'Canción', 'Netflix', 'Física', 'Fútbol']
+    rows = []
+    for day in days:
+        for language in ['en', 'es']:
+            for title in titles:
+                if rng.random() < 0.25:
+                    continue
+                for platform in ['desktop', 'mobile']:
+                    rows.append({
+                        'day': day, 'language': language, 'platform_type': platform,
+                        'title': title, 'views_total': int(rng.integers(0, 5_000))
+                    })
+    return pd.DataFrame(rows)
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.copy()
+    df['day'] = pd.to_datetime(df['day'])
+    return df.sort_values(by=KEYS).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('window_mode', [WINDOW_MODE_ROWS, WINDOW_MODE_CALENDAR])
+def test_incremental_runs_match_full_recompute(daily_extracts, window_mode, tmp_path):
+    # En modo 'calendar' el origen de las ventanas es el primer día cargado, también en incremental
+    calendar_start = daily_extracts['day'].min()
+    full = _sorted(transform_data(daily_extracts, window_mode=window_mode, calendar_start=calendar_start))
+
+    state_path = str(tmp_path / 'rolling_state.parquet')
+    outputs = []
+    for day, extract in daily_extracts.groupby('day'):
+        state = RollingState.load(state_path)
+        outputs.append(transform_data(extract, window_mode=window_mode, rolling_state=state, calendar_start=calendar_start))
+        state.save(state_path)
+    incremental = _sorted(concat_frames(outputs))
+
+    assert incremental[KEYS].equals(full[KEYS])
+    for column in METRIC_COLUMNS:
+        np.testing.assert_allclose(
+            incremental[column].to_numpy(dtype=float), full[column].to_numpy(dtype=float),
+            rtol=1e-12, atol=1e-9, err_msg=column
+        )
+
+
+def test_state_keeps_only_needed_history(daily_extracts):
+    state = RollingState()
+    transform_data(daily_extracts, rolling_state=state)
+
+    rows_per_page = state.history.groupby(['language', 'title_normalized']).size()
+    assert rows_per_page.max() == STATE_HISTORY_ROWS
+    assert state.pages() == 10
+
+
+def test_rerunning_a_day_replaces_it_in_state(daily_extracts):
+    days = sorted(daily_extracts['day'].unique())
+    state = RollingState()
+    transform_data(daily_extracts[daily_extracts['day'] < days[-1]], rolling_state=state)
+
+    last_day = daily_extracts[daily_extracts['day'] == days[-1]]
+    first = transform_data(last_day, rolling_state=state)
+    second = transform_data(last_day, rolling_state=state)
+
+    pd.testing.assert_frame_equal(_sorted(first), _sorted(second))
+    assert (state.history['day'] == pd.Timestamp(days[-1])).sum() == len(first)
+
+
+def test_loader_reads_only_the_pages_of_each_run(daily_extracts):
+    full = _sorted(transform_data(daily_extracts))
+
+    # Estado persistido por página, como etl_rolling_state
+    stored = {}
+    requested = []
+
+    def loader(pages):
+        requested.append(set(map(tuple, pages.to_numpy())))
+        frames = [stored[key] for key in map(tuple, pages.to_numpy()) if key in stored]
+        return pd.concat(frames) if frames else pd.DataFrame(columns=['language', 'title_normalized', 'day', 'views_total'])
+
+    outputs = []
+    for day, extract in daily_extracts.groupby('day'):
+        state = RollingState(loader=loader)
+        transformed = transform_data(extract, rolling_state=state)
+        outputs.append(transformed)
+        for key, history in state.history_for(transformed).groupby(['language', 'title_normalized']):
+            stored[key] = history
+        pages = set(map(tuple, transformed[['language', 'title_normalized']].astype(object).to_numpy()))
+        assert requested[-1] == pages
+
+    incremental = _sorted(concat_frames(outputs))
+    for column in METRIC_COLUMNS:
+        np.testing.assert_allclose(
+            incremental[column].to_numpy(dtype=float), full[column].to_numpy(dtype=float),
+            rtol=1e-12, atol=1e-9, err_msg=column
+        )
@@ -0,0 +1,87 @@
+from datetime import date
+
+import pandas as pd
+
+from serving_tables import replace_serving_lists, top_n_rows, trending_rows
+
+
+def _frame(rows):
+    return pd.DataFrame(rows, columns=['day', 'language', 'title_normalized', 'original_title', 'views_total', 'category', 'trend_score'])
+
+
+DIA = date(2024, 1, 1)
+
+
+def test_top_n_comparte_puesto_en_empates_como_rank():
+    df = _frame([
+        (DIA, 'es', 'a', 'A', 30, 'Otros', None),
+        (DIA, 'es', 'b', 'B', 20, 'Otros', None),
+        (DIA, 'es', 'c', 'C', 20, 'Otros', None),
+        (DIA, 'es', 'd', 'D', 10, 'Otros', None),
+        (DIA, 'en', 'e', 'E', 5, 'Otros', None),
+    ])
+
+    top = top_n_rows(df, top_k=2)
+
+    assert list(zip(top['title_normalized'], top['rank_by_views'])) == [('e', 1), ('a', 1), ('b', 2), ('c', 2)]
+
+
+def test_top_n_por_partes_es_igual_al_top_n_global():
+    df = _frame([
+        (DIA, 'es', f't{i}', f'T{i}', (i * 37) % 11, 'Otros', None) for i in range(40)
+    ])
+    partes = [top_n_rows(df.iloc[:15], top_k=5), top_n_rows(df.iloc[15:], top_k=5)]
+
+    unido = top_n_rows(pd.concat(partes, ignore_index=True), top_k=5)
+
+    pd.testing.assert_frame_equal(unido, top_n_rows(df, top_k=5))
+
+
+def test_trending_filtra_por_umbral_y_descarta_nulos():
+    df = _frame([
+        (DIA, 'es', 'a', 'A', 30, 'Deportes', 2.0),
+        (DIA, 'es', 'b', 'B', 20, 'Otros', 1.99),
+        (DIA, 'es', 'c', 'C', 20, 'Otros', None),
+    ])
+
+    assert trending_rows(df)['title_normalized'].tolist() == ['a']
+
+
+class FakeCursor:
+    def __init__(self):
+        self.statements = []
+        self.copies = []
+
+    def execute(self, query, params=None):
+        if isinstance(query, bytes):
+            query = query.decode()
+        self.statements.append(' '.join(query.split()))
+
+    def copy_expert(self, sql, file):
+        self.copies.append((sql, file.read()))
+
+    @property
+    def connection(self):
+        return self
+
+    @property
+    def encoding(self):
+        return 'UTF8'
+
+    def mogrify(self, template, args):
+        return template % tuple(f"'{arg}'".encode() for arg in args)
+
+
+def test_replace_serving_lists_reemplaza_solo_las_particiones_cargadas():
+    df = _frame([(DIA, 'es', 'a,"b"', 'A,"B"', 30, 'Otros', 3.0)])
+    cur = FakeCursor()
+
+    replaced = replace_serving_lists(cur, top_n_rows(df), trending_rows(df), {(DIA, 'es')})
+
+    assert replaced == 1
+    deletes = [sql for sql in cur.statements if sql.startswith('DELETE FROM serving_')]
+    assert len(deletes) == 2 and all('USING serving_partitions' in sql for sql in deletes)
+    sql, data = cur.copies[0]
+    assert 'COPY stg_serving_top_n_daily' in sql
+    assert data == '2024-01-01,es,"a,""b""","A,""B""",30,1\n'
+    assert replace_serving_lists(FakeCursor(), top_n_rows(df), trending_rows(df), []) == 0
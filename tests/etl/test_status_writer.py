@@ -0,0 +1,68 @@
+from status_writer import AsyncStatusWriter, coalesce_status_updates, job_status_fields, job_status_update
+
+
+class RecordingConnection:
+    def __init__(self):
+        self.closed = 0
+        self.executed = []
+        self.commits = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, query, params):
+        self.executed.append((query, params))
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = 1
+
+
+def test_updates_for_the_same_job_are_coalesced():
+    updates = [
+        ('job-1', job_status_fields('EXTRAYENDO', 'extrayendo')),
+        ('job-2', job_status_fields('CARGANDO')),
+        ('job-1', job_status_fields('FALLIDO', error_message='error')),
+        ('job-1', job_status_fields('FALLIDO', 'mensaje final')),
+    ]
+
+    coalesced = dict(coalesce_status_updates(updates))
+
+    assert coalesced['job-1'] == {
+        'status': 'FALLIDO', 'message': 'mensaje final', 'error_message': 'error', 'finished': True
+    }
+    assert coalesced['job-2'] == {'status': 'CARGANDO'}
+
+
+def test_update_statement_only_sets_given_columns():
+    query, params = job_status_update('job-1', job_status_fields('COMPLETADO', rows_processed=10))
+
+    assert 'status = %s' in query and 'rows_processed = %s' in query and 'finished_at = NOW()' in query
+    assert 'message' not in query
+    assert params == ('COMPLETADO', 10, 'job-1')
+
+
+def test_writer_batches_updates_on_its_own_connection():
+    conn = RecordingConnection()
+    writer = AsyncStatusWriter(lambda: conn, flush_seconds=5)
+
+    for status in ('EXTRAYENDO', 'TRANSFORMANDO', 'CARGANDO'):
+        writer.submit('job-1', job_status_fields(status))
+    assert writer.flush(timeout=5)
+    writer.close(timeout=5)
+
+    assert len(conn.executed) == 1 and conn.executed[0][1] == ('CARGANDO', 'job-1')
+    assert conn.commits == 1 and conn.closed
+
+
+def test_update_of_a_claimed_job_requires_its_lease():
+    # Tras vencer el lease, el job vuelve a PENDIENTE con worker_id NULL: el UPDATE del proceso viejo no lo toca
+    query, params = job_status_update('job-1', job_status_fields('CARGANDO', lease=('host-1', 2)))
+
+    assert 'WHERE job_id = %s AND worker_id = %s AND attempts = %s AND lease_expires_at IS NOT NULL' in query
+    assert params == ('CARGANDO', 'job-1', 'host-1', 2)
@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from frame_dtypes import concat_frames
+from streaming_etl import PartitionSpiller, partition_numbers, run_streaming_pipeline
+from transformation_etl import transform_data
+
+KEYS = ['day', 'language', 'title_normalized']
+
+
+@pytest.fixture
+def extract():
+    rng = np.random.default_rng(11)
+    titles = ['Python', 'python', 'Canción', 'Cancion', 'Netflix', 'Física', 'Fútbol', 'Null', 'NaN']
+    titles += [f'Page_{i}' for i in range(60)]
+    rows = []
+    for day in pd.date_range('2024-01-01', periods=35, freq='D'):
+        for language in ['en', 'es']:
+            for title in titles:
+                if rng.random() < 0.3:
+                    continue
+                for platform in ['desktop', 'mobile']:
+                    rows.append({
+                        'day': day.date(), 'language': language, 'platform_type': platform,
+                        'title': title, 'views_total': int(rng.integers(0, 10_000))
+                    })
+    return pd.DataFrame(rows)
+
+
+def _batches(df: pd.DataFrame, size: int):
+    for start in range(0, len(df), size):
+        yield df.iloc[start:start + size].reset_index(drop=True)
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    return df.sort_values(by=KEYS).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('memory_limit_mb', [64, 0.01])
+def test_streaming_output_matches_whole_frame_transform(extract, memory_limit_mb, tmp_path):
+    loaded = []
+    stats = run_streaming_pipeline(
+        _batches(extract, 500), transform_data, loaded.append,
+        n_partitions=7, memory_limit_mb=memory_limit_mb, spill_dir=str(tmp_path)
+    )
+
+    streamed = _sorted(concat_frames(loaded))
+    expected = _sorted(transform_data(extract))
+    pd.testing.assert_frame_equal(streamed, expected, check_dtype=False)
+
+    assert stats['rows_extracted'] == len(extract)
+    assert stats['rows_loaded'] == len(expected)
+    assert stats['peak_rss_mb'] > 0
+    if memory_limit_mb < 1:
+        assert stats['spill_count'] > 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_title_variants_share_a_partition(extract):
+    partitions = partition_numbers(extract, 7)
+    for variants in (['Python', 'python'], ['Canción', 'Cancion']):
+        mask = extract['title'].isin(variants) & (extract['language'] == 'en')
+        assert len(np.unique(partitions[mask.to_numpy()])) == 1
+
+
+def test_spiller_preserves_arrival_order_within_partition(tmp_path):
+    spiller = PartitionSpiller(2, memory_limit_bytes=0, spill_dir=str(tmp_path))
+    for start in range(0, 30, 10):
+        batch = pd.DataFrame({'value': np.arange(start, start + 10)})
+        spiller.add(batch, (batch['value'] % 2).to_numpy())
+
+    partitions = dict(spiller.iter_partitions())
+    assert partitions[0]['value'].tolist() == list(range(0, 30, 2))
+    assert partitions[1]['value'].tolist() == list(range(1, 30, 2))
+    assert spiller.spill_count == 3 * 2
@@ -0,0 +1,90 @@
+import pandas as pd
+import pytest
+from datetime import datetime, timedelta
+
+from title_cache import TitleCache
+import transformation_etl
+from transformation_etl import transform_data, resolve_titles, classify_page
+
+
+@pytest.fixture
+def multi_day_data():
+    start_date = datetime(2024, 1, 1)
+    titles = ['Python_(programming_language)', 'Canción', 'Netflix', 'Fútbol']
+    rows = []
+    for offset in range(5):
+        for i, title in enumerate(titles):
+            rows.append({
+                'day': start_date + timedelta(days=offset),
+                'language': 'es',
+                'title': title,
+                'views_total': 100 * (i + 1) + offset
+            })
+    return pd.DataFrame(rows)
+
+
+def test_lru_evicts_least_recently_used():
+    cache = TitleCache(max_size=2)
+    cache.ensure_version('v1')
+    cache.put_many({'a': ('a', 'General'), 'b': ('b', 'General')})
+    cache.get_many(['a'])
+    cache.put_many({'c': ('c', 'General')})
+
+    assert set(cache.get_many(['a', 'b', 'c']).keys()) == {'a', 'c'}
+    assert cache.stats()['size'] == 2
+
+
+def test_hit_and_miss_counters():
+    cache = TitleCache()
+    titles = pd.Series(['Netflix', 'Netflix', 'Física', 'Netflix'])
+
+    resolve_titles(titles, cache)
+    assert cache.stats()['hits'] == 0
+    assert cache.stats()['misses'] == 2
+
+    normalized, categories = resolve_titles(titles, cache)
+    assert cache.stats()['hits'] == 2
+    assert cache.stats()['misses'] == 2
+    assert normalized.tolist() == ['netflix', 'netflix', 'fisica', 'netflix']
+    assert categories.tolist() == ['Cine_TV', 'Cine_TV', 'General', 'Cine_TV']
+
+
+def test_transform_data_with_cache_matches_uncached(multi_day_data):
+    cache = TitleCache()
+    uncached = transform_data(multi_day_data, title_cache=TitleCache(max_size=1))
+    first_run = transform_data(multi_day_data, title_cache=cache)
+    second_run = transform_data(multi_day_data, title_cache=cache)
+
+    pd.testing.assert_frame_equal(first_run, uncached)
+    pd.testing.assert_frame_equal(second_run, uncached)
+    assert cache.stats()['misses'] == 4
+    assert cache.stats()['hits'] == 4
+
+
+def test_persistent_store_is_reused_across_runs(tmp_path, multi_day_data):
+    path = str(tmp_path / 'titles.sqlite')
+    first = TitleCache(path=path)
+    transform_data(multi_day_data, title_cache=first)
+    first.close()
+
+    second = TitleCache(path=path)
+    transform_data(multi_day_data, title_cache=second)
+    assert second.stats()['disk_hits'] == 4
+    assert second.stats()['misses'] == 0
+    second.close()
+
+
+def test_store_invalidates_when_rules_change(tmp_path, monkeypatch):
+    path = str(tmp_path / 'titles.sqlite')
+    titles = pd.Series(['Física'])
+    first = TitleCache(path=path)
+    resolve_titles(titles, first)
+    first.close()
+
+    monkeypatch.setattr(transformation_etl, 'TITLE_RULES_VERSION', 'reglas-modificadas')
+    second = TitleCache(path=path)
+    _, categories = resolve_titles(titles, second)
+    assert second.stats()['disk_hits'] == 0
+    assert second.stats()['misses'] == 1
+    assert categories.tolist() == [classify_page('Física')]
+    second.close()
@@ -0,0 +1,99 @@
+import pandas as pd
+import pytest
+from datetime import datetime
+import os
+import sys
+
+try:
+    from transformation_etl import (
+        transform_data, classify_page, normalize_string,
+        classify_titles, normalize_titles, build_title_normalized
+    )
+except ImportError:
+    current_dir = os.path.dirname(os.path.abspath(__file__))
+    project_root = os.path.join(current_dir, '..', '..')
+    sys.path.insert(0, project_root)
+    from etl.transformation_etl import (
+        transform_data, classify_page, normalize_string,
+        classify_titles, normalize_titles, build_title_normalized
+    )
+
+TITLES_CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'wikipedia_titles.txt')
+
+# Casos límite de Unicode que no siempre aparecen en el corpus
+EDGE_CASE_TITLES = [
+    '', '_', '-', '...', '😂', 'I_♥_NY', 'ΟΔΟΣ', 'K', 'Ω', 'ﬁ', 'ＡＢＣ', 'Ⅻ', '½', 'x²',
+    'ℌ', 'ǅ', 'a b', 'tab\tseparated', 'null\x00byte', 'é́', 'A' * 300
+]
+
+
+@pytest.fixture
+def wikipedia_titles():
+    with open(TITLES_CORPUS_PATH, encoding='utf-8') as corpus:
+        titles = [line.rstrip('\n') for line in corpus if line.strip()]
+    return pd.Series(titles + EDGE_CASE_TITLES)
+
+
+def _reference_title_normalized(titles: pd.Series) -> pd.Series:
+    # Cadena original por fila, usada como referencia de paridad. En columnas object, para que
+    # \s sea el de re de Python (todos los espacios de Unicode) y no el de RE2 (sólo ASCII)
+    title_normalized = titles.apply(normalize_string).astype(object)
+    title_normalized = title_normalized.str.replace(r'[_\-\.]', ' ', regex=True)
+    title_normalized = title_normalized.str.replace(r'[^a-z0-9\s]', '', regex=True)
+    title_normalized = title_normalized.str.replace(r'\s+', '_', regex=True)
+    title_normalized = title_normalized.str.strip('_')
+    title_normalized = title_normalized.str.replace('\x00', '', regex=False).str.strip()
+    title_normalized = title_normalized.apply(lambda x: 'unknown_page' if len(x) == 0 else x)
+    return title_normalized.str.slice(0, 250)
+
+
+def test_normalize_titles_matches_normalize_string(wikipedia_titles):
+    expected = [normalize_string(title) for title in wikipedia_titles]
+    assert normalize_titles(wikipedia_titles).tolist() == expected
+
+
+def test_classify_titles_matches_classify_page(wikipedia_titles):
+    expected = [classify_page(title) for title in wikipedia_titles]
+    assert classify_titles(wikipedia_titles).tolist() == expected
+
+
+def test_build_title_normalized_matches_reference_chain(wikipedia_titles):
+    expected = _reference_title_normalized(wikipedia_titles).tolist()
+    assert build_title_normalized(wikipedia_titles).tolist() == expected
+
+
+def test_vectorized_functions_handle_missing_titles():
+    titles = pd.Series(['Netflix', None, float('nan')], index=[10, 20, 30])
+    assert normalize_titles(titles).tolist() == ['netflix', '', '']
+    assert classify_titles(titles).tolist() == ['Cine_TV', 'General', 'General']
+    assert classify_titles(titles).index.tolist() == [10, 20, 30]
+
+
+def test_transform_data_title_columns_match_reference(wikipedia_titles):
+    day = datetime(2024, 1, 1)
+    df = pd.DataFrame({
+        'day': [day] * len(wikipedia_titles),
+        'language': ['en'] * len(wikipedia_titles),
+        'title': wikipedia_titles,
+        'views_total': range(1, len(wikipedia_titles) + 1)
+    })
+
+    df_transformed = transform_data(df)
+
+    reference = pd.DataFrame({
+        'title': wikipedia_titles,
+        'title_normalized': _reference_title_normalized(wikipedia_titles),
+        'category': wikipedia_titles.apply(classify_page)
+    }).sort_values('title')
+    expected = reference.groupby('title_normalized')['category'].first().to_dict()
+    result = df_transformed.set_index('title_normalized')['category'].to_dict()
+    assert result == expected
+
+
+def test_vectorized_functions_without_pyarrow(wikipedia_titles, monkeypatch):
+    module = sys.modules[classify_titles.__module__]
+    monkeypatch.setattr(module, 'pa', None)
+    monkeypatch.setattr(module, 'pc', None)
+
+    assert normalize_titles(wikipedia_titles).tolist() == [normalize_string(t) for t in wikipedia_titles]
+    assert classify_titles(wikipedia_titles).tolist() == [classify_page(t) for t in wikipedia_titles]
@@ -0,0 +1,77 @@
+from datetime import date
+
+import pandas as pd
+from psycopg2 import errors
+
+from view_refresh import MATERIALIZED_VIEWS, refresh_views, touched_partitions
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, query, params=None):
+        if 'CONCURRENTLY' in query and any(view in query for view in self.conn.without_unique_index):
+            raise errors.ObjectNotInPrerequisiteState('cannot refresh materialized view concurrently')
+        self.conn.statements.append(query)
+
+
+class FakeConnection:
+    def __init__(self, without_unique_index=()):
+        self.without_unique_index = without_unique_index
+        self.statements = []
+        self.commits = 0
+        self.rollbacks = 0
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+
+def test_touched_partitions_son_los_pares_dia_idioma_cargados():
+    df = pd.DataFrame({
+        'day': pd.to_datetime(['2024-01-01', '2024-01-01', '2024-01-02', '2024-01-01']),
+        'language': ['en', 'en', 'en', 'es'],
+        'page_id': [1, 2, 1, 3],
+    })
+
+    assert touched_partitions(df) == {
+        (date(2024, 1, 1), 'en'),
+        (date(2024, 1, 2), 'en'),
+        (date(2024, 1, 1), 'es'),
+    }
+    assert touched_partitions(df.iloc[0:0]) == set()
+
+
+def test_refresh_views_usa_concurrently_y_una_transaccion_por_vista():
+    conn = FakeConnection()
+
+    refresh_views(conn, conn.cursor())
+
+    assert conn.statements == [f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view};" for view in MATERIALIZED_VIEWS]
+    assert conn.commits == len(MATERIALIZED_VIEWS)
+
+
+def test_refresh_views_sin_indice_unico_recurre_al_refresco_completo():
+    conn = FakeConnection(without_unique_index=('mv_top_n_daily_by_language',))
+
+    refresh_views(conn, conn.cursor())
+
+    assert conn.rollbacks == 1
+    assert conn.statements == [
+        "REFRESH MATERIALIZED VIEW mv_top_n_daily_by_language;",
+        "REFRESH MATERIALIZED VIEW CONCURRENTLY mv_trending_daily;",
+    ]
+
+
+def test_refresh_views_modo_completo_no_usa_concurrently():
+    conn = FakeConnection()
+
+    refresh_views(conn, conn.cursor(), concurrently=False)
+
+    assert conn.statements == [f"REFRESH MATERIALIZED VIEW {view};" for view in MATERIALIZED_VIEWS]
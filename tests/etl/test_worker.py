@@ -0,0 +1,141 @@
+from job_queue import ClaimedJob, claim_job
+from worker import EtlWorker
+
+
+class FakeProcess:
+    def __init__(self, job: ClaimedJob):
+        self.job = job
+        self.alive = True
+        self.exitcode = None
+        self.terminated = False
+
+    def is_alive(self):
+        return self.alive
+
+    def finish(self, exitcode: int = 0):
+        self.alive = False
+        self.exitcode = exitcode
+
+    def terminate(self):
+        self.terminated = True
+        self.finish(-15)
+
+    def join(self):
+        pass
+
+
+class FakeQueue:
+    def __init__(self, job_ids):
+        self.pending = [ClaimedJob(job_id, {'start_date': '2024-01-01'}, 1) for job_id in job_ids]
+        self.released = []
+        self.expired = []
+
+    def claim(self, worker_id):
+        return self.pending.pop(0) if self.pending else None
+
+    def heartbeat(self, worker_id, job_ids):
+        return set(job_ids)
+
+    def expire_leases(self):
+        expired, self.expired = self.expired, []
+        return expired
+
+    def release(self, job_id, worker_id, reason, requeue=False):
+        self.released.append((job_id, requeue))
+        return []
+
+
+def _worker(queue, concurrency=2):
+    processes = {}
+
+    def launch(job, worker_id):
+        processes[job.job_id] = FakeProcess(job)
+        return processes[job.job_id]
+
+    clock = iter(range(0, 10_000, 60))
+    worker = EtlWorker(
+        queue, worker_id='host-1', concurrency=concurrency, heartbeat_seconds=30,
+        launch=launch, clock=lambda: next(clock)
+    )
+    return worker, processes
+
+
+def test_worker_respeta_la_concurrencia_y_reclama_al_terminar_un_job():
+    queue = FakeQueue(['a', 'b', 'c'])
+    worker, processes = _worker(queue, concurrency=2)
+
+    worker.run_once()
+    assert set(worker.running) == {'a', 'b'}
+
+    processes['a'].finish(0)
+    worker.run_once()
+
+    assert set(worker.running) == {'b', 'c'}
+    assert queue.released == [('a', False)]
+    assert worker.jobs_started == 3
+
+
+def test_worker_detiene_los_jobs_cuyo_lease_perdio():
+    queue = FakeQueue(['a', 'b'])
+    worker, processes = _worker(queue)
+    worker.run_once()
+
+    queue.heartbeat = lambda worker_id, job_ids: None
+    worker.run_once()
+    assert set(worker.running) == {'a', 'b'}
+
+    queue.heartbeat = lambda worker_id, job_ids: {'b'}
+    worker.run_once()
+    assert processes['a'].terminated and not processes['b'].terminated
+    assert set(worker.running) == {'b'}
+
+
+def test_reclamar_de_nuevo_un_job_detiene_el_proceso_del_intento_anterior():
+    queue = FakeQueue(['a'])
+    worker, processes = _worker(queue, concurrency=2)
+    worker.run_once()
+    stale = processes['a']
+
+    # El lease venció entre dos heartbeats y este mismo worker volvió a reclamar el job
+    queue.pending.append(ClaimedJob('a', {'start_date': '2024-01-01'}, 2))
+    worker.run_once()
+
+    assert stale.terminated
+    assert worker.running['a'] is processes['a'] and not processes['a'].terminated
+
+
+def test_shutdown_devuelve_los_jobs_en_curso_a_la_cola():
+    queue = FakeQueue(['a'])
+    worker, processes = _worker(queue)
+    worker.run_once()
+
+    worker.stop()
+    worker.shutdown()
+
+    assert processes['a'].terminated
+    assert queue.released == [('a', True)]
+    assert worker.running == {}
+
+
+class FakeCursor:
+    def __init__(self, row):
+        self.row = row
+        self.statements = []
+
+    def execute(self, query, params=None):
+        self.statements.append((query, params))
+
+    def fetchone(self):
+        return self.row
+
+
+def test_claim_job_usa_skip_locked_y_devuelve_los_parámetros():
+    cur = FakeCursor(('0b7c', {'languages': ['es']}, 2))
+
+    job = claim_job(cur, 'host-1', lease_seconds=60)
+
+    query, params = cur.statements[0]
+    assert 'FOR UPDATE SKIP LOCKED' in query and "attempts = attempts + 1" in query
+    assert params == ('EN_CURSO', 'host-1', 60, 'PENDIENTE')
+    assert job == ClaimedJob('0b7c', {'languages': ['es']}, 2)
+    assert claim_job(FakeCursor(None), 'host-1') is None